@@ -1,28 +1,302 @@
 """
 This module defines the specialized agents for the automated software development team.
 Each agent has specific roles and responsibilities in the development process.
+LangChain is imported on first use, so importing this module stays cheap.
 """
 
-from langchain_community.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import SystemMessage, HumanMessage
 import os
 import re
+import time
+
+from cache import ResponseCache, get_response_cache
+from context import ContextBudget, estimate_tokens
+from metrics import stage_cost, track_requests
+from ratelimit import get_rate_limiter
+import tracing
+
+DEFAULT_MODEL = "gpt-4"
+
+# Completion tokens reserved against the tokens-per-minute limit for calls
+# without max_tokens.
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Bump whenever a system prompt changes, so previously solved problems are
+# treated as stale and solved again.
+PROMPT_VERSION = "1"
+
+def configured_model():
+    """Return the strong model: OPENAI_MODEL if set, else DEFAULT_MODEL."""
+    return os.getenv("OPENAI_MODEL") or DEFAULT_MODEL
+
+def token_usage(messages, content, llm_output=None):
+    """Return prompt and completion token counts, estimating any the API did not report."""
+    usage = (llm_output or {}).get("token_usage") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens")
+        or sum(estimate_tokens(m.content) for m in messages),
+        "completion_tokens": usage.get("completion_tokens") or estimate_tokens(content)
+    }
+
+class _CodeBlockScanner:
+    """Accumulates streamed text and detects when the first fenced block closes."""
+
+    _OPENING_FENCE = re.compile(r'```[^\n`]*\n')
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._body_start = None
+
+    def feed(self, piece):
+        """Append a piece of the response; return True once a code block is complete."""
+        search_from = max(len(self.text) - 2, 0)
+        self.text += piece
+        if self._body_start is None:
+            opening = self._OPENING_FENCE.search(self.text)
+            if opening is None:
+                return False
+            self._body_start = search_from = opening.end()
+        closing = self.text.find("```", max(search_from, self._body_start))
+        if closing == -1:
+            return False
+        self.text = self.text[:closing + 3]
+        self.complete = True
+        return True
 
 class BaseAgent:
-    def __init__(self, model_name="gpt-4"):
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=0.7,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
+    # Name of the agent's stage, as used in AGENT_NAMES and env overrides.
+    stage = None
+
+    def __init__(self, model_name=DEFAULT_MODEL, use_cache=True, llm=None):
+        if llm is None:
+            from clients import llm_backend, stage_config
+
+            backend = llm_backend()
+            if backend != "openai":
+                from fake_llm import create_chat_model
+
+                llm = create_chat_model(backend, self.stage, stage_config(self.stage, model_name))
+            else:
+                from langchain_community.chat_models import ChatOpenAI
+
+                llm = ChatOpenAI(
+                    model_name=model_name,
+                    temperature=0.7,
+                    openai_api_key=os.getenv("OPENAI_API_KEY")
+                )
+        self.llm = llm
+        self.model_name = llm.model_name
+        self.temperature = llm.temperature
+        # Agents opted out of caching resample on every call.
+        self.cache = get_response_cache() if use_cache else None
+        # Code-producing agents stream and stop at the closing fence when set.
+        self.streaming = False
+        # Calls to one model share its provider limits, so they share a limiter.
+        self.limiter = get_rate_limiter(self.model_name)
+        self.max_retries = getattr(llm, "max_retries", None)
         
     def _create_messages(self, system_prompt, human_prompt):
+        from langchain.schema import SystemMessage, HumanMessage
+
         return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=human_prompt)
         ]
+
+    def _cache_key(self, messages):
+        return ResponseCache.make_key(
+            self.model_name,
+            self.temperature,
+            messages[0].content,
+            messages[1].content
+        )
+
+    def _invoke(self, messages, stats=None, stream=False):
+        """Call the LLM and return the response text, going through the cache.
+
+        With stream=True the response is cut off after the first complete code
+        block. Timings are written into stats when a dict is given.
+        """
+        start = time.perf_counter()
+        timing = {}
+
+        def compute():
+            tokens = self._estimate_request_tokens(messages)
+            call = self._stream_code if stream else self._generate
+            with track_requests() as requests:
+                content = self.limiter.call(
+                    lambda: call(messages, timing), tokens, timing, self.max_retries
+                )
+            timing["retries"] = max(0, requests.count - 1)
+            self.limiter.settle(tokens, timing["prompt_tokens"] + timing["completion_tokens"])
+            return content
+
+        with tracing.span(f"{type(self).__name__}.llm", model=self.model_name, stream=stream) as span:
+            if self.cache is None:
+                content = compute()
+            else:
+                content = self.cache.get_or_compute(
+                    self._cache_key(messages),
+                    compute,
+                    model=self.model_name,
+                    temperature=self.temperature
+                )
+            span.set(cached="generation" not in timing)
+        self._record_stats(stats, timing, start)
+        return content
+
+    async def _ainvoke(self, messages, stats=None, stream=False):
+        """Async variant of _invoke."""
+        start = time.perf_counter()
+        timing = {}
+
+        async def compute():
+            tokens = self._estimate_request_tokens(messages)
+            call = self._astream_code if stream else self._agenerate
+            with track_requests() as requests:
+                content = await self.limiter.acall(
+                    lambda: call(messages, timing), tokens, timing, self.max_retries
+                )
+            timing["retries"] = max(0, requests.count - 1)
+            self.limiter.settle(tokens, timing["prompt_tokens"] + timing["completion_tokens"])
+            return content
+
+        with tracing.span(f"{type(self).__name__}.llm", model=self.model_name, stream=stream) as span:
+            if self.cache is None:
+                content = await compute()
+            else:
+                content = await self.cache.aget_or_compute(
+                    self._cache_key(messages),
+                    compute,
+                    model=self.model_name,
+                    temperature=self.temperature
+                )
+            span.set(cached="generation" not in timing)
+        self._record_stats(stats, timing, start)
+        return content
+
+    def _estimate_request_tokens(self, messages):
+        """Return the tokens a call may use: its prompt plus its completion limit."""
+        max_tokens = getattr(self.llm, "max_tokens", None) or DEFAULT_COMPLETION_TOKENS
+        return sum(estimate_tokens(m.content) for m in messages) + max_tokens
+
+    def _generate(self, messages, timing):
+        """Request a complete response and record its timing and token usage."""
+        start = time.perf_counter()
+        result = self.llm.generate([messages])
+        content = result.generations[0][0].text
+        timing["generation"] = time.perf_counter() - start
+        timing.update(token_usage(messages, content, result.llm_output))
+        return content
+
+    async def _agenerate(self, messages, timing):
+        """Async variant of _generate."""
+        start = time.perf_counter()
+        result = await self.llm.agenerate([messages])
+        content = result.generations[0][0].text
+        timing["generation"] = time.perf_counter() - start
+        timing.update(token_usage(messages, content, result.llm_output))
+        return content
+
+    def _record_stats(self, stats, timing, start):
+        if stats is None:
+            return
+        stats.update(timing)
+        stats["total"] = time.perf_counter() - start
+        stats["model"] = self.model_name
+        # No generation timing means the answer came from the cache, at no token cost.
+        stats["cached"] = "generation" not in timing
+        stats.setdefault("prompt_tokens", 0)
+        stats.setdefault("completion_tokens", 0)
+        stats.setdefault("retries", 0)
+        stats.setdefault("throttled", 0.0)
+        stats.setdefault("rate_limited", 0)
+        stats["cost"] = stage_cost(stats)
+
+    def _request_params(self, messages):
+        """Return OpenAI chat completion arguments equivalent to self.llm's call."""
+        from langchain_community.adapters.openai import convert_message_to_dict
+
+        params = {
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "messages": [convert_message_to_dict(m) for m in messages]
+        }
+        if getattr(self.llm, "max_tokens", None) is not None:
+            params["max_tokens"] = self.llm.max_tokens
+        return params
+
+    def _iter_stream(self, messages):
+        """Yield response text as it arrives; closing the generator aborts the request."""
+        client = getattr(self.llm, "client", None)
+        if not hasattr(client, "create"):
+            for chunk in self.llm.stream(messages):
+                yield chunk.content
+            return
+        stream = client.create(stream=True, **self._request_params(messages))
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response drops the connection, which stops generation.
+            stream.close()
+
+    async def _aiter_stream(self, messages):
+        """Async variant of _iter_stream."""
+        client = getattr(self.llm, "async_client", None)
+        if not hasattr(client, "create"):
+            async for chunk in self.llm.astream(messages):
+                yield chunk.content
+            return
+        stream = await client.create(stream=True, **self._request_params(messages))
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    def _stream_code(self, messages, timing):
+        """Stream a response and stop as soon as the first code block is complete."""
+        start = time.perf_counter()
+        # A retried stream is timed from scratch.
+        timing.pop("ttfb", None)
+        scanner = _CodeBlockScanner()
+        pieces = self._iter_stream(messages)
+        try:
+            for piece in pieces:
+                if "ttfb" not in timing:
+                    timing["ttfb"] = time.perf_counter() - start
+                if scanner.feed(piece):
+                    break
+        finally:
+            pieces.close()
+        timing["generation"] = time.perf_counter() - start
+        timing["truncated"] = scanner.complete
+        timing.update(token_usage(messages, scanner.text))
+        return scanner.text
+
+    async def _astream_code(self, messages, timing):
+        """Async variant of _stream_code."""
+        start = time.perf_counter()
+        timing.pop("ttfb", None)
+        scanner = _CodeBlockScanner()
+        pieces = self._aiter_stream(messages)
+        try:
+            async for piece in pieces:
+                if "ttfb" not in timing:
+                    timing["ttfb"] = time.perf_counter() - start
+                if scanner.feed(piece):
+                    break
+        finally:
+            await pieces.aclose()
+        timing["generation"] = time.perf_counter() - start
+        timing["truncated"] = scanner.complete
+        timing.update(token_usage(messages, scanner.text))
+        return scanner.text
     
+    @tracing.traced("_extract_code")
     def _extract_code(self, markdown_response):
         """Extract code from markdown response by removing markdown formatting."""
         # Find Python code blocks
@@ -44,9 +318,11 @@ class BaseAgent:
 
 class ResearchAnalyst(BaseAgent):
     """Agent responsible for analyzing problems and providing detailed breakdowns."""
+
+    stage = "research_analyst"
     
-    def __init__(self, model_name="gpt-4"):
-        super().__init__(model_name)
+    def __init__(self, model_name=DEFAULT_MODEL, use_cache=True, llm=None):
+        super().__init__(model_name, use_cache, llm)
         self.system_prompt = """You are an experienced software analyst with expertise in 
         breaking down complex problems into manageable components. You excel at 
         identifying edge cases and potential challenges.
@@ -86,19 +362,26 @@ class ResearchAnalyst(BaseAgent):
         Provide clear guidance on error handling and input validation requirements.
         Pay special attention to specifying the exact return type required by the problem."""
     
-    def analyze_problem(self, problem_description):
-        messages = self._create_messages(
+    def _analysis_messages(self, problem_description):
+        return self._create_messages(
             self.system_prompt,
             f"Please analyze this coding problem:\n\n{problem_description}"
         )
-        response = self.llm.invoke(messages)
-        return response.content
+
+    def analyze_problem(self, problem_description, stats=None):
+        return self._invoke(self._analysis_messages(problem_description), stats)
+
+    async def aanalyze_problem(self, problem_description, stats=None):
+        """Async variant of analyze_problem."""
+        return await self._ainvoke(self._analysis_messages(problem_description), stats)
 
 class TestEngineer(BaseAgent):
     """Agent responsible for creating and running comprehensive test cases."""
+
+    stage = "test_engineer"
     
-    def __init__(self, model_name="gpt-4"):
-        super().__init__(model_name)
+    def __init__(self, model_name=DEFAULT_MODEL, use_cache=True, llm=None):
+        super().__init__(model_name, use_cache, llm)
         self.system_prompt = """You are a meticulous test engineer who ensures code quality 
         through thorough testing. You excel at identifying edge cases and potential failure points.
         
@@ -141,20 +424,31 @@ class TestEngineer(BaseAgent):
         10. Include performance benchmarks
         11. Match the return type specified in the function signature (e.g., if function returns Tuple[int, int], tests should expect tuples, not lists)"""
     
-    def create_tests(self, analysis):
-        """Create tests based on the problem analysis."""
-        messages = self._create_messages(
+    def _test_messages(self, analysis):
+        return self._create_messages(
             self.system_prompt,
             f"Please create a comprehensive test suite based on this analysis:\n\n{analysis}"
         )
-        response = self.llm.invoke(messages)
-        return self._extract_code(response.content)
+
+    def create_tests(self, analysis, stats=None):
+        """Create tests based on the problem analysis."""
+        return self._extract_code(
+            self._invoke(self._test_messages(analysis), stats, self.streaming)
+        )
+
+    async def acreate_tests(self, analysis, stats=None):
+        """Async variant of create_tests."""
+        return self._extract_code(
+            await self._ainvoke(self._test_messages(analysis), stats, self.streaming)
+        )
 
 class PythonDeveloper(BaseAgent):
     """Agent responsible for writing clean and efficient code solutions."""
+
+    stage = "python_developer"
     
-    def __init__(self, model_name="gpt-4"):
-        super().__init__(model_name)
+    def __init__(self, model_name=DEFAULT_MODEL, use_cache=True, llm=None):
+        super().__init__(model_name, use_cache, llm)
         self.system_prompt = """You are a skilled Python developer with extensive experience 
         in writing production-quality code. You follow best practices and ensure code is 
         maintainable, robust, and efficient.
@@ -188,22 +482,117 @@ class PythonDeveloper(BaseAgent):
         
         Provide ONLY the implementation code in a Python code block (```python ... ```).
         Focus first on correctness and robustness, then on optimization."""
+        # When set, implementation prompts over budget send condensed requirements.
+        self.context_budget = None
     
-    def implement_solution(self, analysis, tests):
-        """Implement solution based on analysis and test requirements."""
-        messages = self._create_messages(
+    def _implementation_messages(self, analysis, tests, stats=None):
+        if self.context_budget is not None:
+            requirements, report = self.context_budget.condense(analysis, tests)
+            if stats is not None:
+                stats.update(report)
+            if requirements is not None:
+                return self._create_messages(
+                    self.system_prompt,
+                    f"Please implement a solution that meets these requirements"
+                    f"{' and passes tests making these assertions' if tests is not None else ''}"
+                    f":\n\n{requirements}"
+                )
+        if tests is None:
+            # Speculative mode: the tests are still being written.
+            return self._create_messages(
+                self.system_prompt,
+                f"Please implement a solution that satisfies this analysis:\n\n"
+                f"Analysis:\n{analysis}"
+            )
+        return self._create_messages(
             self.system_prompt,
             f"Please implement a solution that satisfies this analysis and passes these tests:\n\n"
             f"Analysis:\n{analysis}\n\n"
             f"Tests:\n{tests}"
         )
-        response = self.llm.invoke(messages)
-        return self._extract_code(response.content)
 
-def create_agents(model_name="gpt-4"):
-    """Factory function to create and return all specialized agents."""
+    def implement_solution(self, analysis, tests, stats=None):
+        """Implement solution based on analysis and test requirements.
+
+        Pass tests=None to implement from the analysis alone.
+        """
+        return self._extract_code(
+            self._invoke(self._implementation_messages(analysis, tests, stats), stats,
+                         self.streaming)
+        )
+
+    async def aimplement_solution(self, analysis, tests, stats=None):
+        """Async variant of implement_solution."""
+        return self._extract_code(
+            await self._ainvoke(self._implementation_messages(analysis, tests, stats), stats,
+                                self.streaming)
+        )
+
+    def _repair_messages(self, code, failures):
+        failure_report = "\n\n".join(
+            f"{failure['test']}:\n{failure['message']}" if failure['message'] else failure['test']
+            for failure in failures
+        )
+        return self._create_messages(
+            self.system_prompt,
+            f"This implementation fails the tests listed below. Fix it so they pass, "
+            f"keeping the same function names and signatures.\n\n"
+            f"Failing tests:\n{failure_report}\n\n"
+            f"Current code:\n```python\n{code}\n```"
+        )
+
+    def repair_solution(self, code, failures, stats=None):
+        """Fix code given only the failing test names and their assertion messages."""
+        return self._extract_code(
+            self._invoke(self._repair_messages(code, failures), stats, self.streaming)
+        )
+
+AGENT_NAMES = ('research_analyst', 'python_developer', 'test_engineer')
+
+def create_agents(model_name=None, uncached=()):
+    """Factory function to create and return all specialized agents.
+
+    Agents named in `uncached` bypass the response cache, so sampling-based
+    stages still produce fresh output on every run. model_name defaults to
+    configured_model().
+    """
+    model_name = model_name or configured_model()
     return {
-        'research_analyst': ResearchAnalyst(model_name),
-        'python_developer': PythonDeveloper(model_name),
-        'test_engineer': TestEngineer(model_name)
-    } 
\ No newline at end of file
+        'research_analyst': ResearchAnalyst(model_name, 'research_analyst' not in uncached),
+        'python_developer': PythonDeveloper(model_name, 'python_developer' not in uncached),
+        'test_engineer': TestEngineer(model_name, 'test_engineer' not in uncached)
+    }
+
+def get_agents(model_name=None, uncached=(), streaming=False, context_budget=None):
+    """Return long-lived agents that share pooled clients from the client registry.
+
+    Agents are stateless between calls, so one set serves every problem in a run.
+    With streaming, the test and code stages stop reading at the closing fence.
+    With context_budget, implementation prompts are condensed to that many tokens.
+    model_name defaults to configured_model().
+    """
+    from clients import get_client_registry
+
+    registry = get_client_registry()
+    model_name = model_name or configured_model()
+    key = (model_name, frozenset(uncached), streaming, context_budget)
+    agents = registry.agents.get(key)
+    if agents is None:
+        agents = {
+            name: agent_class(
+                model_name,
+                name not in uncached,
+                registry.chat_model(name, model_name)
+            )
+            for name, agent_class in (
+                ('research_analyst', ResearchAnalyst),
+                ('python_developer', PythonDeveloper),
+                ('test_engineer', TestEngineer)
+            )
+        }
+        agents['test_engineer'].streaming = streaming
+        agents['python_developer'].streaming = streaming
+        if context_budget:
+            agents['python_developer'].context_budget = ContextBudget(context_budget)
+        agents = registry.agents.setdefault(key, agents)
+    return agents
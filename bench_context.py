@@ -0,0 +1,51 @@
+"""
+Context budget benchmark over the solutions already in problems/solved.
+Condenses each solution's analysis and tests with the given budgets and
+reports the original and condensed implementation-prompt tokens, the ratio
+and how many unique test assertions fit. Whether the condensed prompts keep
+the pass rate can only be measured against a live model: solve the same
+problems with and without --context-budget and compare
+`python catalog.py failure-rate`.
+
+Usage:
+    python bench_context.py [--budget 500,1000,2000] [--solved problems/solved]
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+from blobstore import load_solution
+from context import ContextBudget
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure context budget compression")
+    parser.add_argument("--budget", default="500,1000,2000",
+                        help="Comma-separated token budgets (default: 500,1000,2000)")
+    parser.add_argument("--solved", default="problems/solved", help="Solved problems directory")
+    args = parser.parse_args(argv)
+
+    solutions = [(solution_file.parent.name, load_solution(solution_file))
+                 for solution_file in sorted(Path(args.solved).glob("*/solution.json"))]
+    if not solutions:
+        print(f"No solutions in {args.solved}")
+        return 1
+    for budget in (int(value) for value in args.budget.split(",")):
+        print(f"--context-budget {budget}")
+        ratios = []
+        for name, data in solutions:
+            text, report = ContextBudget(budget).condense(
+                data["problem"]["analysis"], data["solution"]["tests"]
+            )
+            ratios.append(report["context_ratio"])
+            kept = (f"{report['context_assertions_kept']}/{report['context_assertions']} assertions"
+                    if "context_assertions" in report else "unchanged" if text is None else "")
+            print(f"    {name:<40} {report['context_original_tokens']:>6} -> "
+                  f"{report['context_tokens']:>6} tokens  ({report['context_ratio']:4.0%})  {kept}")
+        print(f"    mean ratio {statistics.mean(ratios):.0%}, "
+              f"median {statistics.median(ratios):.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+End-to-end pipeline throughput benchmark on the offline LLM backends.
+Runs `main.py --force` in a scratch directory once per concurrency level, with
+LLM_BACKEND=synthetic (or replay) standing in for the API, and reports
+problems per second and where each problem's time went: per stage, the LLM
+latency the fake backend simulated and the orchestration overhead on top of
+it (total stage time minus generation time), plus the test runs, benchmark
+and saving. With zero latency the whole run is overhead.
+
+Usage:
+    python bench_pipeline.py [--jobs 1,2,4,8] [--problems 16] [--latency lognormal:0.3,0.5]
+    python bench_pipeline.py --backend replay --problems 8 --json bench.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+LLM_STAGES = ("analysis", "tests", "implementation", "speculative_implementation", "repair",
+              "escalated_tests", "escalated_implementation")
+
+def write_problems(problems_dir, backend, count):
+    """Write count problem files; replay reuses the repo's problems under new names."""
+    problems_dir.mkdir(parents=True)
+    if backend == "replay":
+        sources = sorted((REPO_DIR / "problems" / "unsolved").glob("*.txt"))
+        if not sources:
+            raise SystemExit("No problems in problems/unsolved to replay")
+        for i in range(count):
+            source = sources[i % len(sources)]
+            shutil.copy(source, problems_dir / f"{source.stem}_{i:03d}.txt")
+    else:
+        for i in range(count):
+            (problems_dir / f"bench_{i:03d}.txt").write_text(
+                f"Benchmark problem {i}: return the sum of a list of integers.\n",
+                encoding="utf-8"
+            )
+
+def stage_breakdown(solved_dir):
+    """Return per-stage mean seconds (total, generation, overhead) over every run."""
+    samples = {}
+    for solution_file in solved_dir.glob("*/solution.json"):
+        with open(solution_file, 'r', encoding='utf-8') as f:
+            stages = json.load(f).get("stages", {})
+        for stage, stats in stages.items():
+            if "total" not in stats:
+                continue
+            generation = stats.get("generation", 0.0) if stage in LLM_STAGES else 0.0
+            samples.setdefault(stage, []).append((stats["total"], generation))
+    return {
+        stage: {
+            "total": statistics.mean(total for total, _ in values),
+            "generation": statistics.mean(generation for _, generation in values),
+            "overhead": statistics.mean(total - generation for total, generation in values)
+        }
+        for stage, values in samples.items()
+    }
+
+def run_level(jobs, args, env):
+    """Run the pipeline once with the given job count and return its results."""
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        work_dir = Path(work_dir)
+        write_problems(work_dir / "problems" / "unsolved", args.backend, args.problems)
+        command = [sys.executable, str(REPO_DIR / "main.py"), "--force", "--no-checkpoints",
+                   "--jobs", str(jobs)] + args.main_args
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=work_dir, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            sys.stderr.write(result.stdout[-2000:] + result.stderr[-2000:])
+            raise SystemExit(f"main.py exited with status {result.returncode} at --jobs {jobs}")
+        solved_dir = work_dir / "problems" / "solved"
+        solved = len(list(solved_dir.glob("*/solution.json")))
+        return {
+            "jobs": jobs,
+            "elapsed": elapsed,
+            "solved": solved,
+            "problems_per_second": solved / elapsed,
+            "stages": stage_breakdown(solved_dir)
+        }
+
+def print_level(level, baseline):
+    speedup = level["problems_per_second"] / baseline if baseline else 0.0
+    print(f"--jobs {level['jobs']:<3} {level['solved']:>4} solved in {level['elapsed']:6.2f}s  "
+          f"{level['problems_per_second']:6.2f} problems/s  x{speedup:.2f}")
+    for stage, means in sorted(level["stages"].items()):
+        print(f"    {stage:<28} total {means['total'] * 1000:8.1f} ms  "
+              f"llm {means['generation'] * 1000:8.1f} ms  "
+              f"overhead {means['overhead'] * 1000:8.1f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline throughput on a fake LLM backend")
+    parser.add_argument("--jobs", default="1,2,4,8",
+                        help="Comma-separated concurrency levels (default: 1,2,4,8)")
+    parser.add_argument("--problems", type=int, default=16,
+                        help="Problems per run (default: 16)")
+    parser.add_argument("--backend", choices=("synthetic", "replay"), default="synthetic",
+                        help="Fake LLM backend (default: synthetic)")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5",
+                        help="LLM_FAKE_LATENCY for every stage (default: lognormal:0.3,0.5)")
+    parser.add_argument("--seed", default="0", help="LLM_FAKE_SEED (default: 0)")
+    parser.add_argument("--json", default=None, help="Also write the results to this file")
+    parser.add_argument("main_args", nargs=argparse.REMAINDER,
+                        help="Extra main.py options after --, e.g. -- --stream --no-benchmark")
+    args = parser.parse_args(argv)
+    args.main_args = [arg for arg in args.main_args if arg != "--"]
+
+    env = dict(os.environ,
+               LLM_BACKEND=args.backend,
+               LLM_FAKE_LATENCY=args.latency,
+               LLM_FAKE_SEED=args.seed,
+               LLM_CACHE="0")
+    if args.backend == "replay":
+        from fake_llm import build_recordings
+
+        # Recordings come from the repo's solutions, not the scratch directory's.
+        replay_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        with replay_file:
+            json.dump(build_recordings(REPO_DIR / "problems" / "solved"), replay_file)
+        env["LLM_REPLAY_FILE"] = replay_file.name
+
+    results = []
+    try:
+        for jobs in (int(level) for level in args.jobs.split(",")):
+            results.append(run_level(jobs, args, env))
+            print_level(results[-1], results[0]["problems_per_second"])
+    finally:
+        if args.backend == "replay":
+            os.unlink(env["LLM_REPLAY_FILE"])
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"backend": args.backend, "latency": args.latency,
+                       "problems": args.problems, "levels": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Rate-limit benchmark against the local fake OpenAI server.
+Starts fake_openai.py in-process with a concurrency cap, a requests-per-minute
+limit and random 429s, then sends a burst of analysis calls through the
+shared agents, their rate limiter and the real OpenAI client stack. Reports
+throughput, the 429s the server sent, the peak concurrency it saw and where
+the AIMD limit settled. Exits with status 1 if any call still failed after
+its retries.
+
+Usage:
+    python bench_ratelimit.py [--calls 60] [--max-concurrent 4] [--rate-limit-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from fake_openai import FakeOpenAIServer
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LLM rate limiting against a fake server")
+    parser.add_argument("--calls", type=int, default=60, help="Calls to send at once (default: 60)")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Server latency per request in seconds (default: 0.2)")
+    parser.add_argument("--max-concurrent", type=int, default=4,
+                        help="Server concurrency cap; beyond it requests get 429 (default: 4)")
+    parser.add_argument("--rpm", type=int, default=None,
+                        help="Server requests-per-minute limit (default: none)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05,
+                        help="Fraction of requests the server rejects at random (default: 0.05)")
+    parser.add_argument("--retry-after", type=float, default=0.2,
+                        help="Retry-After seconds sent with each 429 (default: 0.2)")
+    parser.add_argument("--client-rpm", type=float, default=None,
+                        help="LLM_RPM for the client-side token bucket (default: none)")
+    parser.add_argument("--max-retries", type=int, default=8,
+                        help="Retries per call (default: 8)")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        latency=args.latency, requests_per_minute=args.rpm, max_concurrent=args.max_concurrent,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=0
+    ).start()
+    # Configure the client stack before the first client and limiter are built.
+    os.environ.update({
+        "OPENAI_BASE_URL": server.url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "fake",
+        "LLM_CACHE": "0",
+        "LLM_BACKOFF_BASE": "0.1",
+        "RESEARCH_ANALYST_MAX_RETRIES": str(args.max_retries)
+    })
+    if args.client_rpm:
+        os.environ["LLM_RPM"] = str(args.client_rpm)
+
+    from agents import get_agents
+    from clients import get_client_registry
+
+    analyst = get_agents()["research_analyst"]
+
+    async def run():
+        async def one(i):
+            stats = {}
+            await analyst.aanalyze_problem(f"Benchmark problem {i}", stats)
+            return stats
+
+        try:
+            return await asyncio.gather(*(one(i) for i in range(args.calls)),
+                                        return_exceptions=True)
+        finally:
+            await get_client_registry().aclose()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    stats = [result for result in results if not isinstance(result, Exception)]
+    limiter = analyst.limiter
+    print(f"calls             {args.calls} ({len(failures)} failed)")
+    print(f"elapsed           {elapsed:.2f}s  ({len(stats) / elapsed:.1f} calls/s)")
+    print(f"server            {server.stats['requests']} requests, "
+          f"{server.stats['rate_limited']} answered 429, "
+          f"peak concurrency {server.stats['peak_concurrency']}")
+    print(f"client            {sum(s['retries'] for s in stats)} retries, "
+          f"{sum(s['throttled'] for s in stats):.1f}s throttled")
+    print(f"concurrency limit {limiter.concurrency.limit:.1f} "
+          f"(latency average {limiter.concurrency.latency or 0:.3f}s)")
+    for failure in failures[:3]:
+        print(f"failure: {type(failure).__name__}: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Startup benchmark for the command-line fast paths.
+Times `import main` and `main.py --list/--status/--dry-run` in fresh
+interpreters and checks that none of them loads the heavy pipeline
+dependencies. Exits with status 1 when a median exceeds the limit or a heavy
+module is imported, so it can gate changes that regress startup.
+
+Usage:
+    python bench_startup.py [--runs 7] [--max-ms 200]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = (
+    "asyncio", "httpx", "langchain", "langchain_community", "langchain_core",
+    "openai", "pytest", "rich"
+)
+
+COMMANDS = {
+    "import main": "import main",
+    "--list": "main.main(['--list'])",
+    "--status": "main.main(['--status'])",
+    "--dry-run": "main.main(['--dry-run'])"
+}
+
+_PROBE = """
+import contextlib, io, json, sys
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+    {statement}
+print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))))
+"""
+
+def run_probe(statement):
+    """Run statement in a fresh interpreter; return (wall seconds, heavy modules loaded)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per command (default: 7)")
+    parser.add_argument("--max-ms", type=float, default=200.0,
+                        help="Fail if a median startup exceeds this many milliseconds")
+    args = parser.parse_args(argv)
+
+    # Warm the filesystem and bytecode caches so the first sample is not an outlier.
+    run_probe("pass")
+    failed = False
+    for name, statement in COMMANDS.items():
+        timings = []
+        heavy = set()
+        for _ in range(args.runs):
+            elapsed, loaded = run_probe(statement)
+            timings.append(elapsed * 1000)
+            heavy.update(loaded)
+        median = statistics.median(timings)
+        problems = []
+        if median > args.max_ms:
+            problems.append(f"median above {args.max_ms:g} ms")
+        if heavy:
+            problems.append(f"imports {', '.join(sorted(heavy))}")
+        failed = failed or bool(problems)
+        print(f"{name:<12}  median {median:6.1f} ms  min {min(timings):6.1f} ms"
+              f"{'  FAIL: ' + '; '.join(problems) if problems else ''}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+This module benchmarks generated solutions and fits their empirical complexity.
+The solution's entry point, the first function it defines that the tests call
+(or that the analysis gives a signature for), is timed over a geometric
+series of input sizes,
+with warmup, repetitions and the garbage collector paused, and the timings are
+fitted against the usual growth classes. The fitted class is then compared to
+the time complexity bound stated in the analysis.
+"""
+
+import collections.abc
+import gc
+import importlib.util
+import inspect
+import itertools
+import math
+import random
+import re
+import string
+import sys
+import time
+import typing
+
+MIN_SIZE = 64
+MAX_SIZE = 2 ** 16
+GROWTH_FACTOR = 2
+REPEATS = 5
+# Stop growing the input once one call or the whole benchmark takes this long.
+MAX_CALL_TIME = 0.25
+MAX_TOTAL_TIME = 5.0
+MIN_POINTS = 4
+# A class is preferred over a faster-growing one unless its fit is this much worse.
+FIT_TOLERANCE = 1.1
+
+# (label, polynomial degree, log power, growth function), slowest-growing first.
+COMPLEXITY_CLASSES = (
+    ("O(1)", 0, 0, lambda n: 1.0),
+    ("O(log n)", 0, 1, lambda n: math.log2(n)),
+    ("O(n)", 1, 0, lambda n: float(n)),
+    ("O(n log n)", 1, 1, lambda n: n * math.log2(n)),
+    ("O(n^2)", 2, 0, lambda n: float(n) ** 2),
+    ("O(n^3)", 3, 0, lambda n: float(n) ** 3)
+)
+_CLASSES = {label: (degree, log_power) for label, degree, log_power, _ in COMPLEXITY_CLASSES}
+_BOUND_EXPRESSIONS = {
+    "1": "O(1)",
+    "logn": "O(log n)",
+    "n": "O(n)",
+    "nlogn": "O(n log n)",
+    "n^2": "O(n^2)",
+    "n^3": "O(n^3)"
+}
+_BIG_O = re.compile(r'O\(([^()]*(?:\([^()]*\)[^()]*)*)\)')
+_module_ids = itertools.count()
+
+def normalize_complexity(expression):
+    """Map a big-O argument such as 'n log n' or 'n**2' to a known class label, or None."""
+    expression = expression.lower().replace("**", "^").replace("²", "^2").replace("³", "^3")
+    expression = re.sub(r'log\s*\(\s*n\s*\)', 'logn', expression)
+    expression = re.sub(r'[\s*·⋅]', '', expression)
+    return _BOUND_EXPRESSIONS.get(expression)
+
+def parse_complexity_bound(analysis):
+    """Return the time complexity class stated in an analysis, or None if there is none.
+
+    The first big-O expression after a mention of time complexity is used.
+    """
+    for mention in re.finditer(r'time complexity', analysis, re.IGNORECASE):
+        match = _BIG_O.search(analysis, mention.end(), mention.end() + 300)
+        if match:
+            return normalize_complexity(match.group(1))
+    return None
+
+def exceeds_bound(fitted, bound):
+    """Return True if fitted grows polynomially faster than bound.
+
+    Log factors are ignored: O(n) and O(n log n) cannot be told apart reliably
+    over the sizes measured, so only a higher polynomial degree counts.
+    """
+    if fitted not in _CLASSES or bound not in _CLASSES:
+        return False
+    return _CLASSES[fitted][0] > _CLASSES[bound][0]
+
+def _fit(sizes, timings, growth, constant_only=False):
+    """Fit t = a + b*growth(n), weighting by 1/t^2; return the relative RMS error."""
+    weights = [1 / t ** 2 for t in timings]
+    values = [growth(n) for n in sizes]
+
+    def error(a, b):
+        return math.sqrt(sum(
+            w * (a + b * f - t) ** 2 for w, f, t in zip(weights, values, timings)
+        ) / len(timings))
+
+    s_w = sum(weights)
+    constant = sum(w * t for w, t in zip(weights, timings)) / s_w
+    if constant_only:
+        return error(constant, 0.0)
+    s_f = sum(w * f for w, f in zip(weights, values))
+    s_ff = sum(w * f * f for w, f in zip(weights, values))
+    s_t = sum(w * t for w, t in zip(weights, timings))
+    s_ft = sum(w * f * t for w, f, t in zip(weights, values, timings))
+    determinant = s_w * s_ff - s_f * s_f
+    if determinant > 0:
+        a = (s_ff * s_t - s_f * s_ft) / determinant
+        b = (s_w * s_ft - s_f * s_t) / determinant
+        if a >= 0 and b >= 0:
+            return error(a, b)
+    # Clamp to a non-negative intercept and slope.
+    return min(error(constant, 0.0), error(0.0, s_ft / s_ff))
+
+def fit_complexity(sizes, timings):
+    """Fit timings against each complexity class.
+
+    Returns the best-fitting class label and the relative error of every class.
+    """
+    residuals = {
+        label: _fit(sizes, timings, growth, constant_only=(label == "O(1)"))
+        for label, _, _, growth in COMPLEXITY_CLASSES
+    }
+    best = min(residuals.values())
+    # Prefer the slowest-growing class that fits about as well as the best one.
+    for label, _, _, _ in COMPLEXITY_CLASSES:
+        if residuals[label] <= best * FIT_TOLERANCE + 1e-3:
+            return label, residuals
+    return min(residuals, key=residuals.get), residuals
+
+def _unwrap_optional(annotation):
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def _scalar_factory(annotation, n, rng):
+    """Return a callable producing one random value of a scalar type, or None."""
+    if annotation is int:
+        return lambda: rng.randint(-n, n)
+    if annotation is float:
+        return lambda: rng.uniform(-n, n)
+    if annotation is bool:
+        return lambda: rng.random() < 0.5
+    if annotation is str:
+        return lambda: "".join(rng.choices(string.ascii_lowercase, k=8))
+    return None
+
+def generate_argument(annotation, n, rng):
+    """Return a random argument of size n for a type annotation, or raise TypeError.
+
+    Sequences, sets and dicts get n elements, strings n characters and
+    numbers a value of magnitude up to n.
+    """
+    annotation = _unwrap_optional(annotation)
+    if annotation is str:
+        return "".join(rng.choices(string.ascii_lowercase, k=n))
+    scalar = _scalar_factory(annotation, n, rng)
+    if scalar is not None:
+        return scalar()
+    origin = typing.get_origin(annotation) or annotation
+    args = typing.get_args(annotation)
+    if origin in (list, tuple, set, frozenset, collections.abc.Sequence):
+        element = _scalar_factory(_unwrap_optional(args[0]) if args else int, n, rng)
+        if element is not None:
+            values = [element() for _ in range(n)]
+            return values if origin in (list, collections.abc.Sequence) else origin(values)
+    if origin is dict and len(args) == 2:
+        key = _scalar_factory(args[0], n, rng)
+        value = _scalar_factory(args[1], n, rng)
+        if key is not None and value is not None:
+            return {key(): value() for _ in range(n)}
+    raise TypeError(f"cannot generate benchmark input for {annotation!r}")
+
+def entry_point_names(tests=None, analysis=None):
+    """Return the names the entry point is chosen from, most likely first.
+
+    These are the functions the tests call without defining them, in the
+    order they are first called, then the functions the analysis gives a
+    signature for.
+    """
+    from context import analysis_requirements, test_assertions
+
+    names = []
+    if tests:
+        try:
+            names.extend(test_assertions(tests)[1])
+        except SyntaxError:
+            pass
+    if analysis:
+        for signature in analysis_requirements(analysis)["signature"]:
+            names.extend(re.findall(r'\bdef\s+(\w+)', signature))
+    return list(dict.fromkeys(names))
+
+def find_entry_point(module, names=()):
+    """Return the solution function to benchmark.
+
+    That is the first of `names` the module defines as a function, else the
+    first public function defined in the module.
+    """
+    functions = {name: value for name, value in vars(module).items()
+                 if inspect.isfunction(value) and value.__module__ == module.__name__}
+    for name in names:
+        if name in functions:
+            return functions[name]
+    for name, value in functions.items():
+        if not name.startswith("_"):
+            return value
+    return None
+
+def _input_factory(func):
+    """Return a function building positional arguments of size n for func, or raise TypeError."""
+    hints = typing.get_type_hints(func)
+    parameters = [
+        parameter for parameter in inspect.signature(func).parameters.values()
+        if parameter.default is inspect.Parameter.empty
+        and parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    ]
+    for parameter in parameters:
+        if parameter.name not in hints:
+            raise TypeError(f"parameter '{parameter.name}' has no type annotation")
+
+    def make_inputs(n, rng):
+        return [generate_argument(hints[parameter.name], n, rng) for parameter in parameters]
+
+    # Fail early on unsupported annotations.
+    make_inputs(1, random.Random(0))
+    return make_inputs
+
+def _load_module(code_file):
+    name = f"_benchmarked_solution_{next(_module_ids)}"
+    spec = importlib.util.spec_from_file_location(name, code_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+def _time_call(func, make_inputs, n, rng):
+    """Return the fastest of REPEATS timed calls at size n, after one warmup call."""
+    func(*make_inputs(n, rng))
+    best = None
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            # Inputs are rebuilt outside the timed region since solutions may mutate them.
+            args = make_inputs(n, rng)
+            start = time.perf_counter()
+            func(*args)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+def run_benchmark(code_file, names=()):
+    """Benchmark the entry point of a solution file; run inside a test worker.
+
+    `names` are the candidate entry points from entry_point_names.
+
+    Returns a dict with the status (MEASURED, SKIPPED or ERROR), the sizes and
+    best timings measured, and the fitted complexity class.
+    """
+    result = {"status": "SKIPPED"}
+    try:
+        module = _load_module(code_file)
+    except BaseException as e:
+        result.update(status="ERROR", reason=f"failed to import solution: {e}")
+        return result
+    try:
+        func = find_entry_point(module, names)
+        if func is None:
+            result["reason"] = "no public function found"
+            return result
+        result["function"] = func.__name__
+        try:
+            make_inputs = _input_factory(func)
+        except Exception as e:
+            result["reason"] = str(e)
+            return result
+
+        rng = random.Random(0)
+        sizes, timings = [], []
+        start = time.perf_counter()
+        n = MIN_SIZE
+        while n <= MAX_SIZE and time.perf_counter() - start < MAX_TOTAL_TIME:
+            try:
+                elapsed = _time_call(func, make_inputs, n, rng)
+            except Exception as e:
+                # Solutions may reject large inputs (e.g. a documented size limit).
+                result["stopped"] = f"n={n}: {type(e).__name__}: {e}"
+                break
+            sizes.append(n)
+            timings.append(max(elapsed, 1e-9))
+            if elapsed > MAX_CALL_TIME:
+                break
+            n *= GROWTH_FACTOR
+        result.update(sizes=sizes, timings=timings, repeats=REPEATS)
+        if len(sizes) < MIN_POINTS:
+            result["reason"] = f"only {len(sizes)} input sizes could be measured"
+            return result
+        fitted, residuals = fit_complexity(sizes, timings)
+        result.update(status="MEASURED", fitted=fitted, residuals=residuals)
+        return result
+    finally:
+        sys.modules.pop(module.__name__, None)
+
+def measure_peak_memory(code_file, n, names=()):
+    """Return the peak bytes one call of a solution's entry point allocates at size n.
+
+    Runs inside a test worker, with the inputs built before tracing starts.
+    Returns None if the entry point cannot be called with generated inputs.
+    """
+    import tracemalloc
+
+    try:
+        module = _load_module(code_file)
+    except BaseException:
+        return None
+    try:
+        func = find_entry_point(module, names)
+        if func is None:
+            return None
+        args = _input_factory(func)(n, random.Random(0))
+        tracemalloc.start()
+        try:
+            func(*args)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except Exception:
+        return None
+    finally:
+        sys.modules.pop(module.__name__, None)
+
+def check_bound(result, analysis):
+    """Add the analysis bound and verdict to a benchmark result and return it.
+
+    within_bound is None when nothing was measured or the analysis states no
+    recognizable bound.
+    """
+    bound = parse_complexity_bound(analysis)
+    result["bound"] = bound
+    if result.get("status") != "MEASURED" or bound is None:
+        result["within_bound"] = None
+    else:
+        result["within_bound"] = not exceeds_bound(result["fitted"], bound)
+    return result
@@ -0,0 +1,329 @@
+"""
+This module stores solution artifacts once per content hash.
+Descriptions, analyses, code and tests are zlib-compressed and named by the
+SHA-256 of their text, so identical reruns share storage. solution.json holds
+{"blob": "<hash>"} references in their place; load_solution resolves them.
+New objects are written as loose files and `python blobstore.py pack` moves
+them into a single append-only pack file with a sorted index, both read
+through mmap.
+
+Usage:
+    python blobstore.py pack    # convert inline solution.json files and pack loose objects
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from bisect import bisect_left
+from pathlib import Path
+
+logger = logging.getLogger("problem_solver")
+
+OBJECTS_PATH = Path("problems/objects")
+PACK_NAME = "blobs.pack"
+INDEX_NAME = "blobs.idx"
+COMPRESSION_LEVEL = 6
+
+# Index file: magic, version and entry count, then entries sorted by digest.
+_INDEX_HEADER = struct.Struct(">4sII")
+_INDEX_ENTRY = struct.Struct(">32sQI")
+_INDEX_MAGIC = b"BIDX"
+_INDEX_VERSION = 1
+
+# Text fields of solution.json stored as blobs, by section.
+BLOB_FIELDS = {
+    "problem": ("description", "analysis"),
+    "solution": ("code", "tests")
+}
+
+# Text fields of the entries of list-valued sections, as section: (list, fields).
+BLOB_LIST_FIELDS = {
+    "candidates": ("candidates", ("code",))
+}
+
+def _atomic_write(path, data):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+
+class _Pack:
+    """Read-only mmap view of a pack file and its index."""
+
+    def __init__(self, pack_path, index_path):
+        self.stat = index_path.stat()
+        self._files = []
+        self._pack = self._map(pack_path)
+        self._index = self._map(index_path)
+        magic, version, self.count = _INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            raise ValueError(f"Unsupported pack index {index_path}")
+        self._digests = _DigestView(self._index, self.count)
+
+    def _map(self, path):
+        f = open(path, 'rb')
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def entry(self, digest):
+        """Return (offset, length) for a binary digest, or None."""
+        position = bisect_left(self._digests, digest)
+        if position == self.count:
+            return None
+        found, offset, length = _INDEX_ENTRY.unpack_from(
+            self._index, _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+        )
+        return (offset, length) if found == digest else None
+
+    def read(self, digest):
+        """Return the compressed object for a binary digest, or None."""
+        entry = self.entry(digest)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._pack[offset:offset + length]
+
+    def entries(self):
+        """Yield every (digest, offset, length) in the index."""
+        for position in range(self.count):
+            yield _INDEX_ENTRY.unpack_from(
+                self._index, _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+            )
+
+    def close(self):
+        for mapped in (self._pack, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for f in self._files:
+            f.close()
+
+class _DigestView:
+    """Sequence of the digests in a mapped index, for bisect."""
+
+    def __init__(self, index, count):
+        self._index = index
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        start = _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+        return bytes(self._index[start:start + 32])
+
+class BlobStore:
+    """Content-addressed store of compressed text objects."""
+
+    def __init__(self, root=OBJECTS_PATH):
+        self.root = Path(root)
+        self.pack_path = self.root / "pack" / PACK_NAME
+        self.index_path = self.root / "pack" / INDEX_NAME
+        self._lock = threading.Lock()
+        self._pack = None
+
+    @staticmethod
+    def hash_text(text):
+        """Return the object name for a piece of text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _loose_path(self, key):
+        return self.root / key[:2] / key[2:]
+
+    def _current_pack(self):
+        """Return the mapped pack, reopening it if `pack` has rewritten the index."""
+        with self._lock:
+            try:
+                stat = self.index_path.stat()
+            except FileNotFoundError:
+                return None
+            if self._pack is None or (self._pack.stat.st_mtime_ns, self._pack.stat.st_size) != (
+                stat.st_mtime_ns, stat.st_size
+            ):
+                if self._pack is not None:
+                    self._pack.close()
+                self._pack = _Pack(self.pack_path, self.index_path)
+            return self._pack
+
+    def contains(self, key):
+        if self._loose_path(key).exists():
+            return True
+        pack = self._current_pack()
+        return pack is not None and pack.entry(bytes.fromhex(key)) is not None
+
+    def put(self, text):
+        """Store text if it is not already present and return its hash."""
+        key = self.hash_text(text)
+        if not self.contains(key):
+            path = self._loose_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL))
+        return key
+
+    def get(self, key):
+        """Return the text stored under a hash, or raise KeyError."""
+        try:
+            with open(self._loose_path(key), 'rb') as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            pack = self._current_pack()
+            compressed = pack.read(bytes.fromhex(key)) if pack is not None else None
+            if compressed is None:
+                raise KeyError(key)
+        return zlib.decompress(compressed).decode("utf-8")
+
+    def pack(self):
+        """Move every loose object into the pack file and return how many were packed.
+
+        Objects are appended to the pack, the index is rewritten in full and
+        only then are the loose copies removed.
+        """
+        loose = sorted(
+            path for path in self.root.glob("[0-9a-f][0-9a-f]/*") if not path.name.endswith(".tmp")
+        )
+        if not loose:
+            return 0
+        self.pack_path.parent.mkdir(parents=True, exist_ok=True)
+        pack = self._current_pack()
+        entries = {digest: (offset, length) for digest, offset, length in pack.entries()} if pack else {}
+        packed = []
+        with open(self.pack_path, 'ab') as f:
+            for path in loose:
+                digest = bytes.fromhex(path.parent.name + path.name)
+                if digest not in entries:
+                    data = path.read_bytes()
+                    entries[digest] = (f.tell(), len(data))
+                    f.write(data)
+                packed.append(path)
+            f.flush()
+            os.fsync(f.fileno())
+        index = bytearray(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, len(entries)))
+        for digest in sorted(entries):
+            index += _INDEX_ENTRY.pack(digest, *entries[digest])
+        _atomic_write(self.index_path, bytes(index))
+        for path in packed:
+            path.unlink()
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+        return len(packed)
+
+    def close(self):
+        with self._lock:
+            if self._pack is not None:
+                self._pack.close()
+                self._pack = None
+
+def store_solution(solution_data, store):
+    """Return a copy of solution_data with its large text fields replaced by blob refs."""
+    stored = dict(solution_data)
+    for section, fields in BLOB_FIELDS.items():
+        values = dict(stored[section])
+        for field in fields:
+            if isinstance(values.get(field), str):
+                values[field] = {"blob": store.put(values[field])}
+        stored[section] = values
+    for section, (key, fields) in BLOB_LIST_FIELDS.items():
+        if section not in stored:
+            continue
+        entries = []
+        for entry in stored[section][key]:
+            entry = dict(entry)
+            for field in fields:
+                if isinstance(entry.get(field), str):
+                    entry[field] = {"blob": store.put(entry[field])}
+            entries.append(entry)
+        stored[section] = dict(stored[section], **{key: entries})
+    return stored
+
+def resolve_solution(solution_data, store):
+    """Return a copy of solution_data with blob refs replaced by their text."""
+    resolved = dict(solution_data)
+    for section, fields in BLOB_FIELDS.items():
+        if section not in resolved:
+            continue
+        values = dict(resolved[section])
+        for field in fields:
+            if isinstance(values.get(field), dict) and "blob" in values[field]:
+                values[field] = store.get(values[field]["blob"])
+        resolved[section] = values
+    for section, (key, fields) in BLOB_LIST_FIELDS.items():
+        if section not in resolved:
+            continue
+        entries = []
+        for entry in resolved[section][key]:
+            entry = dict(entry)
+            for field in fields:
+                if isinstance(entry.get(field), dict) and "blob" in entry[field]:
+                    entry[field] = store.get(entry[field]["blob"])
+            entries.append(entry)
+        resolved[section] = dict(resolved[section], **{key: entries})
+    return resolved
+
+def load_solution(solution_file, store=None):
+    """Read a solution.json file, resolving any blob references."""
+    with open(solution_file, 'r', encoding='utf-8') as f:
+        solution_data = json.load(f)
+    return resolve_solution(solution_data, store or get_blob_store())
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_blob_store():
+    """Return the process-wide blob store under problems/objects."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BlobStore()
+        return _default_store
+
+def convert_solutions(solved_dir, store):
+    """Rewrite solution.json files that still inline their text to use blob refs.
+
+    Returns the number of files converted.
+    """
+    converted = 0
+    for solution_file in sorted(Path(solved_dir).glob("*/solution.json")):
+        try:
+            with open(solution_file, 'r', encoding='utf-8') as f:
+                solution_data = json.load(f)
+            stored = store_solution(solution_data, store)
+            if stored != solution_data:
+                _atomic_write(solution_file, json.dumps(stored, indent=2).encode("utf-8"))
+                converted += 1
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Skipping unreadable solution {solution_file}: {str(e)}")
+    return converted
+
+def main(argv=None):
+    """Command-line interface for maintaining the blob store."""
+    parser = argparse.ArgumentParser(description="Maintain the solution blob store")
+    parser.add_argument("--objects", default=str(OBJECTS_PATH), help="Object store directory")
+    parser.add_argument("--solved", default="problems/solved", help="Solved problems directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("pack", help="Convert inline solution.json files and pack loose objects")
+    args = parser.parse_args(argv)
+
+    store = BlobStore(args.objects)
+    if args.command == "pack":
+        converted = convert_solutions(args.solved, store)
+        packed = store.pack()
+        print(f"Converted {converted} solution files, packed {packed} objects")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+This module provides a persistent, content-addressed cache for LLM responses.
+Entries are keyed by model, temperature and both prompts, stored as JSON files
+on disk, and evicted least-recently-used first once the cache grows past its
+size limit or an entry outlives its maximum age.
+
+Inside `refreshing()` lookups always miss, so every request reaches the model
+and its fresh response replaces the cached one; reruns of problems whose
+last run did not pass use it, since the same prompts would otherwise replay
+the same failure.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".cache/llm"
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_AGE_DAYS = 30
+
+_refresh = contextvars.ContextVar("llm_cache_refresh", default=False)
+
+@contextlib.contextmanager
+def refreshing(enabled=True):
+    """Bypass cached responses (but still store new ones) within this context."""
+    token = _refresh.set(enabled)
+    try:
+        yield
+    finally:
+        _refresh.reset(token)
+
+class ResponseCache:
+    """Disk-backed LLM response cache with LRU eviction and single-flight lookups."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 max_age=DEFAULT_MAX_AGE_DAYS * 86400):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._async_inflight = {}
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(model, temperature, system_prompt, user_prompt):
+        """Return the content address for a request."""
+        payload = json.dumps(
+            [model, temperature, system_prompt, user_prompt],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.max_age and time.time() - entry.get("created", 0) > self.max_age:
+            self._remove(path)
+            return None
+        # The file's mtime doubles as the last-access time for LRU eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["content"]
+
+    def put(self, key, content, **metadata):
+        """Store a response and evict old entries if the cache is over its limit."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = dict(metadata, created=time.time(), content=content)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_name, path)
+        except Exception:
+            self._remove(Path(tmp_name))
+            raise
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += path.stat().st_size
+            over_limit = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% of the limit so the next few puts don't rescan.
+        target = self.max_bytes * 0.9
+        for mtime, size, path in entries:
+            # An entry idle for max_age is at least that old, so this is safe
+            # without opening every file to read its creation time.
+            expired = self.max_age and now - mtime > self.max_age
+            if not expired and total <= target:
+                continue
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._total_bytes = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def get_or_compute(self, key, compute, **metadata):
+        """Return the cached value for key, calling compute() at most once per key
+        across concurrent threads."""
+        import concurrent.futures
+
+        cached = None if _refresh.get() else self.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result()
+        try:
+            content = compute()
+            self.put(key, content, **metadata)
+            future.set_result(content)
+            return content
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_compute(self, key, compute, **metadata):
+        """Async variant of get_or_compute; compute is a coroutine function."""
+        import asyncio
+
+        cached = None if _refresh.get() else self.get(key)
+        if cached is not None:
+            return cached
+        task = self._async_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._acompute(key, compute, metadata))
+            self._async_inflight[key] = task
+            task.add_done_callback(lambda _: self._async_inflight.pop(key, None))
+        # Shield so one cancelled waiter does not cancel the shared request.
+        return await asyncio.shield(task)
+
+    async def _acompute(self, key, compute, metadata):
+        content = await compute()
+        self.put(key, content, **metadata)
+        return content
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when caching is disabled.
+
+    Configured through LLM_CACHE (set to 0 to disable), LLM_CACHE_DIR,
+    LLM_CACHE_MAX_MB and LLM_CACHE_MAX_AGE_DAYS.
+    """
+    global _default_cache
+    if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                directory=os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_bytes=float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024,
+                max_age=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)) * 86400
+            )
+        return _default_cache
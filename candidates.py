@@ -0,0 +1,214 @@
+"""
+This module implements best-of-N sampling for the implementation stage.
+The developer is asked for N implementations at once at its configured
+temperature (with its response cache bypassed, so the samples differ). Every
+distinct candidate is validated against the generated tests in parallel in
+the test workers, the passing ones are benchmarked one at a time so their
+timings do not compete for cores, and the fastest at the largest input size
+they all reached is kept; candidates within TIE_TOLERANCE of it are ranked
+by peak memory at that size.
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark import entry_point_names
+from precheck import check_results, static_check
+from repair import test_failures
+import tracing
+
+logger = logging.getLogger("problem_solver")
+
+# Candidates this much slower than the fastest still tie with it.
+TIE_TOLERANCE = 0.05
+
+# Stage statistics summed over every sample.
+_SUMMED_STATS = ("generation", "prompt_tokens", "completion_tokens", "retries",
+                 "rate_limited", "throttled", "cost")
+
+class BestOfN:
+    """Samples n implementations and keeps the fastest one that passes the tests.
+
+    write_files(module_dir, code, tests) writes a candidate as an importable
+    package and returns its (code_file, test_file).
+    """
+
+    def __init__(self, developer, n, write_files):
+        self.developer = developer
+        self.n = n
+        self.write_files = write_files
+        self.candidates = []
+        self.selected = None
+        self.size = None
+
+    def _record_stats(self, codes, stats, start, selection_start):
+        if stats is None:
+            return
+        samples = [sample for _, sample in codes]
+        for key in _SUMMED_STATS:
+            stats[key] = sum(sample.get(key, 0) for sample in samples)
+        stats["model"] = samples[0].get("model")
+        stats["cached"] = all(sample.get("cached") for sample in samples)
+        stats["samples"] = len(samples)
+        # Validating and benchmarking the candidates is part of the stage's wall time.
+        stats["selection"] = time.perf_counter() - selection_start
+        stats["total"] = time.perf_counter() - start
+
+    def _collect(self, results, samples):
+        codes = []
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Candidate {index + 1}/{self.n} failed: {str(result)}")
+            else:
+                codes.append((result, samples[index]))
+        if not codes:
+            raise results[0]
+        return codes
+
+    def implement(self, analysis, tests, stats=None):
+        """Sample n implementations in threads and return the best one."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        start = time.perf_counter()
+        samples = [{} for _ in range(self.n)]
+        with ThreadPoolExecutor(max_workers=self.n) as executor:
+            futures = [executor.submit(tracing.in_current_context(
+                self.developer.implement_solution, analysis, tests, sample
+            )) for sample in samples]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        codes = self._collect(results, samples)
+        selection_start = time.perf_counter()
+        code = self.select(codes, tests)
+        self._record_stats(codes, stats, start, selection_start)
+        return code
+
+    async def aimplement(self, analysis, tests, stats=None):
+        """Async variant of implement; validation and benchmarks run in an executor thread."""
+        import asyncio
+
+        start = time.perf_counter()
+        samples = [{} for _ in range(self.n)]
+        results = await asyncio.gather(
+            *(self.developer.aimplement_solution(analysis, tests, sample) for sample in samples),
+            return_exceptions=True
+        )
+        codes = self._collect(results, samples)
+        selection_start = time.perf_counter()
+        code = await asyncio.get_running_loop().run_in_executor(
+            None, tracing.in_current_context(self.select, codes, tests)
+        )
+        self._record_stats(codes, stats, start, selection_start)
+        return code
+
+    @tracing.traced("select_candidate")
+    def select(self, codes, tests):
+        """Validate and benchmark (code, stats) candidates; return the chosen code."""
+        from runner import get_test_runner
+
+        runner = get_test_runner()
+        self.candidates = []
+        first_seen = {}
+        for index, (code, stats) in enumerate(codes):
+            self.candidates.append({
+                "index": index,
+                "code": code,
+                "duplicate_of": first_seen.setdefault(code, index),
+                "completion_tokens": stats.get("completion_tokens", 0),
+                "cost": stats.get("cost", 0.0)
+            })
+        distinct = [c for c in self.candidates if c["duplicate_of"] == c["index"]]
+        with tempfile.TemporaryDirectory(prefix="candidates_") as scratch_dir:
+            files = {}
+            for candidate in distinct:
+                module_dir = Path(scratch_dir) / f"candidate_{candidate['index']}"
+                module_dir.mkdir()
+                files[candidate["index"]] = self.write_files(module_dir, candidate["code"], tests)
+            # Candidates that fail the static check are never sent to pytest.
+            results = {}
+            for candidate in distinct:
+                report = static_check(*files[candidate["index"]])
+                candidate["static_check"] = report["verdict"]
+                if report["verdict"] != "OK":
+                    results[candidate["index"]] = check_results(report)
+            checked = [candidate for candidate in distinct if candidate["index"] not in results]
+            # Test suites are independent, so they run across the worker pool at once.
+            with tracing.span("validate_candidates", candidates=len(checked)):
+                results.update(zip(
+                    (candidate["index"] for candidate in checked),
+                    runner.run_many([files[candidate["index"]][1] for candidate in checked])
+                ))
+                for candidate in distinct:
+                    result = results[candidate["index"]]
+                    candidate["passed"] = result["success"]
+                    candidate["failures"] = 0 if result["success"] else max(
+                        1, len(test_failures(result))
+                    )
+            passing = [candidate for candidate in distinct if candidate["passed"]]
+            names = entry_point_names(tests)
+            for candidate in passing:
+                with tracing.span("benchmark_candidate", candidate=candidate["index"]):
+                    candidate["benchmark"] = runner.benchmark(files[candidate["index"]][0], names)
+            measured = [candidate for candidate in passing
+                        if candidate["benchmark"].get("status") == "MEASURED"]
+            if measured:
+                # Slower candidates stop growing the input sooner; compare where all got to.
+                self.size = min(candidate["benchmark"]["sizes"][-1] for candidate in measured)
+                for candidate in measured:
+                    benchmark = candidate["benchmark"]
+                    candidate["time"] = benchmark["timings"][benchmark["sizes"].index(self.size)]
+                    candidate["peak_memory"] = runner.peak_memory(
+                        files[candidate["index"]][0], self.size, names
+                    )
+        for candidate in self.candidates:
+            if candidate["duplicate_of"] != candidate["index"]:
+                original = self.candidates[candidate["duplicate_of"]]
+                candidate.update({key: original[key] for key in
+                                  ("static_check", "passed", "failures", "time", "peak_memory") if key in original})
+
+        if measured:
+            fastest = min(candidate["time"] for candidate in measured)
+            tied = [candidate for candidate in measured
+                    if candidate["time"] <= fastest * (1 + TIE_TOLERANCE)]
+            chosen = min(tied, key=lambda candidate: (
+                candidate["peak_memory"] if candidate["peak_memory"] is not None else float("inf"),
+                candidate["time"]
+            ))
+        elif passing:
+            chosen = passing[0]
+        else:
+            chosen = min(distinct, key=lambda candidate: candidate["failures"])
+        self.selected = chosen["index"]
+        logger.info(f"Best of {len(codes)}: kept candidate {self.selected + 1} "
+                    f"({len(passing)} distinct candidates passed)")
+        return chosen["code"]
+
+    def summary(self):
+        """Return the candidate record stored in solution.json."""
+        candidates = []
+        for candidate in self.candidates:
+            entry = {key: value for key, value in candidate.items() if key != "benchmark"}
+            benchmark = candidate.get("benchmark")
+            if benchmark is not None:
+                entry["benchmark_status"] = benchmark.get("status")
+                entry["fitted"] = benchmark.get("fitted")
+            candidates.append(entry)
+        # The speed sampling bought: the selected time against the first sample,
+        # which is what a single implementation would have produced.
+        first = self.candidates[0] if self.candidates else {}
+        selected = self.candidates[self.selected] if self.selected is not None else {}
+        speedup = (first["time"] / selected["time"]
+                   if first.get("time") and selected.get("time") else None)
+        return {
+            "n": self.n,
+            "selected": self.selected,
+            "size": self.size,
+            "speedup_over_first": speedup,
+            "candidates": candidates
+        }
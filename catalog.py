@@ -0,0 +1,218 @@
+"""
+This module keeps an indexed SQLite catalog of every solution run.
+save_solution adds a row per run with the problem name, content hash,
+timestamp, status, model, timings and paths, so questions such as "latest
+passing solution", "history" and "failure rate" are answered from the index
+instead of by parsing every solution.json under problems/solved.
+
+Usage:
+    python catalog.py latest two_sum
+    python catalog.py history two_sum --limit 10
+    python catalog.py failure-rate [two_sum]
+    python catalog.py rebuild
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+
+from blobstore import load_solution
+
+logger = logging.getLogger("problem_solver")
+
+CATALOG_PATH = Path("problems/catalog.db")
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    solution_dir TEXT PRIMARY KEY,
+    problem_name TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    status TEXT NOT NULL,
+    model TEXT,
+    stage_time REAL,
+    cost REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    timings TEXT,
+    solution_file TEXT NOT NULL,
+    code_file TEXT NOT NULL,
+    test_file TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_problem ON runs (problem_name, timestamp);
+CREATE INDEX IF NOT EXISTS runs_hash ON runs (content_hash, timestamp);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, problem_name);
+"""
+
+_COLUMNS = (
+    "solution_dir", "problem_name", "content_hash", "timestamp", "status", "model",
+    "stage_time", "cost", "prompt_tokens", "completion_tokens", "timings",
+    "solution_file", "code_file", "test_file"
+)
+
+def content_hash(description):
+    """Return the hash identifying a problem's text, independent of model and prompts."""
+    return hashlib.sha256(description.strip().encode("utf-8")).hexdigest()
+
+def catalog_row(solution_file, solution_data):
+    """Return the catalog row for a solution.json path and its parsed contents."""
+    solution_dir = Path(solution_file).parent
+    stages = solution_data.get("stages", {})
+    summary = solution_data.get("metrics", {})
+    models = [stats["model"] for stats in stages.values() if stats.get("model")]
+    return {
+        "solution_dir": solution_dir.as_posix(),
+        "problem_name": solution_data["metadata"]["problem_name"],
+        "content_hash": content_hash(solution_data["problem"]["description"]),
+        "timestamp": solution_data["metadata"]["timestamp"],
+        "status": solution_data["metadata"]["status"],
+        "model": models[0] if models else None,
+        "stage_time": summary.get("stage_time"),
+        "cost": summary.get("cost"),
+        "prompt_tokens": summary.get("prompt_tokens"),
+        "completion_tokens": summary.get("completion_tokens"),
+        "timings": json.dumps({
+            stage: stats["total"] for stage, stats in stages.items() if "total" in stats
+        }),
+        "solution_file": Path(solution_file).as_posix(),
+        "code_file": (solution_dir / "solution.py").as_posix(),
+        "test_file": (solution_dir / "test_solution.py").as_posix()
+    }
+
+class Catalog:
+    """SQLite index of solution runs under problems/solved."""
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = Path(path)
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return connection
+
+    def _execute(self, query, params=()):
+        connection = self._connect()
+        try:
+            with connection:
+                return [dict(row) for row in connection.execute(query, params)]
+        finally:
+            connection.close()
+
+    def load(self):
+        """Create the catalog, indexing existing solutions the first time."""
+        if not self.path.exists():
+            count = self.rebuild()
+            if count:
+                logger.info(f"Seeded catalog from {count} existing solutions")
+        return self
+
+    def record(self, solution_file, solution_data):
+        """Insert or update the row for one solution run."""
+        row = catalog_row(solution_file, solution_data)
+        self._execute(
+            f"INSERT OR REPLACE INTO runs ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            [row[column] for column in _COLUMNS]
+        )
+
+    def rebuild(self, solved_dir=None):
+        """Re-index every solution.json under solved_dir and return the number indexed."""
+        solved_dir = Path(solved_dir) if solved_dir else self.path.parent / "solved"
+        rows = []
+        for solution_file in sorted(solved_dir.glob("*/solution.json")):
+            try:
+                rows.append(catalog_row(solution_file, load_solution(solution_file)))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable solution {solution_file}: {str(e)}")
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM runs")
+                connection.executemany(
+                    f"INSERT INTO runs ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                    [[row[column] for column in _COLUMNS] for row in rows]
+                )
+        finally:
+            connection.close()
+        return len(rows)
+
+    def latest_passing(self, problem_name):
+        """Return the newest PASSED run for a problem, or None."""
+        rows = self._execute(
+            "SELECT * FROM runs WHERE problem_name = ? AND status = 'PASSED' "
+            "ORDER BY timestamp DESC, solution_dir DESC LIMIT 1",
+            (problem_name,)
+        )
+        return rows[0] if rows else None
+
+    def history(self, problem_name, limit=20):
+        """Return a problem's runs, newest first."""
+        return self._execute(
+            "SELECT * FROM runs WHERE problem_name = ? "
+            "ORDER BY timestamp DESC, solution_dir DESC LIMIT ?",
+            (problem_name, limit)
+        )
+
+    def failure_rate(self, problem_name=None):
+        """Return run and failure counts per problem, or for one problem."""
+        where, params = ("WHERE problem_name = ?", (problem_name,)) if problem_name else ("", ())
+        return self._execute(
+            "SELECT problem_name, COUNT(*) AS runs, "
+            "SUM(status != 'PASSED') AS failed, "
+            "AVG(status != 'PASSED') AS failure_rate "
+            f"FROM runs {where} GROUP BY problem_name ORDER BY problem_name",
+            params
+        )
+
+def _print_runs(rows):
+    for row in rows:
+        cost = f"${row['cost']:.4f}" if row["cost"] is not None else "-"
+        stage_time = f"{row['stage_time']:.1f}s" if row["stage_time"] is not None else "-"
+        print(f"{row['timestamp']}  {row['status']:<6}  {stage_time:>8}  {cost:>9}  "
+              f"{row['solution_dir']}")
+
+def main(argv=None):
+    """Command-line interface for querying the catalog."""
+    parser = argparse.ArgumentParser(description="Query the solution catalog")
+    parser.add_argument("--catalog", default=str(CATALOG_PATH), help="Catalog database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    latest = commands.add_parser("latest", help="Show the latest PASSED run of a problem")
+    latest.add_argument("problem")
+    history = commands.add_parser("history", help="Show a problem's runs, newest first")
+    history.add_argument("problem")
+    history.add_argument("--limit", type=int, default=20)
+    failure_rate = commands.add_parser("failure-rate", help="Show failure rates per problem")
+    failure_rate.add_argument("problem", nargs="?")
+    commands.add_parser("rebuild", help="Re-index problems/solved from solution.json files")
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.catalog).load()
+    if args.command == "latest":
+        row = catalog.latest_passing(args.problem)
+        if row is None:
+            print(f"No passing solution for {args.problem}")
+            return 1
+        _print_runs([row])
+    elif args.command == "history":
+        _print_runs(catalog.history(args.problem, args.limit))
+    elif args.command == "failure-rate":
+        for row in catalog.failure_rate(args.problem):
+            print(f"{row['problem_name']:<30}  {row['failed']}/{row['runs']} failed  "
+                  f"({row['failure_rate']:.0%})")
+    elif args.command == "rebuild":
+        print(f"Indexed {catalog.rebuild()} solutions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
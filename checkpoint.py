@@ -0,0 +1,129 @@
+"""
+This module checkpoints pipeline stage outputs so interrupted runs can resume.
+The pipeline is a DAG of stages (analysis, then tests, then implementation,
+then validation). Each LLM stage's output is saved under the problem's
+checkpoint directory together with a hash of its inputs, and a rerun reuses
+every stage whose inputs hash the same. Editing a problem therefore only
+recomputes the stages downstream of the change. The key also covers the
+model each stage runs on and the options that shape its output, so changing
+the routing, --context-budget or --candidates recomputes the affected stages.
+Checkpoints are cleared once validation has saved the solution.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger("problem_solver")
+
+CHECKPOINT_DIR = Path(".cache/checkpoints")
+
+# Inputs of each checkpointed stage, i.e. its upstream edges in the DAG.
+# Validation consumes the tests and the implementation and is not checkpointed.
+STAGE_INPUTS = {
+    "analysis": ("description",),
+    "tests": ("analysis",),
+    "speculative_implementation": ("analysis",),
+    "implementation": ("analysis", "tests")
+}
+
+# Statistics of a resumed stage: like a cache hit, it spent nothing this run.
+_RESUMED_STATS = {"prompt_tokens": 0, "completion_tokens": 0, "retries": 0,
+                  "throttled": 0.0, "rate_limited": 0, "cost": 0.0, "total": 0.0}
+
+class Checkpoints:
+    """Stage outputs of one problem, keyed by a hash of each stage's inputs.
+
+    `models` maps each stage to the model it runs on and `settings` maps a
+    stage to the options that change its output; both are part of the key.
+    """
+
+    def __init__(self, problem_name, models, prompt_version, settings=None, root=CHECKPOINT_DIR):
+        self.directory = Path(root) / problem_name
+        self.models = models
+        self.prompt_version = prompt_version
+        self.settings = settings or {}
+
+    def key(self, stage, inputs):
+        """Return the hash of a stage's inputs, model, settings and prompt version."""
+        if set(inputs) != set(STAGE_INPUTS[stage]):
+            raise ValueError(f"Stage {stage} takes {STAGE_INPUTS[stage]}, got {tuple(inputs)}")
+        payload = json.dumps(
+            [stage, self.models.get(stage), self.prompt_version, self.settings.get(stage),
+             [inputs[name] for name in STAGE_INPUTS[stage]]],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self, stage, key):
+        """Return the saved checkpoint for a stage if its inputs match key, else None."""
+        try:
+            with open(self.directory / f"{stage}.json", 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return checkpoint if checkpoint.get("key") == key else None
+
+    def save(self, stage, key, output, stats):
+        """Atomically persist a stage's output and statistics."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = {"stage": stage, "key": key, "output": output, "stats": stats,
+                      "created": time.time()}
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_name, self.directory / f"{stage}.json")
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+
+    def _resume(self, stage, inputs, stats):
+        key = self.key(stage, inputs)
+        checkpoint = self.load(stage, key)
+        if checkpoint is not None:
+            logger.info(f"[{self.directory.name}] Resuming {stage} from checkpoint")
+            if stats is not None:
+                # The earlier run already counted the stage's tokens and cost.
+                stats.update(_RESUMED_STATS, model=checkpoint["stats"].get("model"),
+                             cached=False, resumed=True)
+        return key, checkpoint
+
+    def run(self, stage, inputs, compute, stats=None):
+        """Return the stage output, from its checkpoint or by calling compute()."""
+        key, checkpoint = self._resume(stage, inputs, stats)
+        if checkpoint is not None:
+            return checkpoint["output"]
+        output = compute()
+        self.save(stage, key, output, stats or {})
+        return output
+
+    async def arun(self, stage, inputs, compute, stats=None):
+        """Async variant of run; compute is a coroutine function."""
+        key, checkpoint = self._resume(stage, inputs, stats)
+        if checkpoint is not None:
+            return checkpoint["output"]
+        output = await compute()
+        self.save(stage, key, output, stats or {})
+        return output
+
+    def clear(self):
+        """Remove every checkpoint of this problem."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class NoCheckpoints:
+    """Stand-in used with --no-checkpoints that always recomputes."""
+
+    def run(self, stage, inputs, compute, stats=None):
+        return compute()
+
+    async def arun(self, stage, inputs, compute, stats=None):
+        return await compute()
+
+    def clear(self):
+        pass
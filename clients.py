@@ -0,0 +1,179 @@
+"""
+This module keeps long-lived LLM clients shared by every agent and problem.
+All chat models are built on one pooled HTTP transport with keep-alive, so
+large batches reuse connections instead of paying a TCP and TLS handshake for
+every agent. Per-stage settings come from environment variables named after
+the agent, e.g. PYTHON_DEVELOPER_MODEL, PYTHON_DEVELOPER_TIMEOUT,
+PYTHON_DEVELOPER_MAX_TOKENS and PYTHON_DEVELOPER_MAX_RETRIES, with
+OPENAI_TEMPERATURE as the default temperature; retries are
+made by the rate limiter in ratelimit.py. LLM_BACKEND=replay or synthetic
+swaps in the offline models from fake_llm.py. httpx, openai and LangChain are
+imported when the first client is built.
+"""
+
+import os
+import threading
+
+from metrics import acount_request, count_request
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_TEMPERATURE = 0.7
+
+BACKENDS = ("openai", "replay", "synthetic")
+
+def _env(name, cast, default):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+def llm_backend():
+    """Return the chat model backend named by LLM_BACKEND; see fake_llm.py."""
+    backend = (os.getenv("LLM_BACKEND") or "openai").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {', '.join(BACKENDS)}, got {backend!r}")
+    return backend
+
+def stage_config(stage, model_name):
+    """Return the client settings for an agent stage, applying env overrides."""
+    prefix = stage.upper()
+    return {
+        "model": _env(f"{prefix}_MODEL", str, model_name),
+        "temperature": _env(f"{prefix}_TEMPERATURE", float,
+                            _env("OPENAI_TEMPERATURE", float, DEFAULT_TEMPERATURE)),
+        "timeout": _env(f"{prefix}_TIMEOUT", float, DEFAULT_TIMEOUT),
+        "max_tokens": _env(f"{prefix}_MAX_TOKENS", int, None),
+        "max_retries": _env(f"{prefix}_MAX_RETRIES", int, DEFAULT_MAX_RETRIES)
+    }
+
+class ClientRegistry:
+    """Shared HTTP transports, per-stage chat models and the agents built on them."""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY):
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+        self._chat_models = {}
+        self.agents = {}
+
+    def _limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    @property
+    def http_client(self):
+        import httpx
+
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    limits=self._limits(),
+                    event_hooks={"request": [count_request]}
+                )
+            return self._http_client
+
+    @property
+    def http_async_client(self):
+        import httpx
+
+        with self._lock:
+            if self._http_async_client is None:
+                self._http_async_client = httpx.AsyncClient(
+                    limits=self._limits(),
+                    event_hooks={"request": [acount_request]}
+                )
+            return self._http_async_client
+
+    def chat_model(self, stage, model_name):
+        """Return the shared chat model for a stage, creating it on first use."""
+        config = stage_config(stage, model_name)
+        backend = llm_backend()
+        key = tuple(sorted(config.items()))
+        if backend != "openai":
+            # Fake models answer as their stage, so stages cannot share one.
+            key = (backend, stage) + key
+        with self._lock:
+            llm = self._chat_models.get(key)
+        if llm is not None:
+            return llm
+        if backend != "openai":
+            from fake_llm import create_chat_model
+
+            llm = create_chat_model(backend, stage, config)
+            with self._lock:
+                return self._chat_models.setdefault(key, llm)
+        import openai
+        from langchain_community.chat_models import ChatOpenAI
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        # The agents' rate limiter retries with its own backoff and needs to
+        # see every 429, so the OpenAI client must not retry underneath it.
+        client_params = {
+            "api_key": api_key,
+            "timeout": config["timeout"],
+            "max_retries": 0
+        }
+        llm = ChatOpenAI(
+            model_name=config["model"],
+            temperature=config["temperature"],
+            max_tokens=config["max_tokens"],
+            max_retries=config["max_retries"],
+            request_timeout=config["timeout"],
+            openai_api_key=api_key,
+            client=openai.OpenAI(
+                http_client=self.http_client, **client_params
+            ).chat.completions,
+            async_client=openai.AsyncOpenAI(
+                http_client=self.http_async_client, **client_params
+            ).chat.completions
+        )
+        with self._lock:
+            return self._chat_models.setdefault(key, llm)
+
+    def _detach(self):
+        with self._lock:
+            clients = (self._http_client, self._http_async_client)
+            self._http_client = self._http_async_client = None
+            self._chat_models.clear()
+            self.agents.clear()
+        return clients
+
+    def close(self):
+        """Close the sync transport and drop every cached model and agent."""
+        http_client, _ = self._detach()
+        if http_client is not None:
+            http_client.close()
+
+    async def aclose(self):
+        """Close both transports; call from the event loop the async one was used on."""
+        http_client, http_async_client = self._detach()
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+def get_client_registry():
+    """Return the process-wide client registry.
+
+    The pool is sized by LLM_POOL_SIZE and idle connections are kept for
+    LLM_KEEPALIVE_EXPIRY seconds.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry(
+                pool_size=_env("LLM_POOL_SIZE", int, DEFAULT_POOL_SIZE),
+                keepalive_expiry=_env("LLM_KEEPALIVE_EXPIRY", float, DEFAULT_KEEPALIVE_EXPIRY)
+            )
+        return _default_registry
@@ -0,0 +1,242 @@
+"""
+This module fits the implementation-stage prompt into a token budget.
+The analysis is long-form prose and generated test suites repeat the same
+checks many times, so instead of sending both whole, the developer can get
+their essentials: the functions under test and their signatures, the return
+type, the exception contract, the constraints, and the de-duplicated
+assertions from the tests. These are added in priority order until the
+budget is spent. Prompts that already fit, and tests that do not parse, are
+sent unchanged.
+"""
+
+import ast
+import builtins
+import re
+
+def estimate_tokens(text):
+    """Roughly estimate the token count of text (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+_SIGNATURE = re.compile(r'\bdef\s+\w+\s*\([^)]*\)(?:\s*->\s*[^:\n]+)?')
+_HEADER = re.compile(r'^\s*(?:\d+\.|#+)\s*(.*?):?\s*$')
+_INPUT = re.compile(
+    r'^`?\w+`?\s*(?:\([^)]*\)|:)\s*`?(?:List|Dict|Tuple|Set|Optional|Union|Sequence|'
+    r'Iterable|Any|int|str|float|bool|list|dict|tuple|set|bytes)\b'
+)
+_RETURN = re.compile(r'\b(?:returns?|output)\b', re.IGNORECASE)
+_EXCEPTION = re.compile(r'\b(?:raises?|raised|exceptions?|\w+Error)\b', re.IGNORECASE)
+_CONSTRAINT = re.compile(
+    r'O\([^)]*\)|\d+\s*\^\s*\d+|\d+\s*\*\*\s*\d+|<=|>=|\bat (?:least|most)\b|\brange\b|'
+    r'\blimits?\b|\bconstraints?\b|\bbetween\b', re.IGNORECASE
+)
+
+# Requirement kinds in the order they are given budget.
+_SECTIONS = (
+    ("signature", "Signatures"),
+    ("input", "Inputs"),
+    ("return", "Return type"),
+    ("exception", "Exception contract"),
+    ("constraint", "Constraints")
+)
+
+def analysis_requirements(analysis):
+    """Return the analysis lines of each requirement kind, without duplicates.
+
+    Lines under a testing heading are skipped: the tests themselves are sent.
+    """
+    requirements = {kind: [] for kind, _ in _SECTIONS}
+    seen = set()
+    in_testing = False
+    for line in analysis.splitlines():
+        stripped = line.strip().lstrip("-*• ").strip()
+        if not stripped:
+            continue
+        header = _HEADER.match(line)
+        if header and (not header.group(1) or line.rstrip().endswith(":")):
+            in_testing = "test" in header.group(1).lower()
+            continue
+        if in_testing or stripped.lower() in seen:
+            continue
+        signatures = _SIGNATURE.findall(stripped)
+        if signatures:
+            kind = "signature"
+            stripped = "; ".join(signatures)
+        elif _INPUT.match(stripped):
+            kind = "input"
+        elif _EXCEPTION.search(stripped):
+            kind = "exception"
+        elif _RETURN.search(stripped):
+            kind = "return"
+        elif _CONSTRAINT.search(stripped):
+            kind = "constraint"
+        else:
+            continue
+        seen.add(stripped.lower())
+        requirements[kind].append(stripped)
+    return requirements
+
+class _AssertionCollector(ast.NodeVisitor):
+    """Collects the checks of every test function, nested ones included."""
+
+    def __init__(self):
+        self.tests = {}
+        self.defined = set()
+        self.called = []
+        self._current = None
+        self._raises_vars = {}
+
+    def visit_FunctionDef(self, node):
+        self.defined.add(node.name)
+        previous = self._current
+        if node.name.startswith("test"):
+            self._current = self.tests.setdefault(node.name, [])
+        self.generic_visit(node)
+        self._current = previous
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.defined.add((alias.asname or alias.name).split(".")[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_ClassDef(self, node):
+        self.defined.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            for name in ast.walk(target):
+                if isinstance(name, ast.Name):
+                    self.defined.add(name.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id not in self.called:
+            self.called.append(node.func.id)
+        self.generic_visit(node)
+
+    def visit_Assert(self, node):
+        # The message is prose about the check, not part of it.
+        if self._current is not None:
+            check = f"assert {ast.unparse(node.test)}"
+            names = {name.id for name in ast.walk(node.test) if isinstance(name, ast.Name)}
+            bound = [self._raises_vars[name] for name in names if name in self._raises_vars]
+            if bound and bound[0][0] is self._current:
+                # Checks on `pytest.raises(...) as e` belong with the call that raised.
+                tests, index = bound[0]
+                tests[index] += f"; {check}"
+            else:
+                self._current.append(check)
+        self.generic_visit(node)
+
+    def visit_With(self, node):
+        raises = [item for item in node.items
+                  if "raises" in ast.unparse(item.context_expr).split("(")[0]]
+        if self._current is not None and raises:
+            body = []
+            for statement in node.body:
+                if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Tuple):
+                    # `call(), "message"` is a common way of attaching a message.
+                    statement = statement.value.elts[0]
+                if not isinstance(statement, ast.Assert):
+                    body.append(ast.unparse(statement))
+            context = ", ".join(ast.unparse(item) for item in raises)
+            self._current.append(f"with {context}: {'; '.join(body)}")
+            for item in raises:
+                if isinstance(item.optional_vars, ast.Name):
+                    self._raises_vars[item.optional_vars.id] = (
+                        self._current, len(self._current) - 1
+                    )
+        self.generic_visit(node)
+
+def test_assertions(tests):
+    """Return (assertions per test function, names the tests call but do not define).
+
+    Raises SyntaxError if the tests do not parse.
+    """
+    collector = _AssertionCollector()
+    collector.visit(ast.parse(tests))
+    undefined = [name for name in collector.called
+                 if name not in collector.defined and not hasattr(builtins, name)]
+    return collector.tests, undefined
+
+def _interleave(tests):
+    """Yield unique assertions round-robin across tests, so each test is represented."""
+    seen = set()
+    queues = [list(assertions) for assertions in tests.values()]
+    while any(queues):
+        for queue in queues:
+            while queue:
+                assertion = queue.pop(0)
+                key = " ".join(assertion.split())
+                if key not in seen:
+                    seen.add(key)
+                    yield assertion
+                    break
+
+class ContextBudget:
+    """Builds the developer's requirements from analysis and tests within max_tokens."""
+
+    def __init__(self, max_tokens):
+        self.max_tokens = max_tokens
+
+    def condense(self, analysis, tests=None):
+        """Return (requirements text or None if unchanged, report).
+
+        The report holds the original and condensed token counts, their
+        ratio and how many unique assertions were kept.
+        """
+        original = estimate_tokens(analysis) + (estimate_tokens(tests) if tests else 0)
+        report = {"context_original_tokens": original, "context_tokens": original,
+                  "context_ratio": 1.0}
+        if original <= self.max_tokens:
+            return None, report
+        tested, assertions = [], []
+        if tests is not None:
+            try:
+                by_test, tested = test_assertions(tests)
+            except SyntaxError:
+                return None, report
+            assertions = list(_interleave(by_test))
+            if tested:
+                # Checks that never call the code under test (timers, fixtures) say nothing about it.
+                calls = re.compile(r'\b(?:' + '|'.join(map(re.escape, tested)) + r')\(')
+                assertions = [assertion for assertion in assertions if calls.search(assertion)]
+
+        requirements = analysis_requirements(analysis)
+        lines = []
+        # Characters used so far, counting the newline joining each line.
+        used = 0
+
+        def add(line):
+            nonlocal used
+            if estimate_tokens("x" * (used + len(line) + 1)) > self.max_tokens:
+                return False
+            lines.append(line)
+            used += len(line) + 1
+            return True
+
+        def add_section(title, items):
+            nonlocal used
+            # A heading is only worth its tokens if its first item fits too.
+            if not items or not add(f"\n{title}:"):
+                return 0
+            if not add(items[0]):
+                used -= len(lines.pop()) + 1
+                return 0
+            return 1 + sum(1 for item in items[1:] if add(item))
+
+        if tested:
+            add(f"Functions under test: {', '.join(tested)}")
+        for kind, title in _SECTIONS:
+            add_section(title, [f"- {requirement}" for requirement in requirements[kind]])
+            # The assertions follow the contract and outrank the constraints.
+            if kind == "exception" and assertions:
+                report["context_assertions"] = len(assertions)
+                report["context_assertions_kept"] = add_section("Test assertions", assertions)
+        text = "\n".join(lines).strip()
+        report["context_tokens"] = estimate_tokens(text)
+        report["context_ratio"] = report["context_tokens"] / original
+        return text, report
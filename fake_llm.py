@@ -0,0 +1,296 @@
+"""
+This module provides deterministic stand-ins for the OpenAI chat models, so
+the pipeline can be benchmarked and exercised without an API key or network.
+LLM_BACKEND selects the backend the client registry (clients.py) builds:
+
+    openai      the real API (default)
+    replay      answers recorded for each prompt, rebuilt from the
+                solution.json files under problems/solved or loaded from
+                LLM_REPLAY_FILE; a prompt without a recording is an error
+    synthetic   a small self-consistent analysis, test suite and solution
+                for any problem
+
+Both fake backends wait for a latency drawn from LLM_FAKE_LATENCY (or
+<AGENT>_FAKE_LATENCY for one stage), e.g. "0.5", "uniform:0.2,1.0",
+"normal:0.5,0.1", "lognormal:0.5,0.4" (median, sigma) or "exponential:0.5"
+(mean). Draws are seeded by LLM_FAKE_SEED and the prompt, so a rerun sees the
+same latencies and answers.
+
+Usage:
+    python fake_llm.py build-replay [--solved problems/solved] [--out replay.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("problem_solver")
+
+SYNTHETIC_ANALYSIS = """1. Problem requirements and constraints:
+   - Input: values (List[int])
+   - Output: int, the sum of values
+2. Error handling: raise TypeError if values is not a list of integers
+3. Performance requirements:
+   - Time complexity: O(n)
+   - Space complexity: O(1)
+
+Problem:
+{description}"""
+
+SYNTHETIC_TESTS = """```python
+def test_sum_of_values() -> None:
+    \"\"\"The result is the sum of the inputs.\"\"\"
+    assert solve([1, 2, 3]) == 6, "expected 1 + 2 + 3"
+
+def test_empty() -> None:
+    \"\"\"An empty list sums to zero.\"\"\"
+    assert solve([]) == 0
+
+def test_rejects_non_list() -> None:
+    \"\"\"Inputs other than lists are rejected.\"\"\"
+    with pytest.raises(TypeError):
+        solve("123")
+```"""
+
+SYNTHETIC_CODE = """```python
+from typing import List
+
+def solve(values: List[int]) -> int:
+    \"\"\"Return the sum of values.\"\"\"
+    if not isinstance(values, list):
+        raise TypeError("values must be a list")
+    total = 0
+    for value in values:
+        total += value
+    return total
+```"""
+
+def prompt_key(messages):
+    """Return the recording key of a request: a hash of every message's text."""
+    payload = json.dumps([message.content for message in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def parse_latency(spec):
+    """Return a function drawing a latency in seconds from a random.Random.
+
+    spec is a number of seconds or "<distribution>:<parameters>"; see the
+    module docstring for the supported distributions.
+    """
+    spec = (spec or "0").strip()
+    name, _, params = spec.partition(":")
+    if not params:
+        try:
+            seconds = float(name)
+        except ValueError:
+            raise ValueError(f"Invalid latency {spec!r}") from None
+        return lambda rng: seconds
+    try:
+        values = [float(value) for value in params.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid latency {spec!r}") from None
+    distributions = {
+        "fixed": (1, lambda rng, seconds: seconds),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, sigma: max(0.0, rng.gauss(mean, sigma))),
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1.0 / mean))
+    }
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise ValueError(f"Invalid latency {spec!r}; expected one of "
+                         "fixed:S, uniform:LOW,HIGH, normal:MEAN,SIGMA, "
+                         "lognormal:MEDIAN,SIGMA or exponential:MEAN")
+    sample = distributions[name][1]
+    return lambda rng: sample(rng, *values)
+
+class ReplayMiss(LookupError):
+    """No recording exists for a prompt."""
+
+class ReplayResponder:
+    """Answers prompts with recorded responses."""
+
+    def __init__(self, recordings):
+        self.recordings = recordings
+
+    def respond(self, stage, messages):
+        content = self.recordings.get(prompt_key(messages))
+        if content is None:
+            raise ReplayMiss(f"No recorded {stage} response for this prompt")
+        return content
+
+class SyntheticResponder:
+    """Answers every stage with a consistent sum-of-values problem."""
+
+    def respond(self, stage, messages):
+        if stage == "research_analyst":
+            return SYNTHETIC_ANALYSIS.format(description=messages[-1].content.strip())
+        if stage == "test_engineer":
+            return SYNTHETIC_TESTS
+        return SYNTHETIC_CODE
+
+def build_recordings(solved_dir="problems/solved"):
+    """Return prompt-key -> response recordings rebuilt from solution.json files.
+
+    Each solution contributes its analysis, tests and code as the answers to
+    the prompts the agents would send for them. When a problem was solved
+    several times, the newest passing run wins.
+    """
+    from agents import ResearchAnalyst, TestEngineer, PythonDeveloper
+    from blobstore import load_solution
+
+    # Prompts are built without an LLM, so a placeholder is enough.
+    placeholder = FakeChatModel("recording", "recording", SyntheticResponder())
+    analyst = ResearchAnalyst(llm=placeholder, use_cache=False)
+    test_engineer = TestEngineer(llm=placeholder, use_cache=False)
+    developer = PythonDeveloper(llm=placeholder, use_cache=False)
+
+    solutions = []
+    for solution_file in Path(solved_dir).glob("*/solution.json"):
+        try:
+            solutions.append(load_solution(solution_file))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Skipping unreadable solution {solution_file}: {str(e)}")
+    solutions.sort(key=lambda data: (data["metadata"]["status"] == "PASSED",
+                                     data["metadata"]["timestamp"]), reverse=True)
+
+    recordings = {}
+    for data in solutions:
+        description = data["problem"]["description"]
+        analysis = data["problem"]["analysis"]
+        tests = data["solution"]["tests"]
+        code = f"```python\n{data['solution']['code']}\n```"
+        for messages, content in (
+            (analyst._analysis_messages(description), analysis),
+            (test_engineer._test_messages(analysis), f"```python\n{tests}\n```"),
+            (developer._implementation_messages(analysis, tests), code),
+            (developer._implementation_messages(analysis, None), code)
+        ):
+            recordings.setdefault(prompt_key(messages), content)
+    return recordings
+
+_responders = {}
+_responders_lock = threading.Lock()
+
+def get_responder(backend):
+    """Return the process-wide responder for a fake backend."""
+    with _responders_lock:
+        responder = _responders.get(backend)
+        if responder is None:
+            if backend == "replay":
+                replay_file = os.getenv("LLM_REPLAY_FILE")
+                if replay_file:
+                    with open(replay_file, 'r', encoding='utf-8') as f:
+                        recordings = json.load(f)
+                else:
+                    recordings = build_recordings()
+                logger.info(f"Replaying {len(recordings)} recorded LLM responses")
+                responder = ReplayResponder(recordings)
+            else:
+                responder = SyntheticResponder()
+            responder = _responders[backend] = responder
+        return responder
+
+class _Generation:
+    def __init__(self, text):
+        self.text = text
+
+class _Result:
+    def __init__(self, text):
+        self.generations = [[_Generation(text)]]
+        # No usage: the agents estimate tokens from the text, as for streams.
+        self.llm_output = None
+
+class _Chunk:
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatModel:
+    """Offline chat model with the interface BaseAgent uses.
+
+    Streams are split into chunks with the latency spread across them, so
+    cutting a stream at the closing fence saves time as it does for real.
+    """
+
+    def __init__(self, stage, model_name, responder, latency="0", temperature=0.7,
+                 max_tokens=None, max_retries=0, seed="0"):
+        self.stage = stage
+        self.model_name = model_name
+        self.responder = responder
+        self.latency = parse_latency(latency)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.seed = seed
+
+    def _answer(self, messages):
+        rng = random.Random(f"{self.seed}:{self.stage}:{prompt_key(messages)}")
+        return self.responder.respond(self.stage, messages), self.latency(rng)
+
+    @staticmethod
+    def _chunks(content, size=16):
+        return [content[i:i + size] for i in range(0, len(content), size)] or [""]
+
+    def generate(self, batch):
+        content, latency = self._answer(batch[0])
+        time.sleep(latency)
+        return _Result(content)
+
+    async def agenerate(self, batch):
+        content, latency = self._answer(batch[0])
+        await asyncio.sleep(latency)
+        return _Result(content)
+
+    def stream(self, messages):
+        content, latency = self._answer(messages)
+        chunks = self._chunks(content)
+        for chunk in chunks:
+            time.sleep(latency / len(chunks))
+            yield _Chunk(chunk)
+
+    async def astream(self, messages):
+        content, latency = self._answer(messages)
+        chunks = self._chunks(content)
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield _Chunk(chunk)
+
+def create_chat_model(backend, stage, config):
+    """Return a fake chat model for a stage, using its client settings."""
+    return FakeChatModel(
+        stage,
+        config["model"],
+        get_responder(backend),
+        latency=os.getenv(f"{stage.upper()}_FAKE_LATENCY") or os.getenv("LLM_FAKE_LATENCY"),
+        temperature=config["temperature"],
+        max_tokens=config["max_tokens"],
+        max_retries=config["max_retries"],
+        seed=os.getenv("LLM_FAKE_SEED", "0")
+    )
+
+def main(argv=None):
+    """Command-line interface for building replay recordings."""
+    parser = argparse.ArgumentParser(description="Manage fake LLM backend recordings")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build-replay",
+                                help="Rebuild replay recordings from solution.json files")
+    build.add_argument("--solved", default="problems/solved", help="Solved problems directory")
+    build.add_argument("--out", default="replay.json", help="Recordings file to write")
+    args = parser.parse_args(argv)
+
+    if args.command == "build-replay":
+        recordings = build_recordings(args.solved)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(recordings, f, indent=2)
+        print(f"Wrote {len(recordings)} recordings to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+A local OpenAI-compatible chat completions server for exercising the client
+stack without network access or an API key. It answers every request with a
+small fenced code block, optionally streamed, after a configurable latency,
+and can enforce a requests-per-minute limit and a concurrency limit or inject
+random 429 and 500 responses, so rate limiting and retries can be tested
+against realistic failures. GET /stats returns what the server has seen.
+
+Usage:
+    python fake_openai.py --port 8765 --max-concurrent 4 --rate-limit-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=x python main.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = "```python\ndef solve():\n    return None\n```"
+
+class FakeOpenAIServer:
+    """Chat completions endpoint with configurable latency and rate limits."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, requests_per_minute=None,
+                 max_concurrent=None, rate_limit_rate=0.0, error_rate=0.0, retry_after=1.0,
+                 response=DEFAULT_RESPONSE, seed=None):
+        self.latency = latency
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrent = max_concurrent
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.response = response
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Like the provider's limits, the request budget refills continuously
+        # and holds at most a minute's worth.
+        self._budget = float(requests_per_minute or 0)
+        self._budget_updated = time.monotonic()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0,
+                      "peak_concurrency": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _admit(self):
+        """Return None to serve a request, or the (status, message) to reject it with."""
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.requests_per_minute:
+                self._budget = min(self.requests_per_minute, self._budget
+                                   + (now - self._budget_updated) * self.requests_per_minute / 60)
+                self._budget_updated = now
+            if self.requests_per_minute and self._budget < 1:
+                rejection = (429, "Rate limit reached for requests per minute")
+            elif self.max_concurrent and self.in_flight >= self.max_concurrent:
+                rejection = (429, "Too many concurrent requests")
+            elif self._random.random() < self.rate_limit_rate:
+                rejection = (429, "Rate limit reached")
+            elif self._random.random() < self.error_rate:
+                rejection = (500, "The server had an error while processing your request")
+            else:
+                self._budget -= 1
+                self.in_flight += 1
+                self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"],
+                                                     self.in_flight)
+                return None
+            self.stats["rate_limited" if rejection[0] == 429 else "errors"] += 1
+            return rejection
+
+    def _finish(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.stats["completed"] += 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=()):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with server._lock:
+                        self._send_json(200, dict(server.stats))
+                else:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                rejection = server._admit()
+                if rejection is not None:
+                    status, message = rejection
+                    headers = [("Retry-After", f"{server.retry_after:g}")] if status == 429 else []
+                    code = "rate_limit_exceeded" if status == 429 else "server_error"
+                    self._send_json(status, {"error": {
+                        "message": message, "type": "requests", "code": code
+                    }}, headers)
+                    return
+                try:
+                    time.sleep(server.latency)
+                    if request.get("stream"):
+                        self._stream(request)
+                    else:
+                        self._complete(request)
+                finally:
+                    server._finish()
+
+            def _complete(self, request):
+                prompt = sum(len(m.get("content") or "") for m in request["messages"])
+                self._send_json(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": server.response}}],
+                    "usage": {"prompt_tokens": prompt // 4,
+                              "completion_tokens": len(server.response) // 4,
+                              "total_tokens": (prompt + len(server.response)) // 4}
+                })
+
+            def _stream(self, request):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(data):
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                try:
+                    for i in range(0, len(server.response), 8):
+                        chunk = {
+                            "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                            "created": int(time.time()), "model": request["model"],
+                            "choices": [{"index": 0, "finish_reason": None,
+                                         "delta": {"content": server.response[i:i + 8]}}]
+                        }
+                        write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    write(b"data: [DONE]\n\n")
+                    write(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading at the closing fence.
+                    pass
+
+        return Handler
+
+    def serve_forever(self):
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self):
+        """Serve on a background thread and return self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Seconds before each response (default: 0.05)")
+    parser.add_argument("--rpm", type=int, default=None,
+                        help="Answer 429 once this many requests per minute are exceeded")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="Answer 429 while this many requests are in progress")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a random 429")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 500")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with each 429 (default: 1)")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        args.host, args.port, args.latency, args.rpm, args.max_concurrent,
+        args.rate_limit_rate, args.error_rate, args.retry_after
+    )
+    print(f"Serving on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+This module coordinates worker processes that share a problems directory.
+A worker claims a problem by atomically creating a lease file in
+problems/leases/ and keeps it alive with heartbeats. A lease whose heartbeat
+is older than its time-to-live is expired, so problems held by a crashed
+worker are claimed again by another. Renewing, breaking and releasing a
+lease read and then rewrite or remove its file, so they hold an flock on the
+problem's .lock file while they do. Each worker also writes a throughput
+report next to the leases.
+
+Usage:
+    python main.py --worker [ID]    # run one worker; start several to share a batch
+    python leases.py report         # per-worker throughput of the last runs
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("problem_solver")
+
+LEASE_DIR = Path("problems/leases")
+DEFAULT_TTL = 60.0
+
+def default_worker_id():
+    """Return a worker id unique across machines sharing the filesystem."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _atomic_write_json(path, data):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_name, path)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        # Being written by its creator; treat it as live until it parses.
+        return {}
+
+class Lease:
+    """A claim on one problem held by this worker."""
+
+    def __init__(self, problem_name, key, path, data):
+        self.problem_name = problem_name
+        self.key = key
+        self.path = path
+        self.data = data
+        self.lost = False
+
+class LeaseManager:
+    """Claims, renews and releases lease files for one worker."""
+
+    def __init__(self, directory=LEASE_DIR, worker_id=None, ttl=DEFAULT_TTL):
+        self.directory = Path(directory)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._held = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _path(self, problem_name):
+        return self.directory / f"{problem_name}.lease"
+
+    @contextlib.contextmanager
+    def _file_lock(self, path):
+        """Hold an exclusive lock on a lease across processes, where supported."""
+        if fcntl is None:
+            yield
+            return
+        with open(path.with_name(path.name + ".lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _new_lease_data(self, key):
+        now = time.time()
+        return {"worker": self.worker_id, "key": key, "acquired": now,
+                "heartbeat": now, "ttl": self.ttl}
+
+    @staticmethod
+    def is_expired(data, now=None):
+        """Return True if a lease's holder has missed its heartbeats."""
+        if not data:
+            return False
+        return (now or time.time()) > data["heartbeat"] + data.get("ttl", DEFAULT_TTL)
+
+    def holder(self, problem_name):
+        """Return the live lease on a problem, or None if it is free or expired."""
+        data = _read_json(self._path(problem_name))
+        if data is None or self.is_expired(data):
+            return None
+        return data
+
+    def _create(self, path, data):
+        """Create the lease file only if it does not exist; return True on success."""
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return True
+
+    def _break_expired(self, path, expired):
+        """Remove an expired lease; return False if another worker got there first."""
+        tombstone = path.with_name(f"{path.name}.{uuid.uuid4().hex}.expired")
+        with self._file_lock(path):
+            try:
+                # Only one worker can rename the file away.
+                os.rename(path, tombstone)
+            except FileNotFoundError:
+                return False
+            if _read_json(tombstone) != expired:
+                # The file was replaced by a fresh lease after we read it; put it back.
+                try:
+                    os.link(tombstone, path)
+                except OSError:
+                    pass
+                os.unlink(tombstone)
+                return False
+            os.unlink(tombstone)
+        logger.info(f"Lease on {path.stem} held by {expired.get('worker')} expired; reclaiming")
+        return True
+
+    def claim(self, problem_name, key):
+        """Try to claim a problem; return a Lease, or None if another worker holds it."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(problem_name)
+        data = self._new_lease_data(key)
+        if not self._create(path, data):
+            existing = _read_json(path)
+            if existing is None:
+                if not self._create(path, data):
+                    return None
+            elif not self.is_expired(existing) or not self._break_expired(path, existing):
+                return None
+            elif not self._create(path, data):
+                return None
+        lease = Lease(problem_name, key, path, data)
+        with self._lock:
+            self._held[problem_name] = lease
+        return lease
+
+    def renew(self):
+        """Refresh the heartbeat of every held lease."""
+        with self._lock:
+            leases = list(self._held.values())
+        for lease in leases:
+            if lease.lost:
+                continue
+            with self._file_lock(lease.path):
+                # Checked under the lock, so no worker can break and reclaim the
+                # lease between the check and the rewrite.
+                current = _read_json(lease.path)
+                if current and current.get("worker") == self.worker_id:
+                    lease.data = dict(lease.data, heartbeat=time.time())
+                    _atomic_write_json(lease.path, lease.data)
+                    continue
+            lease.lost = True
+            logger.warning(f"Lease on {lease.problem_name} was taken over by "
+                           f"{(current or {}).get('worker', 'nobody')}")
+
+    def release(self, lease):
+        """Give up a lease, deleting the file if this worker still owns it."""
+        with self._lock:
+            self._held.pop(lease.problem_name, None)
+        with self._file_lock(lease.path):
+            current = _read_json(lease.path)
+            if current and current.get("worker") == self.worker_id:
+                try:
+                    lease.path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except Exception as e:
+                logger.error(f"Failed to renew leases: {str(e)}")
+
+    def start_heartbeat(self):
+        """Renew held leases every third of the time-to-live on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class WorkerReport:
+    """Per-worker throughput: problems processed, outcomes and time spent."""
+
+    def __init__(self, worker_id, jobs=1):
+        self.worker_id = worker_id
+        self.jobs = jobs
+        self.started = time.time()
+        self.problems = []
+
+    def record(self, problem_name, status, duration):
+        self.problems.append({"problem": problem_name, "status": status, "duration": duration})
+
+    def summary(self):
+        elapsed = time.time() - self.started
+        busy = sum(problem["duration"] for problem in self.problems)
+        statuses = [problem["status"] for problem in self.problems]
+        return {
+            "worker": self.worker_id,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "elapsed": elapsed,
+            "busy": busy,
+            "jobs": self.jobs,
+            # Fraction of the worker's job slots that were busy.
+            "utilization": busy / (elapsed * self.jobs) if elapsed else 0.0,
+            "processed": len(self.problems),
+            "passed": statuses.count("PASSED"),
+            "failed": statuses.count("FAILED"),
+            "errors": statuses.count("ERROR"),
+            "problems_per_minute": len(self.problems) / elapsed * 60 if elapsed else 0.0,
+            "problems": self.problems
+        }
+
+    def save(self, directory=LEASE_DIR):
+        """Write the report to <directory>/workers/<worker>.json and return its path."""
+        path = Path(directory) / "workers" / f"{self.worker_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write_json(path, self.summary())
+        return path
+
+def format_report(summary):
+    return (f"{summary['worker']:<28}  {summary['processed']:>4} problems  "
+            f"{summary['passed']:>4} passed  {summary['failed']:>4} failed  "
+            f"{summary['errors']:>4} errors  {summary['problems_per_minute']:6.2f}/min  "
+            f"{summary['utilization']:4.0%} busy")
+
+def main(argv=None):
+    """Command-line interface for worker reports."""
+    parser = argparse.ArgumentParser(description="Inspect distributed worker runs")
+    parser.add_argument("--leases", default=str(LEASE_DIR), help="Lease directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Show each worker's throughput report")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        reports = sorted(Path(args.leases).glob("workers/*.json"))
+        total = 0
+        for report_file in reports:
+            summary = _read_json(report_file)
+            if summary:
+                total += summary["processed"]
+                print(format_report(summary))
+        print(f"{len(reports)} workers, {total} problems processed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
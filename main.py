@@ -1,40 +1,58 @@
 """
 Main script for the automated software development team.
 This script orchestrates the collaboration between different agents to solve coding problems.
+Heavy dependencies (LangChain, OpenAI, pytest, rich, asyncio) are imported by
+the stages that use them, so --list, --status and --dry-run start quickly.
 """
 
 import os
+import argparse
 from dotenv import load_dotenv
 
 # Load environment variables first, before other imports
 load_dotenv()
 
 import json
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
-from rich.console import Console
-from rich.logging import RichHandler
 import logging
-import pytest
-import sys
-from io import StringIO
-import re
-
-from agents import create_agents
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[RichHandler(rich_tracebacks=True)]
-)
+
+from agents import AGENT_NAMES, PROMPT_VERSION, configured_model, get_agents
+from benchmark import check_bound, entry_point_names
+from blobstore import get_blob_store, store_solution
+from cache import refreshing
+from candidates import BestOfN
+from catalog import Catalog
+from checkpoint import Checkpoints, NoCheckpoints
+from clients import get_client_registry, llm_backend
+from leases import LeaseManager, WorkerReport, format_report
+from manifest import Manifest, problem_hash
+from metrics import metrics, summarize
+from precheck import check_results, static_check
+import tracing
+from repair import RepairLoop
+from routing import DEFAULT_FAST_MODEL, STAGE_AGENTS, ModelRouter
+from watcher import ProblemWatcher
+
 logger = logging.getLogger("problem_solver")
-console = Console()
+
+def configure_logging():
+    """Send log records to a rich console handler."""
+    from rich.logging import RichHandler
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)]
+    )
 
 def validate_environment():
     """Validate required environment variables."""
-    required_vars = ['OPENAI_API_KEY']
+    # The offline backends in fake_llm.py need no API key.
+    required_vars = ['OPENAI_API_KEY'] if llm_backend() == "openai" else []
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
     if missing_vars:
@@ -66,80 +84,195 @@ def read_problem_file(file_path):
         raise
 
 def run_tests(test_file):
-    """Run pytest on the test file and return the results."""
+    """Run pytest on the test file in an isolated worker and return the results."""
+    from runner import get_test_runner
+
     try:
-        # Capture stdout to get test results
-        stdout = StringIO()
-        sys.stdout = stdout
-        
-        # Run pytest with clean output
-        test_result = pytest.main([
-            "-v",  # verbose output
-            "--tb=short",  # shorter traceback format
-            "--no-header",  # no header
-            "--no-summary",  # no summary
-            str(test_file)
-        ])
-        
-        # Restore stdout
-        sys.stdout = sys.__stdout__
-        
-        # Get the captured output
-        test_output = stdout.getvalue()
-        
-        # Clean up the output
-        test_output = re.sub(r'=+ test session starts =+\n.*?\n', '', test_output, flags=re.DOTALL)
-        test_output = re.sub(r'=+ warnings summary =+\n.*?\n', '', test_output, flags=re.DOTALL)
-        test_output = re.sub(r'=+ short test summary info =+\n.*?\n', '', test_output, flags=re.DOTALL)
-        test_output = test_output.strip()
-        
-        return {
-            "success": test_result == pytest.ExitCode.OK,
-            "output": test_output
-        }
+        with tracing.span("run_tests", test_file=str(test_file)):
+            results = get_test_runner().run(test_file)
+            # pytest phases were timed in the worker; attach them under this span
+            for phase in results.get("phases", []):
+                tracing.add_event(
+                    phase["name"], phase["start"], phase["duration"],
+                    args={"outcome": phase.get("outcome")}
+                )
+        return results
     except Exception as e:
         logger.error(f"Failed to run tests: {str(e)}")
         return {
             "success": False,
+            "status": "FAILED",
             "output": str(e)
         }
 
-def save_solution(problem_name, analysis, code, tests):
-    """Save the solution and related information to files."""
+def checked_run_tests(code_file, test_file, stats=None):
+    """Statically check the files and run pytest only if the check passes.
+
+    Returns (test results, pre-check report); `stats` accumulates the
+    pre-check time and how many runs it failed fast.
+    """
+    with tracing.span("precheck", test_file=str(test_file)):
+        report = static_check(code_file, test_file)
+    if stats is not None:
+        stats["total"] = stats.get("total", 0.0) + report["duration"]
+        stats["failed_fast"] = stats.get("failed_fast", 0) + (report["verdict"] != "OK")
+    if report["verdict"] != "OK":
+        logger.info(f"Static check: {report['verdict']} "
+                    f"({'; '.join(problem['message'] for problem in report['problems'])})")
+        return check_results(report), report
+    return run_tests(test_file), report
+
+def benchmark_solution(code_file, analysis, tests):
+    """Benchmark the solution in a worker and check it against the analysis bound.
+
+    The function benchmarked is the first one the tests call, or failing that
+    one the analysis gives a signature for.
+    """
+    from runner import get_test_runner
+
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        solution_dir = Path("problems/solved")
-        
-        # Create a module directory for the solution
-        module_dir = solution_dir / f"{problem_name}_{timestamp}"
-        module_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Create an empty __init__.py to make it a package
-        (module_dir / "__init__.py").touch()
-        
-        # Save code as a Python file
-        code_file = module_dir / "solution.py"
+        with tracing.span("benchmark", code_file=str(code_file)):
+            result = get_test_runner().benchmark(code_file, entry_point_names(tests, analysis))
+    except Exception as e:
+        logger.error(f"Failed to benchmark solution: {str(e)}")
+        result = {"status": "ERROR", "reason": str(e)}
+    return check_bound(result, analysis)
+
+def create_solution_dir(problem_name, timestamp):
+    """Atomically create a unique solution directory for this run.
+
+    Directories are named by the second, so concurrent runs of the same problem
+    can land on the same name; those get a numeric suffix instead of sharing it.
+    """
+    solution_dir = Path("problems/solved")
+    base_name = f"{problem_name}_{timestamp}"
+    module_dir = solution_dir / base_name
+    suffix = 1
+    while True:
+        try:
+            module_dir.mkdir(parents=True)
+            return module_dir
+        except FileExistsError:
+            module_dir = solution_dir / f"{base_name}_{suffix}"
+            suffix += 1
+
+def write_solution_files(module_dir, code, tests):
+    """Write code and tests into module_dir as an importable package."""
+    # Create an empty __init__.py to make it a package
+    (module_dir / "__init__.py").touch()
+    
+    # Save code as a Python file
+    code_file = module_dir / "solution.py"
+    with open(code_file, 'w', encoding='utf-8') as f:
+        f.write(code)
+    
+    # Save tests as a Python file
+    test_file = module_dir / "test_solution.py"
+    with open(test_file, 'w', encoding='utf-8') as f:
+        # Write the test code with correct import
+        f.write("import pytest\n")
+        f.write("from .solution import *\n\n")
+        f.write(tests)
+    return code_file, test_file
+
+@tracing.traced("validate_solution")
+def validate_solution(module_dir, analysis, code, tests, stages, repair=None, routing=None,
+                      tested=None):
+    """Write and test the solution in module_dir, escalating or repairing it if the tests fail.
+
+    The files are statically checked before each test run. `tested` is a run
+    from validate_candidate; if it was for this code and these tests, its
+    results are used instead of running the tests again. If the tests fail
+    and a ModelRouter is given as `routing`, code from the fast model is
+    reimplemented on the strong model; if they still fail and a RepairLoop is
+    given, it is run. Neither runs when the tests themselves are rejected by
+    the static check, and a failed LLM call keeps the code already tested.
+    Returns the final code, its test results and the solution.json sections
+    describing the validation.
+    """
+    test_stats = stages["run_tests"] = {"total": 0.0, "runs": 0}
+    precheck_stats = stages["precheck"] = {"total": 0.0, "failed_fast": 0}
+    code_file, test_file = write_solution_files(module_dir, code, tests)
+    sections = {}
+    
+    def record(report, elapsed):
+        sections["precheck"] = report
+        if report["verdict"] == "OK":
+            test_stats["total"] += elapsed - report["duration"]
+            test_stats["runs"] += 1
+
+    def retest(new_code):
         with open(code_file, 'w', encoding='utf-8') as f:
-            f.write(code)
-        
-        # Save tests as a Python file
+            f.write(new_code)
+        start = time.perf_counter()
+        results, report = checked_run_tests(code_file, test_file, precheck_stats)
+        record(report, time.perf_counter() - start)
+        return results
+    
+    if tested is not None and (tested["code"], tested["tests"]) == (code, tests):
+        test_results = tested["results"]
+        precheck_stats["total"] += tested["report"]["duration"]
+        precheck_stats["failed_fast"] += tested["report"]["verdict"] != "OK"
+        record(tested["report"], tested["elapsed"])
+    else:
+        test_results = retest(code)
+    # Rejected tests would reject any implementation; only the code can be fixed.
+    fixable = test_results["status"] != "REJECTED"
+    if not test_results["success"] and fixable and routing is not None:
+        code, test_results = routing.run(analysis, tests, code, test_results, retest)
+    if not test_results["success"] and fixable and repair is not None:
+        code, test_results = repair.run(code, test_results, retest)
+        stages["repair"] = repair.stats
+        sections["repair"] = repair.summary()
+    return code, test_results, sections
+
+@tracing.traced("save_solution", "problem_name")
+def save_solution(problem_name, module_dir, timestamp, analysis, code, tests, test_results,
+                  stages=None, extra=None, benchmark=True, routing=None):
+    """Save a validated solution and related information to module_dir.
+
+    `test_results` are those of the final code from validate_solution, and
+    `extra` holds additional top-level sections to store in solution.json.
+    With `benchmark`, passing solutions are benchmarked and rejected if they
+    grow faster than the time complexity stated in the analysis.
+    """
+    stages = stages if stages is not None else {}
+    try:
+        save_start = time.perf_counter()
+        code_file = module_dir / "solution.py"
         test_file = module_dir / "test_solution.py"
-        with open(test_file, 'w', encoding='utf-8') as f:
-            # Write the test code with correct import
-            f.write("import pytest\n")
-            f.write("from .solution import *\n\n")
-            f.write(tests)
         
-        # Run the tests
-        test_results = run_tests(test_file)
+        # Benchmark passing solutions and enforce the analysis complexity bound
+        within_bound = True
+        if benchmark and test_results["success"]:
+            benchmark_start = time.perf_counter()
+            benchmark_results = benchmark_solution(code_file, analysis, tests)
+            stages["benchmark"] = {"total": time.perf_counter() - benchmark_start}
+            extra = dict(extra or {}, benchmark=benchmark_results)
+            within_bound = benchmark_results["within_bound"] is not False
+            if not within_bound:
+                logger.info(
+                    f"Benchmark: fitted {benchmark_results['fitted']} exceeds the "
+                    f"analysis bound {benchmark_results['bound']}"
+                )
+        if routing is not None:
+            extra = dict(extra or {}, routing=routing.summary())
         
         # Save complete solution with test results
+        from runner import slowest_tests
+
+        if test_results["success"]:
+            status = "PASSED" if within_bound else "FAILED"
+        else:
+            # Runs stopped by a sandbox limit or rejected tests keep their status.
+            status = (test_results["status"] if test_results["status"] in ("TIMEOUT", "OOM", "REJECTED")
+                      else "FAILED")
         solution_file = module_dir / "solution.json"
         solution_data = {
             "metadata": {
                 "problem_name": problem_name,
                 "timestamp": timestamp,
-                "status": "PASSED" if test_results["success"] else "FAILED"
+                "status": status
             },
             "problem": {
                 "description": read_problem_file(Path("problems/unsolved") / f"{problem_name}.txt"),
@@ -151,17 +284,45 @@ def save_solution(problem_name, analysis, code, tests):
             },
             "test_results": {
                 "success": test_results["success"],
-                "output": test_results["output"]
+                "status": test_results["status"],
+                "output": test_results["output"],
+                "tests": test_results.get("tests", []),
+                "slowest": slowest_tests(test_results.get("tests", []))
             }
         }
+        solution_data["stages"] = stages
+        solution_data.update(extra or {})
         
+        # Bytes and time spent persisting the run, excluding the benchmark
+        file_bytes = code_file.stat().st_size + test_file.stat().st_size
+        stages["save_solution"] = {
+            "bytes_written": file_bytes,
+            "total": time.perf_counter() - save_start - stages.get("benchmark", {}).get("total", 0)
+        }
+        # Large text fields are stored once per hash in the blob store
+        stored = store_solution(solution_data, get_blob_store())
+        # bytes_written counts solution.json, which contains it; serialize until
+        # the count no longer changes the file's length (a few passes at most).
+        while True:
+            stored["metrics"] = summarize(stages)
+            solution_json = json.dumps(stored, indent=2)
+            bytes_written = file_bytes + len(solution_json.encode("utf-8"))
+            if bytes_written == stages["save_solution"]["bytes_written"]:
+                break
+            stages["save_solution"]["bytes_written"] = bytes_written
+        solution_data["metrics"] = stored["metrics"]
         with open(solution_file, 'w', encoding='utf-8') as f:
-            json.dump(solution_data, f, indent=2)
+            f.write(solution_json)
+        metrics.record_problem(stages, solution_data["metadata"]["status"])
+        try:
+            Catalog().record(solution_file, solution_data)
+        except Exception as e:
+            logger.error(f"Failed to update catalog: {str(e)}")
         
         logger.info(f"Solution saved to: {solution_file}")
         logger.info(f"Code saved to: {code_file}")
         logger.info(f"Tests saved to: {test_file}")
-        logger.info(f"Test results: {'PASSED' if test_results['success'] else 'FAILED'}")
+        logger.info(f"Test results: {solution_data['test_results']['status']}")
         if not test_results['success']:
             logger.info("Test output:")
             logger.info(test_results['output'])
@@ -170,65 +331,874 @@ def save_solution(problem_name, analysis, code, tests):
         logger.error(f"Failed to save solution: {str(e)}")
         raise
 
-def process_problem(problem_file):
-    """Process a single problem file using the agent team."""
-    try:
-        problem_name = problem_file.stem
-        problem_description = read_problem_file(problem_file)
-        
-        logger.info(f"Processing problem: {problem_name}")
-        
-        # Create agents
-        agents = create_agents()
-        
-        # Step 1: Research Analyst analyzes the problem
-        logger.info("Step 1: Analyzing problem...")
-        analysis = agents['research_analyst'].analyze_problem(problem_description)
-        logger.info("Analysis complete.")
-        
-        # Step 2: Test Engineer creates tests
-        logger.info("Step 2: Creating tests...")
-        tests = agents['test_engineer'].create_tests(analysis)
-        logger.info("Tests created.")
-        
-        # Step 3: Python Developer implements the solution
-        logger.info("Step 3: Implementing solution...")
-        code = agents['python_developer'].implement_solution(analysis, tests)
-        logger.info("Implementation complete.")
-        
-        # Save the solution
-        solution_file = save_solution(
-            problem_name,
-            analysis,
-            code,
-            tests
-        )
+def new_stage_stats():
+    """Return the per-stage timing and token dicts filled in by the agents."""
+    return {"analysis": {}, "tests": {}, "implementation": {}}
+
+def publish_metrics(options):
+    """Write the metrics file, if one was requested."""
+    if options.metrics_file:
+        try:
+            metrics.write_file(options.metrics_file)
+        except Exception as e:
+            logger.error(f"Failed to write metrics file: {str(e)}")
+
+def new_agents(options, model_name=None):
+    """Return the shared agents for a model with the run's cache, stream and context options."""
+    uncached = options.uncached
+    if options.candidates > 1 and 'python_developer' not in uncached:
+        # Cached answers would make every best-of-N sample identical.
+        uncached = uncached + ('python_developer',)
+    return get_agents(model_name, uncached=uncached, streaming=options.stream,
+                      context_budget=options.context_budget)
+
+def new_best_of(agents, options):
+    """Return a BestOfN for the implementation stage, or None with one candidate."""
+    if options.candidates < 2:
+        return None
+    return BestOfN(agents['python_developer'], options.candidates, write_solution_files)
+
+def new_router(problem_description, stages, options):
+    """Return a ModelRouter for a problem, or None unless a distinct --fast-model is set."""
+    if not options.fast_model or options.fast_model == configured_model():
+        return None
+    return ModelRouter(problem_description, options.fast_model, configured_model(),
+                       lambda model_name: new_agents(options, model_name), stages)
+
+def new_repair_loop(agents, options):
+    """Return a RepairLoop for one problem, or None when repairs are disabled."""
+    if options.max_repairs < 1:
+        return None
+    return RepairLoop(agents['python_developer'], options.max_repairs, options.repair_token_budget)
+
+def new_checkpoints(problem_name, agents, options):
+    """Return the stage checkpoints for a problem, or a no-op with --no-checkpoints.
+
+    Each stage is keyed by the model it was routed to, and the implementation
+    stages by the context budget and the number of candidates.
+    """
+    if options.no_checkpoints:
+        return NoCheckpoints()
+    models = {stage: agents[agent_name].model_name for stage, agent_name in STAGE_AGENTS.items()}
+    implementation = {"context_budget": options.context_budget}
+    settings = {
+        "speculative_implementation": implementation,
+        "implementation": dict(implementation, candidates=options.candidates)
+    }
+    return Checkpoints(problem_name, models, PROMPT_VERSION, settings)
+
+@tracing.traced("validate_candidate")
+def validate_candidate(code, tests):
+    """Run tests against candidate code in a scratch package, outside problems/solved.
+
+    Returns the checked run, which validate_solution reuses when the candidate
+    is kept instead of running the same tests again.
+    """
+    with tempfile.TemporaryDirectory(prefix="candidate_") as scratch_dir:
+        module_dir = Path(scratch_dir) / "candidate"
+        module_dir.mkdir()
+        code_file, test_file = write_solution_files(module_dir, code, tests)
+        start = time.perf_counter()
+        results, report = checked_run_tests(code_file, test_file)
+        return {"code": code, "tests": tests, "results": results, "report": report,
+                "elapsed": time.perf_counter() - start}
+
+@tracing.traced("process_problem", "problem_file")
+def process_problem(problem_file, options=None, refresh=False):
+    """Process a single problem file using the agent team.
+
+    With `refresh`, cached LLM responses are bypassed, as for a problem whose
+    last run did not pass.
+    """
+    options = options or parse_args([])
+    with refreshing(refresh):
+        try:
+            problem_name = problem_file.stem
+            problem_description = read_problem_file(problem_file)
         
-        logger.info(f"Successfully solved problem: {problem_name}")
-        return solution_file
+            logger.info(f"Processing problem: {problem_name}")
+        
+            # Shared agents reuse pooled connections across problems
+            stages = new_stage_stats()
+            extra = {}
+            # The speculative candidate's test run, reused if it is kept.
+            speculation = None
+            router = new_router(problem_description, stages, options)
+            agents = router.agents if router else new_agents(options)
+            best_of = new_best_of(agents, options)
+            implement = best_of.implement if best_of else agents['python_developer'].implement_solution
+        
+            # Stage outputs are checkpointed so an interrupted run resumes where it stopped
+            checkpoints = new_checkpoints(problem_name, agents, options)
+        
+            # Step 1: Research Analyst analyzes the problem
+            logger.info("Step 1: Analyzing problem...")
+            analysis = checkpoints.run(
+                "analysis", {"description": problem_description},
+                lambda: agents['research_analyst'].analyze_problem(
+                    problem_description, stages["analysis"]
+                ),
+                stages["analysis"]
+            )
+            logger.info("Analysis complete.")
+        
+            if options.speculative:
+                # Steps 2 and 3 overlap: the developer starts from the analysis alone
+                logger.info("Steps 2-3: Creating tests and speculative solution...")
+                stages["speculative_implementation"] = {}
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    tests_future = executor.submit(tracing.in_current_context(
+                        checkpoints.run, "tests", {"analysis": analysis},
+                        lambda: agents['test_engineer'].create_tests(analysis, stages["tests"]),
+                        stages["tests"]
+                    ))
+                    code_future = executor.submit(tracing.in_current_context(
+                        checkpoints.run, "speculative_implementation", {"analysis": analysis},
+                        lambda: agents['python_developer'].implement_solution(
+                            analysis, None, stages["speculative_implementation"]
+                        ),
+                        stages["speculative_implementation"]
+                    ))
+                    tests = tests_future.result()
+                    code = code_future.result()
+                speculation = validate_candidate(code, tests)
+                extra["speculation"] = {"accepted": speculation["results"]["success"]}
+                if extra["speculation"]["accepted"]:
+                    logger.info("Speculative solution passed the generated tests.")
+                    del stages["implementation"]
+                else:
+                    logger.info("Speculative solution failed; implementing against the tests...")
+                    code = checkpoints.run(
+                        "implementation", {"analysis": analysis, "tests": tests},
+                        lambda: implement(analysis, tests, stages["implementation"]),
+                        stages["implementation"]
+                    )
+            else:
+                # Step 2: Test Engineer creates tests
+                logger.info("Step 2: Creating tests...")
+                tests = checkpoints.run(
+                    "tests", {"analysis": analysis},
+                    lambda: agents['test_engineer'].create_tests(analysis, stages["tests"]),
+                    stages["tests"]
+                )
+                logger.info("Tests created.")
+            
+                # Step 3: Python Developer implements the solution
+                logger.info("Step 3: Implementing solution...")
+                code = checkpoints.run(
+                    "implementation", {"analysis": analysis, "tests": tests},
+                    lambda: implement(analysis, tests, stages["implementation"]),
+                    stages["implementation"]
+                )
+            if best_of is not None and best_of.candidates:
+                extra["candidates"] = best_of.summary()
+            if router is not None:
+                tests, code = router.check_outputs(analysis, tests, code)
+            logger.info("Implementation complete.")
+        
+            # Test the solution, escalating or repairing it if the tests fail, then save it
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            module_dir = create_solution_dir(problem_name, timestamp)
+            code, test_results, sections = validate_solution(
+                module_dir, analysis, code, tests, stages,
+                new_repair_loop(router.strong_agents() if router else agents, options),
+                router, speculation
+            )
+            extra.update(sections)
+            solution_file = save_solution(
+                problem_name,
+                module_dir,
+                timestamp,
+                analysis,
+                code,
+                tests,
+                test_results,
+                stages,
+                extra,
+                not options.no_benchmark,
+                router
+            )
+            checkpoints.clear()
+            publish_metrics(options)
+        
+            logger.info(f"Successfully solved problem: {problem_name}")
+            return solution_file
+        except Exception as e:
+            logger.error(f"Failed to process problem {problem_file}: {str(e)}")
+            raise
+
+def hash_problem_file(problem_file):
+    """Return the manifest key for a problem file, or None if it cannot be read."""
+    try:
+        return problem_hash(read_problem_file(problem_file), configured_model(), PROMPT_VERSION)
+    except Exception:
+        return None
+
+def record_solution(manifest, key, problem_file, solution_file):
+    """Record a finished run in the manifest using the status saved in solution.json."""
+    try:
+        with open(solution_file, 'r', encoding='utf-8') as f:
+            status = json.load(f)["metadata"]["status"]
+        manifest.record(key, problem_file.stem, Path(solution_file).parent, status)
     except Exception as e:
-        logger.error(f"Failed to process problem {problem_file}: {str(e)}")
-        raise
+        logger.error(f"Failed to update manifest for {problem_file}: {str(e)}")
+
+async def process_problem_async(problem_file, semaphore, options=None, refresh=False):
+    """Process a single problem file with async LLM calls, bounded by semaphore.
 
-def main():
+    `refresh` bypasses cached LLM responses, as in process_problem.
+    """
+    import asyncio
+
+    options = options or parse_args([])
+    async with semaphore:
+        with refreshing(refresh), tracing.span("process_problem", problem_file=str(problem_file)):
+            try:
+                problem_name = problem_file.stem
+                problem_description = read_problem_file(problem_file)
+            
+                logger.info(f"Processing problem: {problem_name}")
+            
+                stages = new_stage_stats()
+                extra = {}
+                speculation = None
+                router = new_router(problem_description, stages, options)
+                agents = router.agents if router else new_agents(options)
+                best_of = new_best_of(agents, options)
+                implement = (best_of.aimplement if best_of
+                             else agents['python_developer'].aimplement_solution)
+                loop = asyncio.get_running_loop()
+            
+                checkpoints = new_checkpoints(problem_name, agents, options)
+            
+                logger.info(f"[{problem_name}] Step 1: Analyzing problem...")
+                analysis = await checkpoints.arun(
+                    "analysis", {"description": problem_description},
+                    lambda: agents['research_analyst'].aanalyze_problem(
+                        problem_description, stages["analysis"]
+                    ),
+                    stages["analysis"]
+                )
+            
+                if options.speculative:
+                    logger.info(f"[{problem_name}] Steps 2-3: Creating tests and speculative solution...")
+                    stages["speculative_implementation"] = {}
+                    tests, code = await asyncio.gather(
+                        checkpoints.arun(
+                            "tests", {"analysis": analysis},
+                            lambda: agents['test_engineer'].acreate_tests(analysis, stages["tests"]),
+                            stages["tests"]
+                        ),
+                        checkpoints.arun(
+                            "speculative_implementation", {"analysis": analysis},
+                            lambda: agents['python_developer'].aimplement_solution(
+                                analysis, None, stages["speculative_implementation"]
+                            ),
+                            stages["speculative_implementation"]
+                        )
+                    )
+                    speculation = await loop.run_in_executor(
+                        None, tracing.in_current_context(validate_candidate, code, tests)
+                    )
+                    extra["speculation"] = {"accepted": speculation["results"]["success"]}
+                    if extra["speculation"]["accepted"]:
+                        del stages["implementation"]
+                    else:
+                        logger.info(f"[{problem_name}] Speculative solution failed; implementing against the tests...")
+                        code = await checkpoints.arun(
+                            "implementation", {"analysis": analysis, "tests": tests},
+                            lambda: implement(analysis, tests, stages["implementation"]),
+                            stages["implementation"]
+                        )
+                else:
+                    logger.info(f"[{problem_name}] Step 2: Creating tests...")
+                    tests = await checkpoints.arun(
+                        "tests", {"analysis": analysis},
+                        lambda: agents['test_engineer'].acreate_tests(analysis, stages["tests"]),
+                        stages["tests"]
+                    )
+                
+                    logger.info(f"[{problem_name}] Step 3: Implementing solution...")
+                    code = await checkpoints.arun(
+                        "implementation", {"analysis": analysis, "tests": tests},
+                        lambda: implement(analysis, tests, stages["implementation"]),
+                        stages["implementation"]
+                    )
+                if best_of is not None and best_of.candidates:
+                    extra["candidates"] = best_of.summary()
+                if router is not None:
+                    tests, code = await router.acheck_outputs(analysis, tests, code)
+            
+                # Tests run in worker processes; the thread only waits on the result.
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                module_dir = create_solution_dir(problem_name, timestamp)
+                code, test_results, sections = await loop.run_in_executor(
+                    None, tracing.in_current_context(
+                        validate_solution, module_dir, analysis, code, tests, stages,
+                        new_repair_loop(router.strong_agents() if router else agents, options),
+                        router, speculation
+                    )
+                )
+                extra.update(sections)
+                solution_file = await loop.run_in_executor(None, tracing.in_current_context(
+                    save_solution, problem_name, module_dir, timestamp, analysis, code, tests,
+                    test_results, stages, extra, not options.no_benchmark, router
+                ))
+                checkpoints.clear()
+                publish_metrics(options)
+            
+                logger.info(f"Successfully solved problem: {problem_name}")
+                return solution_file
+            except Exception as e:
+                logger.error(f"Failed to process problem {problem_file}: {str(e)}")
+                raise
+
+async def process_problems_async(problem_files, options, refresh=()):
+    """Process problems concurrently with at most `options.jobs` in flight.
+
+    Problems in `refresh` bypass cached LLM responses.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(options.jobs)
+    try:
+        results = await asyncio.gather(
+            *(process_problem_async(problem_file, semaphore, options, problem_file in refresh)
+              for problem_file in problem_files),
+            return_exceptions=True
+        )
+    finally:
+        # The async transport is bound to this event loop; close it before the loop ends.
+        await get_client_registry().aclose()
+    for problem_file, result in zip(problem_files, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to process {problem_file}: {str(result)}")
+    return results
+
+async def watch_problems(problem_files, manifest, options):
+    """Run as a daemon: process problem_files, then every new or modified problem.
+
+    Problems are served from an in-process queue by `options.jobs` workers that
+    share the warm agents and test workers. SIGTERM or SIGINT stops the watcher
+    and waits for in-flight problems; a second signal cancels them.
+    """
+    import asyncio
+    import signal
+
+    from runner import get_test_runner
+
+    loop = asyncio.get_running_loop()
+    # Fork the test workers before the signal handlers exist, so they cannot inherit them.
+    get_test_runner().start()
+    queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(options.jobs)
+    queued, in_flight, rerun = set(), set(), set()
+    stopping = asyncio.Event()
+    workers = []
+
+    def enqueue(problem_file):
+        if problem_file in in_flight:
+            # Modified while being solved; run again once the current run ends.
+            rerun.add(problem_file)
+        elif problem_file not in queued:
+            queued.add(problem_file)
+            queue.put_nowait(problem_file)
+
+    def request_stop():
+        if stopping.is_set():
+            logger.info("Second signal received; cancelling in-flight problems...")
+            for worker_task in workers:
+                worker_task.cancel()
+        stopping.set()
+
+    async def worker():
+        while True:
+            problem_file = await queue.get()
+            queued.discard(problem_file)
+            if stopping.is_set():
+                # Shutdown has started; problems not yet begun wait for the next start.
+                logger.info(f"Not starting {problem_file.stem}: shutting down")
+                queue.task_done()
+                continue
+            in_flight.add(problem_file)
+            try:
+                key = hash_problem_file(problem_file)
+                solution_file = await process_problem_async(
+                    problem_file, semaphore, options, key is not None and manifest.failed_before(key)
+                )
+                if key is not None:
+                    record_solution(manifest, key, problem_file, solution_file)
+            except Exception as e:
+                logger.error(f"Failed to process {problem_file}: {str(e)}")
+            finally:
+                in_flight.discard(problem_file)
+                queue.task_done()
+                if problem_file in rerun and not stopping.is_set():
+                    rerun.discard(problem_file)
+                    enqueue(problem_file)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, request_stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    watcher = ProblemWatcher(Path("problems/unsolved"), debounce=options.debounce)
+    watcher.prime()
+    for problem_file in problem_files:
+        enqueue(problem_file)
+    workers.extend(asyncio.create_task(worker()) for _ in range(options.jobs))
+    logger.info("Watching problems/unsolved for new problems (SIGTERM or Ctrl+C to stop)")
+    try:
+        while not stopping.is_set():
+            for problem_file in watcher.poll():
+                key = hash_problem_file(problem_file)
+                if options.force or key is None or manifest.needs_processing(key):
+                    logger.info(f"Queued {problem_file.stem}")
+                    enqueue(problem_file)
+                else:
+                    logger.info(f"Skipping {problem_file.stem}: already solved")
+            try:
+                await asyncio.wait_for(stopping.wait(), options.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        # Problems not yet started are picked up again on the next start.
+        while not queue.empty():
+            logger.info(f"Not starting {queue.get_nowait().stem}: shutting down")
+            queue.task_done()
+        if in_flight:
+            logger.info(f"Shutting down after {len(in_flight)} in-flight problems finish...")
+        await queue.join()
+    finally:
+        for worker_task in workers:
+            worker_task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await get_client_registry().aclose()
+        # Cancelled problems may still be waiting on a test worker; stop the pool
+        # so they fail fast instead of keeping the process alive.
+        await loop.run_in_executor(None, get_test_runner().shutdown)
+    logger.info("Watcher stopped.")
+
+async def run_worker(manifest, options):
+    """Process problems as one of several workers sharing problems/.
+
+    Each problem is claimed through a lease file before it is processed, so
+    workers on other processes or machines never solve the same problem at
+    once. Up to `options.jobs` claimed problems run at a time through the
+    async pipeline; a problem is only claimed once a slot is free, so idle
+    leases never hold back other workers. The worker exits once every pending
+    problem has been attempted in this batch and none is still leased by a
+    live worker.
+    """
+    import asyncio
+
+    leases = LeaseManager(worker_id=options.worker or None, ttl=options.lease_ttl)
+    report = WorkerReport(leases.worker_id, options.jobs)
+    started = datetime.now().strftime("%Y%m%d_%H%M%S")
+    semaphore = asyncio.Semaphore(options.jobs)
+
+    def done_in_batch(key):
+        entry = manifest.entries.get(key)
+        return entry is not None and entry["updated"] >= started
+
+    async def solve(problem_file, key, lease):
+        try:
+            start = time.perf_counter()
+            status = "ERROR"
+            try:
+                solution_file = await process_problem_async(problem_file, semaphore, options,
+                                                            manifest.failed_before(key))
+                record_solution(manifest, key, problem_file, solution_file)
+                status = manifest.entries[key]["status"]
+            except Exception as e:
+                logger.error(f"Failed to process {problem_file}: {str(e)}")
+            report.record(problem_file.stem, status, time.perf_counter() - start)
+        finally:
+            leases.release(lease)
+
+    logger.info(f"Worker {leases.worker_id} started (lease TTL {options.lease_ttl:g}s, "
+                f"{options.jobs} jobs)")
+    leases.start_heartbeat()
+    running = set()
+    try:
+        attempted = set()
+        while True:
+            manifest.reload()
+            leased_elsewhere = 0
+            for problem_file in find_problems():
+                if len(running) >= options.jobs:
+                    break
+                key = hash_problem_file(problem_file)
+                if key is None or key in attempted or done_in_batch(key):
+                    continue
+                if not options.force and not manifest.needs_processing(key):
+                    continue
+                lease = leases.claim(problem_file.stem, key)
+                if lease is None:
+                    leased_elsewhere += 1
+                    continue
+                attempted.add(key)
+                # Another worker may have finished it between the scan and the claim.
+                manifest.reload()
+                if done_in_batch(key):
+                    leases.release(lease)
+                    continue
+                running.add(asyncio.ensure_future(solve(problem_file, key, lease)))
+            if running:
+                # Rescan as soon as a slot frees up, or after the poll interval for
+                # problems released by other workers.
+                _, running = await asyncio.wait(running, timeout=options.poll_interval,
+                                                return_when=asyncio.FIRST_COMPLETED)
+                running = set(running)
+            elif leased_elsewhere:
+                # Wait for the other workers to finish, or for their leases to expire.
+                await asyncio.sleep(options.poll_interval)
+            else:
+                break
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        leases.stop_heartbeat()
+        # The async transport is bound to this event loop; close it before the loop ends.
+        await get_client_registry().aclose()
+        report_file = report.save()
+        logger.info(format_report(report.summary()))
+        logger.info(f"Worker report written to: {report_file}")
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Solve coding problems with the agent team.")
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Number of problems to process concurrently (default: 1, sequential)"
+    )
+    parser.add_argument(
+        "--test-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes used to run test suites (default: CPU count)"
+    )
+    parser.add_argument(
+        "--test-timeout",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Wall-clock and CPU-time limit for each sandboxed test run and benchmark "
+             "(default: 60); runs over it are reported as TIMEOUT"
+    )
+    parser.add_argument(
+        "--test-memory",
+        type=int,
+        default=1024,
+        metavar="MB",
+        help="Memory cap (RLIMIT_AS) for the generated code in each test run and "
+             "benchmark (default: 1024, 0 disables); runs over it are reported as OOM"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Process every problem, even those with an up-to-date PASSED solution"
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="List the unsolved problems and exit"
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Show each problem's latest status and solution directory and exit"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show which problems would be processed and exit"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and process problems as they are added to or changed in "
+             "problems/unsolved; stop gracefully on SIGTERM"
+    )
+    parser.add_argument(
+        "--worker",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="ID",
+        help="Run as one of several workers sharing problems/, claiming each problem "
+             "through a lease file (default ID: <hostname>-<pid>)"
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=60.0,
+        help="With --worker, seconds without a heartbeat before a lease expires and "
+             "its problem can be claimed by another worker"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="With --watch, seconds a file must stay unchanged before it is processed"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="With --watch or --worker, seconds between scans of problems/unsolved"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream test and code generation and stop at the first complete code block"
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Start the developer from the analysis alone while tests are written; "
+             "fall back to implementing against the tests if that code fails them"
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=None,
+        metavar="TOKENS",
+        help="Condense implementation prompts longer than this many tokens to the "
+             "signatures, contracts, constraints and unique test assertions"
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Sample N implementations in parallel, validate them all and keep the "
+             "fastest passing one, with peak memory as the tie-breaker (default: 1)"
+    )
+    parser.add_argument(
+        "--fast-model",
+        nargs="?",
+        const=DEFAULT_FAST_MODEL,
+        default=os.getenv("OPENAI_FAST_MODEL"),
+        metavar="MODEL",
+        help="Route the analysis, and the tests and code of simple problems, to this "
+             f"cheaper model (default: OPENAI_FAST_MODEL, or {DEFAULT_FAST_MODEL} if the "
+             "flag is given alone), escalating to OPENAI_MODEL when its output is invalid "
+             "or fails the tests"
+    )
+    parser.add_argument(
+        "--max-repairs",
+        type=int,
+        default=2,
+        help="Maximum repair attempts driven by failing test output (0 disables repair)"
+    )
+    parser.add_argument(
+        "--repair-token-budget",
+        type=int,
+        default=20000,
+        help="Maximum prompt plus completion tokens spent on repairs per problem"
+    )
+    parser.add_argument(
+        "--no-checkpoints",
+        action="store_true",
+        help="Do not resume from or save stage checkpoints in .cache/checkpoints/"
+    )
+    parser.add_argument(
+        "--no-benchmark",
+        action="store_true",
+        help="Skip benchmarking passing solutions against the analysis complexity bound"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Write Prometheus-format metrics to this file after each problem"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus-format metrics on http://127.0.0.1:PORT/metrics while running"
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Record tracing spans and write a Chrome/Perfetto trace JSON file "
+             "(default: traces/trace_<timestamp>.json)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        nargs="*",
+        choices=AGENT_NAMES,
+        default=None,
+        metavar="AGENT",
+        help="Bypass the LLM response cache for the given agents "
+             f"({', '.join(AGENT_NAMES)}), or for all agents if none are given"
+    )
+    args = parser.parse_args(argv)
+    if args.no_cache is None:
+        args.uncached = ()
+    else:
+        args.uncached = tuple(args.no_cache) or AGENT_NAMES
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.candidates < 1:
+        parser.error("--candidates must be at least 1")
+    if args.context_budget is not None and args.context_budget < 1:
+        parser.error("--context-budget must be at least 1")
+    if args.max_repairs < 0:
+        parser.error("--max-repairs must not be negative")
+    if args.test_workers is not None and args.test_workers < 1:
+        parser.error("--test-workers must be at least 1")
+    if args.test_timeout <= 0 or args.test_memory < 0:
+        parser.error("--test-timeout must be positive and --test-memory must not be negative")
+    if args.watch and args.worker is not None:
+        parser.error("--watch and --worker cannot be combined")
+    if args.lease_ttl <= 0:
+        parser.error("--lease-ttl must be positive")
+    if args.debounce < 0 or args.poll_interval <= 0:
+        parser.error("--debounce must not be negative and --poll-interval must be positive")
+    return args
+
+def find_problems():
+    """Return the unsolved problem files."""
+    return sorted(Path("problems/unsolved").glob("*.txt"))
+
+def pending_problems(problem_files, manifest, problem_keys, force=False):
+    """Return the problems that need processing.
+
+    With force that is all of them, otherwise those without an up-to-date
+    PASSED solution.
+    """
+    if force:
+        return list(problem_files)
+    return [
+        problem_file for problem_file in problem_files
+        if problem_keys[problem_file] is None
+        or manifest.needs_processing(problem_keys[problem_file])
+    ]
+
+def problem_status(manifest, problem_file, key):
+    """Return (status, solution_dir) for a problem from the manifest.
+
+    NEW means the problem was never solved and CHANGED that its text, model or
+    prompts changed since the last run.
+    """
+    entry = manifest.entries.get(key) if key is not None else None
+    if entry is not None:
+        return entry["status"], entry["solution_dir"]
+    if any(entry["problem_name"] == problem_file.stem for entry in manifest.entries.values()):
+        return "CHANGED", ""
+    return "NEW", ""
+
+def show_problems(args):
+    """Handle --list, --status and --dry-run without loading any pipeline stage."""
+    problem_files = find_problems()
+    if args.list:
+        for problem_file in problem_files:
+            print(problem_file.stem)
+        return
+    # Listings are read-only: a manifest seeded from old solutions is not written.
+    manifest = Manifest().load(PROMPT_VERSION, save=False)
+    problem_keys = {problem_file: hash_problem_file(problem_file) for problem_file in problem_files}
+    if args.status:
+        for problem_file in problem_files:
+            status, solution_dir = problem_status(manifest, problem_file, problem_keys[problem_file])
+            print(f"{problem_file.stem:<30}  {status:<7}  {solution_dir}")
+        return
+    pending = pending_problems(problem_files, manifest, problem_keys, args.force)
+    print(f"Would process {len(pending)} of {len(problem_files)} problems"
+          f"{f' with {args.jobs} jobs' if args.jobs > 1 else ''}:")
+    for problem_file in pending:
+        print(f"  {problem_file.stem}")
+
+def main(argv=None):
     """Main entry point for the script."""
+    args = parse_args(argv)
+    if args.list or args.status or args.dry_run:
+        show_problems(args)
+        return
+    configure_logging()
+    if args.trace is not None:
+        tracing.enable()
     try:
         # Validate environment and setup
         validate_environment()
         setup_directories()
         
         # Get all unsolved problems
-        unsolved_dir = Path("problems/unsolved")
-        problem_files = list(unsolved_dir.glob("*.txt"))
+        problem_files = find_problems()
         
-        if not problem_files:
+        if not problem_files and not args.watch:
             logger.info("No unsolved problems found.")
             return
         
+        # Skip problems whose text, model and prompts match a PASSED solution
+        manifest = Manifest().load(PROMPT_VERSION)
+        problem_keys = {problem_file: hash_problem_file(problem_file) for problem_file in problem_files}
+        pending = pending_problems(problem_files, manifest, problem_keys, args.force)
+        for problem_file in problem_files:
+            if problem_file not in pending:
+                logger.info(f"Skipping {problem_file.stem}: already solved (use --force to rerun)")
+        problem_files = pending
+        # Cached responses would replay the failure of a problem that did not pass.
+        refresh = {problem_file for problem_file in problem_files
+                   if problem_keys[problem_file] is not None
+                   and manifest.failed_before(problem_keys[problem_file])}
+        if not problem_files and not args.watch:
+            logger.info("All problems already have passing solutions.")
+            return
+        
+        from runner import SandboxLimits, get_test_runner
+
+        Catalog().load()
+        get_test_runner(args.test_workers, SandboxLimits(args.test_timeout,
+                                                         memory_mb=args.test_memory))
+        if args.metrics_port is not None:
+            metrics.serve(args.metrics_port)
+            logger.info(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+        
+        if args.worker is not None:
+            import asyncio
+
+            asyncio.run(run_worker(manifest, args))
+            return
+        
+        if args.watch:
+            import asyncio
+
+            asyncio.run(watch_problems(problem_files, manifest, args))
+            return
+        
+        if args.jobs > 1:
+            import asyncio
+
+            logger.info(f"Processing {len(problem_files)} problems with {args.jobs} jobs")
+            results = asyncio.run(process_problems_async(problem_files, args, refresh))
+            for problem_file, result in zip(problem_files, results):
+                if problem_keys[problem_file] is not None and not isinstance(result, Exception):
+                    record_solution(manifest, problem_keys[problem_file], problem_file, result)
+            return
+        
         # Process each problem
         for problem_file in problem_files:
             try:
-                process_problem(problem_file)
+                solution_file = process_problem(problem_file, args, problem_file in refresh)
+                if problem_keys[problem_file] is not None:
+                    record_solution(manifest, problem_keys[problem_file], problem_file, solution_file)
             except Exception as e:
                 logger.error(f"Failed to process {problem_file}: {str(e)}")
                 continue
@@ -236,6 +1206,16 @@ def main():
     except Exception as e:
         logger.error(f"Script failed: {str(e)}")
         raise
+    finally:
+        from runner import shutdown_test_runner
+
+        get_client_registry().close()
+        shutdown_test_runner()
+        if tracing.is_enabled():
+            trace_file = tracing.export(
+                args.trace or f"traces/trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            )
+            logger.info(f"Trace written to: {trace_file}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
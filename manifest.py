@@ -0,0 +1,145 @@
+"""
+This module tracks which problems already have an up-to-date solution.
+The manifest maps a hash of the problem text, model and prompt version to the
+latest solution directory and its status, so unchanged problems with a PASSED
+solution can be skipped on the next run. Problems whose latest run did not
+pass are run again with the response cache bypassed (see cache.refreshing),
+as replaying their cached responses would reproduce the same failure.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from blobstore import load_solution
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("problem_solver")
+
+MANIFEST_PATH = Path("problems/manifest.json")
+
+def problem_hash(description, model_name, prompt_version):
+    """Return the manifest key for a problem solved with a given model and prompts."""
+    payload = json.dumps([description.strip(), model_name, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Manifest:
+    """Persistent map of problem hash to latest solution directory and status."""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = {}
+
+    def load(self, prompt_version, save=True):
+        """Load the manifest, seeding it from existing solutions on first use.
+
+        Seeded entries are keyed with an unknown (None) model: solution.json
+        does not say which model produced a solution, so they never count as
+        solved for the configured one. With save=False a seeded manifest is
+        kept in memory only, so read-only commands never write
+        problems/manifest.json.
+        """
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = self._scan_solutions(prompt_version)
+            if self.entries and save:
+                logger.info(f"Seeded manifest from {len(self.entries)} existing solutions")
+                self.save()
+        return self
+
+    def _scan_solutions(self, prompt_version):
+        """Build entries from solution.json files written before the manifest existed."""
+        entries = {}
+        records = []
+        for solution_file in self.path.parent.glob("solved/*/solution.json"):
+            try:
+                data = load_solution(solution_file)
+                records.append((data["metadata"]["timestamp"], solution_file, data))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable solution {solution_file}: {str(e)}")
+        # Oldest first, so the latest run for each hash wins.
+        for timestamp, solution_file, data in sorted(records, key=lambda r: (r[0], str(r[1]))):
+            key = problem_hash(data["problem"]["description"], None, prompt_version)
+            entries[key] = {
+                "problem_name": data["metadata"]["problem_name"],
+                "solution_dir": solution_file.parent.as_posix(),
+                "status": data["metadata"]["status"],
+                "updated": timestamp
+            }
+        return entries
+
+    def _read_entries(self):
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def reload(self):
+        """Re-read entries written by other processes sharing the manifest."""
+        with self._lock:
+            self._read_entries()
+        return self
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the manifest across processes, where supported."""
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def needs_processing(self, key):
+        """Return True unless the problem already has a PASSED solution."""
+        entry = self.entries.get(key)
+        return entry is None or entry.get("status") != "PASSED"
+
+    def failed_before(self, key):
+        """Return True if the problem's latest run finished without passing."""
+        entry = self.entries.get(key)
+        return entry is not None and entry.get("status") != "PASSED"
+
+    def record(self, key, problem_name, solution_dir, status):
+        """Record the latest solution for a problem hash and persist the manifest.
+
+        Entries written by other processes since the last load are merged in,
+        so several workers can share one manifest.
+        """
+        with self._lock, self._file_lock():
+            self._read_entries()
+            self.entries[key] = {
+                "problem_name": problem_name,
+                "solution_dir": Path(solution_dir).as_posix(),
+                "status": status,
+                "updated": datetime.now().strftime("%Y%m%d_%H%M%S")
+            }
+            self.save()
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_name, self.path)
+        except Exception:
+            os.unlink(tmp_name)
+            raise
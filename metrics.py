@@ -0,0 +1,224 @@
+"""
+This module collects per-stage latency, token, retry, cost and I/O metrics.
+Stage statistics recorded by the agents and the orchestrator are aggregated
+into Prometheus-style counters and histograms, which can be written to a text
+file or served over HTTP, and summarized per problem in solution.json.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+
+# Approximate USD prices per 1K (prompt, completion) tokens. Override or extend
+# with LLM_PRICES='{"model": [prompt, completion]}'.
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4-turbo-preview": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015)
+}
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+def model_price(model_name):
+    """Return (prompt, completion) USD per 1K tokens for a model, or None if unknown."""
+    prices = dict(MODEL_PRICES)
+    prices.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+    return prices.get(model_name)
+
+def stage_cost(stats):
+    """Return the USD cost of one stage's tokens, or 0.0 for unknown models."""
+    price = model_price(stats.get("model"))
+    if price is None:
+        return 0.0
+    return (stats.get("prompt_tokens", 0) * price[0]
+            + stats.get("completion_tokens", 0) * price[1]) / 1000
+
+class _RequestCounter:
+    def __init__(self):
+        self.count = 0
+
+_request_counter = contextvars.ContextVar("request_counter", default=None)
+
+@contextlib.contextmanager
+def track_requests():
+    """Count HTTP requests made in this context; retries are count - 1."""
+    counter = _RequestCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+def count_request(request=None):
+    """httpx request hook that increments the active request counter."""
+    counter = _request_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+async def acount_request(request=None):
+    """Async httpx request hook; see count_request."""
+    count_request(request)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition model."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def inc(self, name, amount=1, help_text="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, help_text="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def record_stage(self, stage, stats):
+        """Aggregate one stage's statistics dict."""
+        if "total" in stats:
+            self.observe("pipeline_stage_duration_seconds", stats["total"],
+                         help_text="Wall time per pipeline stage", stage=stage)
+        for kind in ("prompt", "completion"):
+            tokens = stats.get(f"{kind}_tokens")
+            if tokens:
+                self.observe("pipeline_stage_tokens", tokens, TOKEN_BUCKETS,
+                             help_text="Tokens per LLM call", stage=stage, kind=kind)
+                self.inc("pipeline_tokens_total", tokens,
+                         help_text="Tokens used", stage=stage, kind=kind)
+        if stats.get("retries"):
+            self.inc("pipeline_retries_total", stats["retries"],
+                     help_text="LLM request retries", stage=stage)
+        if stats.get("rate_limited"):
+            self.inc("pipeline_rate_limited_total", stats["rate_limited"],
+                     help_text="LLM requests answered with 429", stage=stage)
+        if stats.get("throttled"):
+            self.inc("pipeline_throttled_seconds_total", stats["throttled"],
+                     help_text="Seconds LLM calls waited for the rate limiter", stage=stage)
+        if stats.get("context_original_tokens"):
+            self.observe("pipeline_context_ratio", stats["context_ratio"], RATIO_BUCKETS,
+                         help_text="Condensed over original implementation context tokens",
+                         stage=stage)
+            self.inc("pipeline_context_tokens_saved_total",
+                     stats["context_original_tokens"] - stats["context_tokens"],
+                     help_text="Prompt tokens removed by the context budget", stage=stage)
+        if stats.get("cost"):
+            self.inc("pipeline_cost_dollars_total", stats["cost"],
+                     help_text="Estimated LLM cost in USD", stage=stage)
+        if stats.get("cached"):
+            self.inc("pipeline_cache_hits_total", help_text="LLM responses served from cache",
+                     stage=stage)
+        if stats.get("bytes_written"):
+            self.inc("pipeline_bytes_written_total", stats["bytes_written"],
+                     help_text="Bytes written to problems/solved", stage=stage)
+
+    def record_problem(self, stages, status):
+        """Aggregate every stage of a finished problem."""
+        for stage, stats in stages.items():
+            self.record_stage(stage, stats)
+        self.inc("pipeline_problems_total", help_text="Problems processed", status=status)
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_labels(key + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically write the Prometheus text format to path."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics on a background thread and return the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+def _labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+def summarize(stages):
+    """Return the per-problem metrics summary stored in solution.json."""
+    keys = ("total", "prompt_tokens", "completion_tokens", "retries", "rate_limited",
+            "throttled", "cost", "bytes_written")
+    totals = {key: 0 for key in keys}
+    for stats in stages.values():
+        for key in keys:
+            totals[key] += stats.get(key, 0)
+    # Stage times can overlap (e.g. speculative mode), so this is not wall time.
+    totals["stage_time"] = totals.pop("total")
+    return totals
+
+metrics = MetricsRegistry()
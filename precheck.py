@@ -0,0 +1,272 @@
+"""
+This module statically checks a solution and its tests before pytest runs.
+Both files are compiled, the names the tests use are checked against what
+the test file binds, the builtins and what `from .solution import *` (or an
+explicit import from .solution) provides, and the tests pytest would collect
+are counted. Test functions nested inside other functions are never
+collected, so their checks would silently not run.
+
+Problems in solution.py (syntax errors, names the tests need that it does
+not define) are sent to the repair loop like failing tests; problems in the
+tests themselves (syntax errors, nothing collectable, uncollected nested
+tests, standard library modules used without an import) cannot be repaired
+by the developer, so the run is rejected. Either way pytest is skipped,
+which takes milliseconds instead of a worker run.
+"""
+
+import ast
+import builtins
+import sys
+import time
+
+# Names every module has without binding them.
+_MODULE_NAMES = {"__file__", "__name__", "__doc__", "__package__", "__spec__",
+                 "__loader__", "__builtins__", "__path__"}
+
+class _BoundNames(ast.NodeVisitor):
+    """Collects every name a module binds, in any scope."""
+
+    def __init__(self):
+        self.names = set()
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.names.add(node.id)
+
+    def visit_FunctionDef(self, node):
+        self.names.add(node.name)
+        for arg in ast.walk(node.args):
+            if isinstance(arg, ast.arg):
+                self.names.add(arg.arg)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        for arg in ast.walk(node.args):
+            if isinstance(arg, ast.arg):
+                self.names.add(arg.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.names.add((alias.asname or alias.name).split(".")[0])
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name != "*":
+                self.names.add(alias.asname or alias.name)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.names.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.names.add(node.name)
+
+    def visit_MatchMapping(self, node):
+        if node.rest:
+            self.names.add(node.rest)
+        self.generic_visit(node)
+
+def bound_names(tree):
+    """Return every name bound anywhere in a parsed module."""
+    visitor = _BoundNames()
+    visitor.visit(tree)
+    return visitor.names
+
+def _top_level_statements(body):
+    """Yield module-level statements, looking inside if/try/with blocks but not defs."""
+    for node in body:
+        yield node
+        for field in ("body", "orelse", "finalbody"):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                yield from _top_level_statements(getattr(node, field, None) or [])
+        for handler in getattr(node, "handlers", None) or []:
+            yield from _top_level_statements(handler.body)
+
+def module_exports(tree):
+    """Return the names `from module import *` provides, or None if they cannot be known.
+
+    That is __all__ when it is a literal list or tuple, else every public
+    module-level name. A star import inside the module makes them unknowable.
+    """
+    names = set()
+    for node in _top_level_statements(tree.body):
+        if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            return None
+        if (isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets)):
+            try:
+                return set(ast.literal_eval(node.value))
+            except ValueError:
+                return None
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        else:
+            targets = (node.targets if isinstance(node, ast.Assign)
+                       else [node.target] if isinstance(node, (ast.AnnAssign, ast.AugAssign))
+                       else [])
+            for target in targets:
+                names.update(name.id for name in ast.walk(target) if isinstance(name, ast.Name))
+    return {name for name in names if not name.startswith("_")}
+
+def collectable_tests(tree):
+    """Return (tests pytest would collect, test functions nested in functions it never runs).
+
+    pytest collects module-level test* functions and test* methods of Test*
+    classes without an __init__.
+    """
+    collected = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            collected.append(node.name)
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            methods = [item for item in node.body
+                       if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if not any(method.name == "__init__" for method in methods):
+                collected.extend(f"{node.name}::{method.name}" for method in methods
+                                 if method.name.startswith("test"))
+    nested = []
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        called = {node.func.id for node in ast.walk(function)
+                  if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)}
+        for node in ast.iter_child_nodes(function):
+            if (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+                    and node.name.startswith("test") and node.name not in called):
+                nested.append(f"{function.name}.{node.name}")
+    return collected, nested
+
+def _parse(source, filename, problems):
+    try:
+        tree = ast.parse(source, filename)
+        compile(tree, filename, "exec")
+        return tree
+    except SyntaxError as e:
+        problems.append({"file": filename, "kind": "syntax", "line": e.lineno,
+                         "message": f"SyntaxError: {e.msg} (line {e.lineno})"})
+    except ValueError as e:
+        problems.append({"file": filename, "kind": "syntax", "line": None,
+                         "message": f"ValueError: {e}"})
+    return None
+
+def static_check(code_file, test_file):
+    """Check a solution and its test file without running them.
+
+    Returns a report with the verdict (OK, REPAIR or REJECT), the problems
+    found, the collectable tests and the uncollected nested tests.
+    """
+    start = time.perf_counter()
+    problems = []
+    with open(code_file, 'r', encoding='utf-8') as f:
+        code_tree = _parse(f.read(), "solution.py", problems)
+    with open(test_file, 'r', encoding='utf-8') as f:
+        test_tree = _parse(f.read(), "test_solution.py", problems)
+
+    collected, nested = [], []
+    if test_tree is not None:
+        collected, nested = collectable_tests(test_tree)
+        if not collected:
+            problems.append({"file": "test_solution.py", "kind": "no_tests", "line": None,
+                             "message": "pytest would collect no tests"})
+        if nested:
+            problems.append({"file": "test_solution.py", "kind": "nested_tests", "line": None,
+                             "message": "test functions nested in other functions are never "
+                                        f"collected or called: {', '.join(nested)}"})
+    if test_tree is not None and code_tree is not None:
+        exports = module_exports(code_tree)
+        defined = bound_names(code_tree)
+        imported = set()
+        star = False
+        for node in ast.walk(test_tree):
+            if isinstance(node, ast.ImportFrom) and node.level == 1 and node.module == "solution":
+                for alias in node.names:
+                    if alias.name == "*":
+                        star = True
+                    elif alias.name not in defined:
+                        problems.append({
+                            "file": "solution.py", "kind": "missing_name", "line": node.lineno,
+                            "message": f"the tests import {alias.name!r}, which solution.py "
+                                       "does not define"
+                        })
+                    else:
+                        imported.add(alias.asname or alias.name)
+        if not star or exports is not None:
+            known = bound_names(test_tree) | imported | _MODULE_NAMES | (exports if star else set())
+            missing = []
+            for node in ast.walk(test_tree):
+                if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+                        and node.id not in known and not hasattr(builtins, node.id)
+                        and node.id not in missing):
+                    missing.append(node.id)
+            # A standard library module used without an import is the tests' own mistake.
+            unimported = [name for name in missing if name in sys.stdlib_module_names]
+            missing = [name for name in missing if name not in unimported]
+            if unimported:
+                problems.append({
+                    "file": "test_solution.py", "kind": "missing_import", "line": None,
+                    "message": f"the tests use {', '.join(unimported)} without importing it"
+                })
+            if missing:
+                problems.append({
+                    "file": "solution.py", "kind": "missing_name", "line": None,
+                    "message": f"the tests use {', '.join(missing)}, which solution.py "
+                               "does not define (or does not export)"
+                })
+
+    if any(problem["file"] == "test_solution.py" for problem in problems):
+        verdict = "REJECT"
+    elif problems:
+        verdict = "REPAIR"
+    else:
+        verdict = "OK"
+    return {
+        "verdict": verdict,
+        "problems": problems,
+        "collectable_tests": len(collected),
+        "nested_tests": nested,
+        "duration": time.perf_counter() - start
+    }
+
+def check_results(report):
+    """Return test results for a report that failed, in the shape run_tests returns.
+
+    Rejected tests get status REJECTED; solution problems are FAILED so the
+    repair loop sees them as failing tests.
+    """
+    return {
+        "success": False,
+        "status": "REJECTED" if report["verdict"] == "REJECT" else "FAILED",
+        "output": "Static check failed:\n" + "\n".join(
+            f"{problem['file']}: {problem['message']}" for problem in report["problems"]
+        ),
+        "tests": [{
+            "name": f"static check: {problem['file']} {problem['kind']}",
+            "outcome": "error",
+            # Nothing ran, so the checks are left out of the slowest tests.
+            "duration": None,
+            "setup": 0.0,
+            "teardown": 0.0,
+            "message": problem["message"]
+        } for problem in report["problems"]]
+    }
@@ -0,0 +1,342 @@
+"""
+This module keeps LLM calls within provider rate limits.
+Every call passes through two token buckets, one for requests per minute and
+one for tokens per minute, where a call's tokens are estimated from its prompt
+size plus its completion limit and settled against the reported usage
+afterwards. The number of calls in flight is adjusted with AIMD: it grows by
+one per window of successful calls and is cut when the provider answers 429
+or latency climbs far above its running average. Rate-limited and transient
+failures are retried with exponential backoff and full jitter, waiting at
+least as long as the server's Retry-After.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("problem_solver")
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 20
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 60.0
+DEFAULT_LATENCY_FACTOR = 3.0
+
+# Exception classes (matched by name, so openai and httpx stay unimported)
+# that mean the request never produced an answer and is safe to repeat.
+_TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "TransportError",
+                     "TimeoutException", "TimeoutError", "ConnectionError"}
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_rate_limited(error):
+    """Return True if error is the provider's 429 answer."""
+    return _status_code(error) == 429 or any(
+        cls.__name__ == "RateLimitError" for cls in type(error).__mro__
+    )
+
+def is_retryable(error):
+    """Return True for rate limits, server errors, timeouts and dropped connections."""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+def retry_after(error):
+    """Return the delay in seconds the server asked for, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            # HTTP dates are allowed too; fall back to our own backoff.
+            return None
+    return None
+
+class TokenBucket:
+    """Refills at `per_minute` units a minute and holds at most a minute's worth.
+
+    Callers reserve units up front and may drive the level negative; the
+    returned delay is how long they must wait for the debt to refill, so
+    waiters are served in the order they reserved.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount, now):
+        """Take amount units and return the seconds to wait before using them."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount, now):
+        """Return unused units (positive) or charge extra ones (negative)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+class AIMDConcurrency:
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Each success while the limit is in use adds 1/limit, so the limit grows by
+    one per full window of `limit` calls. A 429 halves it and a call slower than `latency_factor` times the
+    running average cuts it by a quarter. Only calls started after the last
+    cut can cut it again, so one burst of 429s counts as a single signal.
+    """
+
+    def __init__(self, initial=DEFAULT_CONCURRENCY, minimum=1,
+                 maximum=DEFAULT_MAX_CONCURRENCY, latency_factor=DEFAULT_LATENCY_FACTOR):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.latency = None
+        self._samples = 0
+        self._last_decrease = 0.0
+
+    def available(self):
+        return self.in_flight < int(self.limit)
+
+    def _decrease(self, factor, started):
+        if started < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        previous = self.limit
+        self.limit = max(self.minimum, self.limit * factor)
+        logger.debug(f"Concurrency limit {previous:.1f} -> {self.limit:.1f}")
+
+    def on_success(self, started, latency):
+        slow = (self._samples >= 5 and self.latency is not None
+                and latency > self.latency_factor * self.latency)
+        if slow:
+            self._decrease(0.75, started)
+        elif self.in_flight + 1 >= int(self.limit):
+            # Only grow a limit that is actually being used; otherwise a quiet
+            # period would inflate it far past what the provider accepts.
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+        # Slow outliers are kept out of the average they are judged against.
+        if not slow:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self._samples += 1
+
+    def on_rate_limited(self, started):
+        self._decrease(0.5, started)
+
+class RateLimiter:
+    """Shared admission control, adaptive concurrency and retries for LLM calls.
+
+    Safe to use from threads and from event loops at the same time: sync
+    callers block, async callers sleep without blocking their loop.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None,
+                 concurrency=DEFAULT_CONCURRENCY, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_cap=DEFAULT_BACKOFF_CAP, latency_factor=DEFAULT_LATENCY_FACTOR):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AIMDConcurrency(concurrency, 1, max_concurrency, latency_factor)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._waiters = deque()
+
+    def backoff(self, attempt, server_delay=None):
+        """Return the delay before retry number attempt (0-based)."""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if server_delay is not None:
+            # Spread the retries of callers that were all told the same delay.
+            delay = server_delay + random.uniform(0, self.backoff_base)
+        return delay
+
+    def _reserve(self, tokens):
+        """Reserve one request and `tokens` tokens; return the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            delay = max(0.0, self._paused_until - now)
+            if self.requests:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+        return delay
+
+    def _try_acquire(self, wake):
+        with self._lock:
+            if self.concurrency.available():
+                self.concurrency.in_flight += 1
+                return True
+            self._waiters.append(wake)
+            return False
+
+    def _release(self, started, error=None):
+        latency = time.monotonic() - started
+        with self._lock:
+            self.concurrency.in_flight -= 1
+            if error is None:
+                self.concurrency.on_success(started, latency)
+            elif is_rate_limited(error):
+                self.rate_limited += 1
+                self.concurrency.on_rate_limited(started)
+                delay = retry_after(error)
+                if delay:
+                    # Hold back every caller, not just the one that was told.
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for wake in waiters:
+            wake()
+
+    def settle(self, reserved, used):
+        """Correct the token bucket once a call's real token usage is known."""
+        if self.tokens and used:
+            with self._lock:
+                self.tokens.adjust(reserved - used, time.monotonic())
+
+    def _retry_delay(self, error, attempt, max_retries):
+        """Return the delay before retrying after error, or None to give up."""
+        if attempt >= max_retries or not is_retryable(error):
+            return None
+        return self.backoff(attempt, retry_after(error) if is_rate_limited(error) else None)
+
+    @staticmethod
+    def _note(stats, waited, rate_limited):
+        if stats is None:
+            return
+        if waited > 0.001:
+            stats["throttled"] = stats.get("throttled", 0.0) + waited
+        if rate_limited:
+            stats["rate_limited"] = stats.get("rate_limited", 0) + 1
+
+    def call(self, func, tokens=0, stats=None, max_retries=None):
+        """Run func() under the limits, retrying transient failures.
+
+        Time spent waiting for admission is added to stats["throttled"] and
+        429 answers are counted in stats["rate_limited"].
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            waited = time.monotonic()
+            time.sleep(self._reserve(tokens))
+            while True:
+                event = threading.Event()
+                if self._try_acquire(event.set):
+                    break
+                # The timeout also covers a limit that grows without a release.
+                event.wait(1.0)
+            started = time.monotonic()
+            self._note(stats, started - waited, False)
+            try:
+                result = func()
+            except Exception as e:
+                self._release(started, e)
+                self._note(stats, 0.0, is_rate_limited(e))
+                delay = self._retry_delay(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                logger.warning(f"LLM call failed ({type(e).__name__}); "
+                               f"retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException as e:
+                self._release(started, e)
+                raise
+            self._release(started)
+            return result
+
+    async def acall(self, func, tokens=0, stats=None, max_retries=None):
+        """Async variant of call; func is a coroutine function."""
+        import asyncio
+
+        max_retries = self.max_retries if max_retries is None else max_retries
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            waited = time.monotonic()
+            await asyncio.sleep(self._reserve(tokens))
+            while True:
+                future = loop.create_future()
+
+                def wake(future=future):
+                    loop.call_soon_threadsafe(
+                        lambda: future.done() or future.set_result(None)
+                    )
+
+                if self._try_acquire(wake):
+                    break
+                try:
+                    await asyncio.wait_for(future, 1.0)
+                except asyncio.TimeoutError:
+                    pass
+            started = time.monotonic()
+            self._note(stats, started - waited, False)
+            try:
+                result = await func()
+            except asyncio.CancelledError as e:
+                self._release(started, e)
+                raise
+            except Exception as e:
+                self._release(started, e)
+                self._note(stats, 0.0, is_rate_limited(e))
+                delay = self._retry_delay(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                logger.warning(f"LLM call failed ({type(e).__name__}); "
+                               f"retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._release(started)
+            return result
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _env_number(name, cast, default):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+def get_rate_limiter(model_name):
+    """Return the process-wide rate limiter for a model.
+
+    Provider limits apply per model, so each model gets its own buckets and
+    concurrency limit. Configured through LLM_RPM and LLM_TPM (unset means
+    unlimited), LLM_CONCURRENCY (starting limit), LLM_MAX_CONCURRENCY,
+    LLM_BACKOFF_BASE, LLM_BACKOFF_CAP and LLM_LATENCY_FACTOR.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limiter = _limiters[model_name] = RateLimiter(
+                requests_per_minute=_env_number("LLM_RPM", float, None),
+                tokens_per_minute=_env_number("LLM_TPM", float, None),
+                concurrency=_env_number("LLM_CONCURRENCY", int, DEFAULT_CONCURRENCY),
+                max_concurrency=_env_number("LLM_MAX_CONCURRENCY", int, DEFAULT_MAX_CONCURRENCY),
+                backoff_base=_env_number("LLM_BACKOFF_BASE", float, DEFAULT_BACKOFF_BASE),
+                backoff_cap=_env_number("LLM_BACKOFF_CAP", float, DEFAULT_BACKOFF_CAP),
+                latency_factor=_env_number("LLM_LATENCY_FACTOR", float, DEFAULT_LATENCY_FACTOR)
+            )
+        return limiter
@@ -0,0 +1,139 @@
+"""
+This module implements the bounded repair loop that runs after a failed test run.
+Instead of rerunning the whole agent chain, the developer is shown only the
+failing test names, their assertion messages and the current code, within
+configurable limits on iterations and tokens.
+"""
+
+import logging
+import re
+import time
+
+from context import estimate_tokens
+import tracing
+
+logger = logging.getLogger("problem_solver")
+
+_RESULT_LINE = re.compile(r'::(\S+) (FAILED|ERROR)')
+_SECTION_HEADER = re.compile(r'^_{3,} (.+?) _{3,}$')
+
+def parse_failures(test_output):
+    """Extract failing test names and their `E` assertion lines from pytest output."""
+    messages = {}
+    current = None
+    for line in test_output.splitlines():
+        header = _SECTION_HEADER.match(line)
+        if header:
+            current = header.group(1)
+            messages.setdefault(current, [])
+        elif current is not None and line.startswith("E "):
+            messages[current].append(line[1:].strip())
+    failures = []
+    seen = set()
+    for name, _ in _RESULT_LINE.findall(test_output):
+        if name not in seen:
+            seen.add(name)
+            failures.append({"test": name, "message": "\n".join(messages.get(name, []))})
+    # Collection errors have a section but no per-test result line.
+    for name, lines in messages.items():
+        if name not in seen and (name.startswith("ERROR collecting") or not failures):
+            failures.append({"test": name, "message": "\n".join(lines)})
+    return failures
+
+def test_failures(test_results):
+    """Return the failing tests and their messages, preferring the structured results.
+
+    Falls back to parsing the pytest output for results without per-test data.
+    """
+    failures = [
+        {"test": test["name"], "message": test["message"] or ""}
+        for test in test_results.get("tests", [])
+        if test["outcome"] not in ("passed", "skipped")
+    ]
+    return failures or parse_failures(test_results["output"])
+
+class RepairLoop:
+    """Repairs failing code with the developer agent until tests pass or a limit is hit."""
+
+    def __init__(self, developer, max_iterations=2, max_tokens=20000):
+        self.developer = developer
+        self.max_iterations = max_iterations
+        self.max_tokens = max_tokens
+        self.tokens_used = 0
+        self.attempts = []
+        self.outcome = "NOT_NEEDED"
+        # Aggregated across attempts, in the same shape as the agent stage stats.
+        self.stats = {}
+
+    def run(self, code, test_results, retest):
+        """Repair code until it passes; retest(code) saves it and returns new test results.
+
+        An attempt whose LLM call fails counts as a failed attempt (outcome
+        ERROR if it was the last). Returns the final code and its test results.
+        """
+        self.outcome = "FAILED"
+        for iteration in range(1, self.max_iterations + 1):
+            failures = test_failures(test_results) or [
+                {"test": "test session", "message": test_results["output"][-2000:]}
+            ]
+            estimate = estimate_tokens(self.developer.system_prompt) + estimate_tokens(code) + sum(
+                estimate_tokens(failure["test"] + failure["message"]) for failure in failures
+            )
+            if self.tokens_used + estimate > self.max_tokens:
+                logger.info(f"Repair stopped: token budget of {self.max_tokens} would be exceeded")
+                self.outcome = "TOKEN_BUDGET_EXHAUSTED"
+                break
+
+            logger.info(f"Repair attempt {iteration}/{self.max_iterations} "
+                        f"for {len(failures)} failing tests...")
+            stats = {}
+            error = None
+            start = time.perf_counter()
+            with tracing.span("repair_attempt", iteration=iteration):
+                try:
+                    new_code = self.developer.repair_solution(code, failures, stats)
+                except Exception as e:
+                    # A failed call is a failed attempt; the code already tested is kept.
+                    logger.error(f"Repair attempt {iteration} failed: {str(e)}")
+                    error = str(e)
+            stats.setdefault("total", time.perf_counter() - start)
+            self.tokens_used += stats.get("prompt_tokens", 0) + stats.get("completion_tokens", 0)
+            for key in ("total", "generation", "prompt_tokens", "completion_tokens", "retries",
+                        "rate_limited", "throttled", "cost"):
+                self.stats[key] = self.stats.get(key, 0) + stats.get(key, 0)
+            attempt = {
+                "iteration": iteration,
+                "failing_tests": [failure["test"] for failure in failures],
+                "prompt_tokens": stats.get("prompt_tokens", 0),
+                "completion_tokens": stats.get("completion_tokens", 0),
+                "duration": stats["total"]
+            }
+            self.attempts.append(attempt)
+            if error is not None:
+                attempt["success"] = False
+                attempt["error"] = error
+                self.outcome = "ERROR"
+                continue
+            if new_code == code:
+                attempt["success"] = False
+                self.outcome = "NO_CHANGE"
+                break
+
+            code = new_code
+            test_results = retest(code)
+            attempt["success"] = test_results["success"]
+            if test_results["success"]:
+                self.outcome = "PASSED"
+                break
+            self.outcome = "FAILED"
+        return code, test_results
+
+    def summary(self):
+        """Return the repair record stored in solution.json."""
+        return {
+            "outcome": self.outcome,
+            "max_iterations": self.max_iterations,
+            "max_tokens": self.max_tokens,
+            "tokens_used": self.tokens_used,
+            "attempts": self.attempts
+        }
@@ -0,0 +1,287 @@
+"""
+This module routes each pipeline stage to a fast, cheap model or the strong
+model. The research analyst always starts on the fast model
+(OPENAI_FAST_MODEL or --fast-model), and so do the test engineer and the
+developer when the problem is classified as simple; complex problems give
+those stages the strong model (OPENAI_MODEL). Fast output is escalated to the
+strong model only when it is not valid Python or when the solution fails its
+tests, before the repair loop runs. A stage pinned with <AGENT>_MODEL uses
+that model on both tiers and is never escalated.
+
+Each problem's routing record in solution.json lists the model of every
+stage and its escalations, and estimates the cost and latency saved against
+running every stage on the strong model: the fast stages' tokens are priced
+at the strong model's rates and timed at its observed seconds per completion
+token, and the escalations' own cost and time are subtracted.
+
+Usage:
+    python routing.py report [--solved problems/solved]
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+from pathlib import Path
+
+from metrics import metrics, stage_cost
+import tracing
+
+logger = logging.getLogger("problem_solver")
+
+DEFAULT_FAST_MODEL = "gpt-4o-mini"
+
+# Descriptions longer than this, or naming any of these techniques, are complex.
+SIMPLE_MAX_WORDS = 150
+COMPLEX_HINTS = (
+    "dynamic programming", "graph", "tree", "trie", "heap", "priority queue",
+    "shortest path", "backtrack", "permutation", "combination", "interval", "matrix",
+    "grid", "concurren", "thread", "parse", "parser", "regular expression", "design",
+    "optimal", "minimum number", "maximum number", "o(log", "o(n log"
+)
+
+# The agent that produces each routed stage.
+STAGE_AGENTS = {
+    "analysis": "research_analyst",
+    "tests": "test_engineer",
+    "speculative_implementation": "python_developer",
+    "implementation": "python_developer"
+}
+
+def classify_problem(description):
+    """Return ("simple" or "complex", reason) for a problem description."""
+    words = len(description.split())
+    text = description.lower()
+    hints = [hint for hint in COMPLEX_HINTS if re.search(r'\b' + re.escape(hint), text)]
+    if hints:
+        return "complex", f"mentions {', '.join(hints[:3])}"
+    if words > SIMPLE_MAX_WORDS:
+        return "complex", f"{words} words"
+    return "simple", f"{words} words"
+
+def is_valid_python(source):
+    """Return True if source compiles as a Python module."""
+    try:
+        compile(source, "<generated>", "exec")
+        return True
+    except (SyntaxError, ValueError):
+        return False
+
+class _ModelSpeeds:
+    """Generation seconds per completion token observed for each model in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def observe(self, stats):
+        if not stats.get("generation") or not stats.get("completion_tokens"):
+            return
+        with self._lock:
+            seconds, tokens = self._totals.get(stats["model"], (0.0, 0))
+            self._totals[stats["model"]] = (seconds + stats["generation"],
+                                            tokens + stats["completion_tokens"])
+
+    def per_token(self, model):
+        with self._lock:
+            seconds, tokens = self._totals.get(model, (0.0, 0))
+        return seconds / tokens if tokens else None
+
+_speeds = _ModelSpeeds()
+
+class ModelRouter:
+    """Chooses the model of each stage of one problem and escalates failed fast output.
+
+    `agents_for(model_name)` returns the shared agents for a model, and
+    `stages` is the problem's stage statistics dict; escalated calls are
+    recorded in it as escalated_tests and escalated_implementation.
+    """
+
+    def __init__(self, description, fast_model, strong_model, agents_for, stages):
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.difficulty, self.reason = classify_problem(description)
+        self._agents_for = agents_for
+        self.stages = stages
+        self.escalations = []
+        fast = agents_for(fast_model)
+        tier = fast if self.difficulty == "simple" else self.strong_agents()
+        self.agents = {
+            'research_analyst': fast['research_analyst'],
+            'test_engineer': tier['test_engineer'],
+            'python_developer': tier['python_developer']
+        }
+        logger.info(f"Routing: {self.difficulty} problem ({self.reason}); tests and code on "
+                    f"{self.agents['python_developer'].model_name}")
+
+    def strong_agents(self):
+        """Return the agents on the strong model, used for escalations and repairs."""
+        return self._agents_for(self.strong_model)
+
+    def _can_escalate(self, agent_name):
+        return self.agents[agent_name].model_name != self.strong_agents()[agent_name].model_name
+
+    def _escalate(self, stage, reason):
+        agent_name = STAGE_AGENTS[stage]
+        self.escalations.append({
+            "stage": stage,
+            "reason": reason,
+            "from": self.agents[agent_name].model_name,
+            "to": self.strong_agents()[agent_name].model_name
+        })
+        metrics.inc("pipeline_escalations_total", help_text="Stages escalated to the strong model",
+                    stage=stage, reason=reason)
+        logger.info(f"Escalating {stage} to {self.strong_model}: {reason}")
+        return self.stages.setdefault(f"escalated_{stage}", {})
+
+    def _failed(self, stage, error):
+        """Record a failed escalation call; the caller keeps the fast output."""
+        self.escalations[-1]["error"] = str(error)
+        logger.error(f"Escalating {stage} failed, keeping the fast output: {str(error)}")
+
+    def check_outputs(self, analysis, tests, code):
+        """Regenerate fast tests or code that is not valid Python; return (tests, code)."""
+        strong = self.strong_agents()
+        if not is_valid_python(tests) and self._can_escalate('test_engineer'):
+            with tracing.span("escalate", stage="tests"):
+                try:
+                    tests = strong['test_engineer'].create_tests(
+                        analysis, self._escalate("tests", "invalid_tests")
+                    )
+                except Exception as e:
+                    self._failed("tests", e)
+        if not is_valid_python(code) and self._can_escalate('python_developer'):
+            with tracing.span("escalate", stage="implementation"):
+                try:
+                    code = strong['python_developer'].implement_solution(
+                        analysis, tests, self._escalate("implementation", "invalid_code")
+                    )
+                except Exception as e:
+                    self._failed("implementation", e)
+        return tests, code
+
+    async def acheck_outputs(self, analysis, tests, code):
+        """Async variant of check_outputs."""
+        strong = self.strong_agents()
+        if not is_valid_python(tests) and self._can_escalate('test_engineer'):
+            with tracing.span("escalate", stage="tests"):
+                try:
+                    tests = await strong['test_engineer'].acreate_tests(
+                        analysis, self._escalate("tests", "invalid_tests")
+                    )
+                except Exception as e:
+                    self._failed("tests", e)
+        if not is_valid_python(code) and self._can_escalate('python_developer'):
+            with tracing.span("escalate", stage="implementation"):
+                try:
+                    code = await strong['python_developer'].aimplement_solution(
+                        analysis, tests, self._escalate("implementation", "invalid_code")
+                    )
+                except Exception as e:
+                    self._failed("implementation", e)
+        return tests, code
+
+    def run(self, analysis, tests, code, test_results, retest):
+        """Reimplement failing fast code on the strong model once.
+
+        retest(code) saves the code and returns new test results. Returns the
+        final code and its test results; if the strong model's call fails,
+        the code already tested and its results are returned unchanged.
+        """
+        if test_results["success"] or not self._can_escalate('python_developer') or any(
+            escalation["stage"] == "implementation" for escalation in self.escalations
+        ):
+            return code, test_results
+        with tracing.span("escalate", stage="implementation"):
+            try:
+                new_code = self.strong_agents()['python_developer'].implement_solution(
+                    analysis, tests, self._escalate("implementation", "tests_failed")
+                )
+            except Exception as e:
+                self._failed("implementation", e)
+                return code, test_results
+        return new_code, retest(new_code)
+
+    def summary(self):
+        """Return the routing record stored in solution.json."""
+        models = {}
+        cost_saved = 0.0
+        latency_saved = 0.0
+        for stats in self.stages.values():
+            if "model" in stats:
+                _speeds.observe(stats)
+        for stage, agent_name in STAGE_AGENTS.items():
+            stats = self.stages.get(stage)
+            if not stats or "model" not in stats:
+                continue
+            models[stage] = stats["model"]
+            tier = "strong" if stats["model"] == self.strong_agents()[agent_name].model_name else "fast"
+            metrics.inc("pipeline_routed_stages_total", help_text="LLM stages per model tier",
+                        stage=stage, tier=tier)
+            if tier == "fast" and not stats.get("cached") and not stats.get("resumed"):
+                strong_stats = dict(stats, model=self.strong_agents()[agent_name].model_name)
+                cost_saved += stage_cost(strong_stats) - stats.get("cost", 0.0)
+                per_token = _speeds.per_token(strong_stats["model"])
+                if per_token is None or latency_saved is None:
+                    latency_saved = None
+                else:
+                    latency_saved += per_token * stats["completion_tokens"] - stats["generation"]
+        for escalation in self.escalations:
+            stats = self.stages.get(f"escalated_{escalation['stage']}", {})
+            cost_saved -= stats.get("cost", 0.0)
+            if latency_saved is not None:
+                latency_saved -= stats.get("total", 0.0)
+        return {
+            "difficulty": self.difficulty,
+            "reason": self.reason,
+            "fast_model": self.fast_model,
+            "strong_model": self.strong_model,
+            "models": models,
+            "escalated": bool(self.escalations),
+            "escalations": self.escalations,
+            "cost_saved": cost_saved,
+            "latency_saved": latency_saved
+        }
+
+def main(argv=None):
+    """Command-line interface for routing reports."""
+    parser = argparse.ArgumentParser(description="Inspect model routing")
+    parser.add_argument("--solved", default="problems/solved", help="Solved problems directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Show escalation rates and estimated savings")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        records = []
+        for solution_file in sorted(Path(args.solved).glob("*/solution.json")):
+            with open(solution_file, 'r', encoding='utf-8') as f:
+                routing = json.load(f).get("routing")
+            if routing:
+                records.append(routing)
+        if not records:
+            print(f"No routed solutions in {args.solved}")
+            return 0
+        for difficulty in ("simple", "complex"):
+            group = [record for record in records if record["difficulty"] == difficulty]
+            if group:
+                escalated = sum(1 for record in group if record["escalated"])
+                print(f"{difficulty:<8} {len(group):>5} runs  {escalated:>5} escalated "
+                      f"({escalated / len(group):.0%})")
+        reasons = {}
+        for record in records:
+            for escalation in record["escalations"]:
+                key = f"{escalation['stage']}: {escalation['reason']}"
+                reasons[key] = reasons.get(key, 0) + 1
+        for key, count in sorted(reasons.items()):
+            print(f"    {key:<32} {count:>5}")
+        latencies = [record["latency_saved"] for record in records
+                     if record["latency_saved"] is not None]
+        print(f"cost saved    ${sum(record['cost_saved'] for record in records):.4f}")
+        print(f"latency saved {sum(latencies):.1f}s over {len(latencies)} runs with a "
+              "measured strong-model speed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,547 @@
+"""
+This module runs generated test suites and benchmarks in a pool of warm worker processes.
+Each test file runs in a worker rather than in the orchestrator, so several
+validations can run at once across cores without sharing sys.stdout or
+sys.modules with the pipeline.
+
+Generated code is untrusted, so on POSIX each run is sandboxed further: the
+worker forks a child (inheriting the warm pytest import) under a CPU-time
+limit, an RLIMIT_AS memory cap and an RLIMIT_FSIZE file-size cap, and kills
+its process group at the wall-clock limit. Runs that hit a limit report
+status TIMEOUT or OOM instead of FAILED, and captured output is capped, so
+one runaway solution cannot stall or exhaust the batch.
+
+Test results are structured: a pytest plugin records each test's outcome,
+call duration, setup and teardown time and failure message. In a sandboxed
+run each finished test is sent to the worker as it completes, so a run that
+times out still reports the tests that finished and names the one that hung.
+
+Usage:
+    python runner.py slowest [--solved problems/solved] [--top 10]
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import math
+import os
+import pickle
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from pathlib import Path
+
+from benchmark import measure_peak_memory, run_benchmark
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MEMORY_MB = 1024
+# Captured pytest output kept per run, and the largest file a run may write.
+MAX_OUTPUT_BYTES = 64 * 1024
+MAX_FILE_BYTES = 64 * 1024 * 1024
+# Failure messages kept per test, and tests listed as the slowest of a run.
+MAX_MESSAGE_CHARS = 2000
+SLOWEST_TESTS = 5
+
+# In a sandboxed child, sends an event to the worker as soon as it happens.
+_emit = None
+
+class SandboxLimits:
+    """Limits applied to each sandboxed test run or benchmark.
+
+    timeout is wall-clock seconds, cpu_time CPU seconds (default: timeout)
+    and memory_mb the address space granted on top of the worker's own; 0
+    disables the memory cap.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, cpu_time=None, memory_mb=DEFAULT_MEMORY_MB,
+                 max_output=MAX_OUTPUT_BYTES, max_file=MAX_FILE_BYTES):
+        self.timeout = timeout
+        self.cpu_time = cpu_time or timeout
+        self.memory_mb = memory_mb
+        self.max_output = max_output
+        self.max_file = max_file
+
+# A child killed by SIGKILL is reported as OOM only if its resident memory
+# grew by at least this fraction of the memory cap.
+OOM_RSS_FRACTION = 0.9
+
+def _memory_status(field):
+    """Return a /proc/self/status memory field (e.g. VmSize) in bytes, or 0 if unknown."""
+    try:
+        with open("/proc/self/status", 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+def _address_space():
+    """Return this process's virtual memory size in bytes, or 0 if unknown."""
+    return _memory_status("VmSize")
+
+def _peak_rss(rusage):
+    """Return a reaped child's peak resident set size in bytes."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+
+def _killed_status(limits, rusage, baseline_rss):
+    """Classify a child killed by SIGKILL from its resource usage; return (status, message).
+
+    The kernel sends SIGKILL at the hard RLIMIT_CPU limit as well as when
+    memory runs out, so only a child that used its CPU time is a TIMEOUT and
+    only one whose resident memory grew close to the cap is OOM.
+    """
+    cpu_time = rusage.ru_utime + rusage.ru_stime
+    if cpu_time >= limits.cpu_time:
+        return "TIMEOUT", f"exceeded the {limits.cpu_time:g}s CPU-time limit"
+    grown = _peak_rss(rusage) - baseline_rss
+    if limits.memory_mb and grown >= OOM_RSS_FRACTION * limits.memory_mb * 1024 * 1024:
+        return "OOM", (f"killed by SIGKILL after its memory grew by {grown / 2 ** 20:.0f} MB, "
+                       f"near the {limits.memory_mb} MB limit")
+    return "CRASHED", (f"killed by SIGKILL after {cpu_time:.1f}s CPU time and "
+                       f"{_peak_rss(rusage) / 2 ** 20:.0f} MB peak memory")
+
+def _apply_limits(limits):
+    """Put the current (child) process in its own group under the sandbox limits."""
+    import resource
+
+    os.setpgid(0, 0)
+    # The worker ignores these; the generated code gets the default behaviour.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    cpu_time = math.ceil(limits.cpu_time)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_time, cpu_time + 1))
+    if limits.memory_mb:
+        address_space = _address_space() + limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+    # Writes past the file-size cap fail with EFBIG instead of killing the run.
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits.max_file, limits.max_file))
+
+def _cap_output(text, max_bytes):
+    """Keep the head and tail of text within max_bytes, noting what was dropped."""
+    if max_bytes is None or len(text) <= max_bytes:
+        return text
+    half = max_bytes // 2
+    return (f"{text[:half]}\n... [{len(text) - 2 * half} characters truncated] ...\n"
+            f"{text[-half:]}")
+
+def _run_sandboxed(func, args, limits):
+    """Run func(*args) in a forked child under limits; return (status, value, events).
+
+    status is OK (value is the result), TIMEOUT, OOM, CRASHED or ERROR (value
+    describes what happened); events are what the child sent through _emit
+    before it finished or was stopped. Without fork, func runs unsandboxed.
+    """
+    if not hasattr(os, "fork"):
+        return "OK", func(*args), []
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        global _emit
+
+        os.close(read_fd)
+        try:
+            pipe = os.fdopen(write_fd, 'wb')
+
+            def _emit(event):
+                pickle.dump(("EVENT", event), pipe)
+                pipe.flush()
+
+            try:
+                _apply_limits(limits)
+                # Where the child's resident memory starts, to tell how much it grew.
+                pickle.dump(("RSS", _memory_status("VmRSS")), pipe)
+                pipe.flush()
+                payload = pickle.dumps(("OK", func(*args)))
+            except MemoryError:
+                payload = pickle.dumps(("OOM", "MemoryError under the memory limit"))
+            except BaseException as e:
+                payload = pickle.dumps(("ERROR", f"{type(e).__name__}: {e}"))
+            pipe.write(payload)
+            pipe.close()
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    import selectors
+
+    chunks = []
+    timed_out = False
+    deadline = time.monotonic() + limits.timeout
+    with selectors.DefaultSelector() as selector, os.fdopen(read_fd, 'rb', buffering=0) as pipe:
+        selector.register(pipe, selectors.EVENT_READ)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not selector.select(remaining):
+                timed_out = True
+                break
+            chunk = pipe.read(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+    _, wait_status, rusage = os.wait4(pid, 0)
+    with contextlib.suppress(OSError):
+        # Processes the generated code started do not outlive the run.
+        os.killpg(pid, signal.SIGKILL)
+    events = []
+    result = None
+    baseline_rss = 0
+    frames = io.BytesIO(b"".join(chunks))
+    while True:
+        try:
+            kind, value = pickle.load(frames)
+        except Exception:
+            # End of the stream, or a frame cut off when the child was killed.
+            break
+        if kind == "EVENT":
+            events.append(value)
+        elif kind == "RSS":
+            baseline_rss = value
+        else:
+            result = (kind, value, events)
+    if timed_out:
+        return "TIMEOUT", f"exceeded the {limits.timeout:g}s wall-clock limit", events
+    if os.WIFSIGNALED(wait_status):
+        signum = os.WTERMSIG(wait_status)
+        if signum == signal.SIGXCPU:
+            return "TIMEOUT", f"exceeded the {limits.cpu_time:g}s CPU-time limit", events
+        if signum == signal.SIGKILL:
+            return (*_killed_status(limits, rusage, baseline_rss), events)
+        return "CRASHED", f"killed by {signal.Signals(signum).name}", events
+    if result is None:
+        return ("CRASHED", f"exited with status {os.WEXITSTATUS(wait_status)} without a result",
+                events)
+    return result
+
+def _warm_worker():
+    """Reset inherited signal handling and import pytest once per worker.
+
+    Workers can be forked after the parent's event loop has installed its
+    SIGTERM/SIGINT handlers, and would otherwise write every signal they get
+    to the parent's wakeup fd, so one signal to the process group reaches
+    the parent twice. The parent decides when the pool stops and shuts it
+    down, so workers ignore both signals instead.
+    """
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import pytest  # noqa: F401
+
+def _clean_output(test_output):
+    """Strip pytest session banners from captured output."""
+    test_output = re.sub(r'=+ test session starts =+\n.*?\n', '', test_output, flags=re.DOTALL)
+    test_output = re.sub(r'=+ warnings summary =+\n.*?\n', '', test_output, flags=re.DOTALL)
+    test_output = re.sub(r'=+ short test summary info =+\n.*?\n', '', test_output, flags=re.DOTALL)
+    return test_output.strip()
+
+def _purge_modules(test_dir):
+    """Drop modules imported from test_dir so the next run cannot see stale code."""
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and test_dir in Path(module_file).resolve().parents:
+            del sys.modules[name]
+
+class _PhaseRecorder:
+    """pytest plugin recording collection and per-test setup/call/teardown timings."""
+
+    def __init__(self):
+        self.phases = []
+        self._session_start = None
+
+    def pytest_sessionstart(self, session):
+        self._session_start = time.time()
+
+    def pytest_collection_finish(self, session):
+        self.phases.append({
+            "name": "collect",
+            "start": self._session_start,
+            "duration": time.time() - self._session_start
+        })
+
+    def pytest_runtest_logreport(self, report):
+        self.phases.append({
+            "name": f"{report.nodeid.split('::', 1)[-1]} [{report.when}]",
+            "start": getattr(report, "start", time.time() - report.duration),
+            "duration": report.duration,
+            "outcome": report.outcome
+        })
+
+def _failure_message(report):
+    """Return the exception message of a failed pytest report, without the traceback."""
+    crash = getattr(report.longrepr, "reprcrash", None)
+    message = crash.message if crash is not None else report.longreprtext
+    return message[-MAX_MESSAGE_CHARS:]
+
+class _TestResultCollector:
+    """pytest plugin collecting each test's outcome, phase durations and failure message."""
+
+    def __init__(self):
+        self.tests = []
+        self._current = None
+
+    def _finish(self, test):
+        self.tests.append(test)
+        if _emit is not None:
+            _emit(("test", test))
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self._finish({
+                "name": f"ERROR collecting {report.nodeid or 'tests'}",
+                "outcome": "error",
+                "duration": 0.0,
+                "setup": 0.0,
+                "teardown": 0.0,
+                "message": _failure_message(report)
+            })
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self._current = {
+            "name": nodeid.split("::", 1)[-1],
+            "outcome": "passed",
+            "duration": 0.0,
+            "setup": 0.0,
+            "teardown": 0.0,
+            "message": None
+        }
+        if _emit is not None:
+            _emit(("started", self._current["name"]))
+
+    def pytest_runtest_logreport(self, report):
+        test = self._current
+        test["duration" if report.when == "call" else report.when] = report.duration
+        if report.skipped and test["outcome"] == "passed":
+            test["outcome"] = "skipped"
+            if isinstance(report.longrepr, tuple):
+                test["message"] = report.longrepr[2]
+        elif report.failed and test["outcome"] not in ("failed", "error"):
+            # Failures outside the test body are errors, as pytest reports them.
+            test["outcome"] = "failed" if report.when == "call" else "error"
+            test["message"] = _failure_message(report)
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        self._finish(self._current)
+        self._current = None
+
+def slowest_tests(tests, count=SLOWEST_TESTS):
+    """Return the count slowest tests by setup, call and teardown time, slowest first."""
+    timed = [test for test in tests if test.get("duration") is not None]
+    timed.sort(key=lambda test: test["setup"] + test["duration"] + test["teardown"], reverse=True)
+    return [{"name": test["name"], "outcome": test["outcome"],
+             "total": test["setup"] + test["duration"] + test["teardown"]}
+            for test in timed[:count]]
+
+def _run_pytest(test_file, max_output=None):
+    """Run pytest on a single test file inside a worker process."""
+    import pytest
+
+    test_file = Path(test_file).resolve()
+    saved_path = list(sys.path)
+    stdout = StringIO()
+    recorder = _PhaseRecorder()
+    collector = _TestResultCollector()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            exit_code = pytest.main([
+                "-v",  # verbose output
+                "--tb=short",  # shorter traceback format
+                "--no-header",  # no header
+                "-rN",  # no short summary; keep the failures section for repairs
+                "-p", "no:cacheprovider",  # workers share the tree; skip .pytest_cache
+                str(test_file)
+            ], plugins=[recorder, collector])
+    finally:
+        sys.path[:] = saved_path
+        _purge_modules(test_file.parent)
+    output = _clean_output(stdout.getvalue())
+    success = exit_code == pytest.ExitCode.OK
+    if success:
+        status = "PASSED"
+    elif any((test["message"] or "").startswith("MemoryError") for test in collector.tests):
+        # pytest reports a MemoryError raised under RLIMIT_AS as a failing test.
+        status = "OOM"
+    else:
+        status = "FAILED"
+    return {
+        "success": success,
+        "status": status,
+        "output": _cap_output(output, max_output),
+        "tests": collector.tests,
+        "phases": recorder.phases
+    }
+
+def _sandboxed_tests(test_file, limits):
+    """Run pytest on a test file in a sandboxed child of the worker."""
+    status, value, events = _run_sandboxed(_run_pytest, (test_file, limits.max_output), limits)
+    if status == "OK":
+        return value
+    tests = [event for kind, event in events if kind == "test"]
+    started = [event for kind, event in events if kind == "started"]
+    if started and (not tests or tests[-1]["name"] != started[-1]):
+        # The test that was running when the run was stopped.
+        tests.append({"name": started[-1], "outcome": status.lower(), "duration": None,
+                      "setup": 0.0, "teardown": 0.0, "message": f"Test run {value}"})
+    return {"success": False, "status": status if status != "ERROR" else "FAILED",
+            "output": f"Test run {value}", "tests": tests}
+
+def _sandboxed_benchmark(code_file, names, limits):
+    """Benchmark a solution file in a sandboxed child of the worker."""
+    status, value, _ = _run_sandboxed(run_benchmark, (code_file, names), limits)
+    if status == "OK":
+        return value
+    return {"status": status, "reason": f"Benchmark {value}"}
+
+def _sandboxed_peak_memory(code_file, n, names, limits):
+    """Measure peak memory in a sandboxed child of the worker, or None."""
+    status, value, _ = _run_sandboxed(measure_peak_memory, (code_file, n, names), limits)
+    return value if status == "OK" else None
+
+class TestRunner:
+    """Pool of warm worker processes that execute test files in parallel."""
+
+    def __init__(self, max_workers=None, limits=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.limits = limits or SandboxLimits()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._closed = False
+
+    def _get_executor(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Test runner has been shut down")
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_warm_worker
+                )
+            return self._executor
+
+    def _reset(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+    def start(self):
+        """Fork the worker processes now instead of on the first test run."""
+        self._get_executor().submit(os.getpid).result()
+
+    def submit(self, test_file):
+        """Schedule a test file and return a future for its result dict."""
+        return self._get_executor().submit(_sandboxed_tests, str(test_file), self.limits)
+
+    def _call(self, func, path, *args):
+        executor = self._get_executor()
+        try:
+            return executor.submit(func, str(path), *args, self.limits).result()
+        except BrokenProcessPool:
+            # A worker died mid-run (e.g. a generated test killed the interpreter);
+            # replace the pool so the remaining problems can still be validated.
+            self._reset(executor)
+            return None
+
+    def run(self, test_file):
+        """Run a test file in a worker and block until its result is ready."""
+        return self._call(_sandboxed_tests, test_file) or {
+            "success": False,
+            "status": "CRASHED",
+            "output": "Test worker process terminated unexpectedly"
+        }
+
+    def run_many(self, test_files):
+        """Run several test files across the workers at once; return their results in order."""
+        executor = self._get_executor()
+        futures = [executor.submit(_sandboxed_tests, str(test_file), self.limits)
+                   for test_file in test_files]
+        results = []
+        broken = False
+        for future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                broken = True
+                results.append({
+                    "success": False,
+                    "status": "CRASHED",
+                    "output": "Test worker process terminated unexpectedly"
+                })
+        if broken:
+            self._reset(executor)
+        return results
+
+    def benchmark(self, code_file, names=()):
+        """Benchmark a solution file in a worker; see benchmark.run_benchmark."""
+        return self._call(_sandboxed_benchmark, code_file, list(names)) or {
+            "status": "ERROR",
+            "reason": "Test worker process terminated unexpectedly"
+        }
+
+    def peak_memory(self, code_file, n, names=()):
+        """Measure a solution's peak allocation at input size n in a worker, or None."""
+        return self._call(_sandboxed_peak_memory, code_file, n, list(names))
+
+    def shutdown(self, wait=True):
+        """Stop all worker processes; later runs raise RuntimeError.
+
+        Queued runs are cancelled; with `wait`, runs already in a worker finish first.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+_default_runner = None
+_default_runner_lock = threading.Lock()
+
+def get_test_runner(max_workers=None, limits=None):
+    """Return the process-wide test runner, creating it on first use."""
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = TestRunner(max_workers, limits)
+        return _default_runner
+
+def shutdown_test_runner():
+    """Shut down the process-wide test runner if one was started."""
+    global _default_runner
+    with _default_runner_lock:
+        runner, _default_runner = _default_runner, None
+    if runner is not None:
+        runner.shutdown()
+
+def main(argv=None):
+    """Command-line interface for test timing reports."""
+    parser = argparse.ArgumentParser(description="Inspect recorded test results")
+    parser.add_argument("--solved", default="problems/solved", help="Solved problems directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    slowest = commands.add_parser("slowest", help="Show the slowest tests across solutions")
+    slowest.add_argument("--top", type=int, default=10, help="Tests to show (default: 10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "slowest":
+        tests = []
+        for solution_file in sorted(Path(args.solved).glob("*/solution.json")):
+            with open(solution_file, 'r', encoding='utf-8') as f:
+                results = json.load(f).get("test_results", {})
+            tests.extend(dict(test, name=f"{solution_file.parent.name}::{test['name']}")
+                         for test in results.get("tests", []))
+        if not tests:
+            print(f"No structured test results in {args.solved}")
+            return 0
+        for test in slowest_tests(tests, args.top):
+            print(f"{test['total'] * 1000:10.1f} ms  {test['outcome']:<8} {test['name']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
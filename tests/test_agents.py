@@ -0,0 +1,101 @@
+"""Tests for streaming code responses (agents.py)."""
+
+import asyncio
+
+from agents import PythonDeveloper, _CodeBlockScanner
+
+RESPONSE = (
+    "Here is the solution:\n"
+    "```python\n"
+    "def solve(values):\n"
+    "    return sum(values)\n"
+    "```\n"
+    "It runs in linear time. " + "More explanation. " * 50
+)
+
+
+class _Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class StreamingModel:
+    """Chat model that streams RESPONSE in small chunks and counts what was read."""
+
+    model_name = "fake-model"
+    temperature = 0.7
+
+    def __init__(self, size=5):
+        self.chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+        self.sent = 0
+        self.closed = False
+
+    def stream(self, messages):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield _Chunk(chunk)
+        finally:
+            self.closed = True
+
+    async def astream(self, messages):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield _Chunk(chunk)
+        finally:
+            self.closed = True
+
+
+def streaming_developer(llm):
+    developer = PythonDeveloper(use_cache=False, llm=llm)
+    developer.streaming = True
+    return developer
+
+
+def test_scanner_finds_fences_split_across_pieces():
+    scanner = _CodeBlockScanner()
+    pieces = ["Text ``", "`pyth", "on\nx = 1\n`", "`", "` trailing", " more"]
+    fed = [scanner.feed(piece) for piece in pieces[:5]]
+    assert fed == [False, False, False, False, True]
+    assert scanner.complete and scanner.text == "Text ```python\nx = 1\n```"
+
+
+def test_scanner_ignores_text_without_a_code_block():
+    scanner = _CodeBlockScanner()
+    assert not scanner.feed("No code here, just ``inline`` quotes.\n")
+    assert not scanner.complete
+
+
+def test_stream_stops_reading_at_the_closing_fence():
+    llm = StreamingModel()
+    stats = {}
+    code = streaming_developer(llm).repair_solution("def solve(values):\n    return 0",
+                                                    [{"test": "test_sum", "message": ""}], stats)
+    assert code == "def solve(values):\n    return sum(values)"
+    assert llm.closed and llm.sent < len(llm.chunks) // 2
+    assert stats["truncated"] is True and "ttfb" in stats
+    # Only the text that was read is counted as completion tokens.
+    assert stats["completion_tokens"] < len(RESPONSE) // 8
+
+
+def test_async_stream_stops_reading_at_the_closing_fence():
+    llm = StreamingModel()
+    stats = {}
+    developer = streaming_developer(llm)
+    text = asyncio.run(developer._ainvoke(
+        developer._create_messages("system", "solve it"), stats, stream=True
+    ))
+    assert text.endswith("    return sum(values)\n```")
+    assert llm.closed and llm.sent < len(llm.chunks) // 2
+    assert stats["truncated"] is True
+
+
+def test_stream_without_a_code_block_is_read_to_the_end():
+    llm = StreamingModel()
+    llm.chunks = ["no ", "code ", "at all"]
+    stats = {}
+    developer = streaming_developer(llm)
+    text = developer._invoke(developer._create_messages("system", "solve it"), stats, stream=True)
+    assert text == "no code at all"
+    assert llm.sent == 3 and stats["truncated"] is False
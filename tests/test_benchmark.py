@@ -0,0 +1,88 @@
+"""Tests for solution benchmarks and complexity fitting (benchmark.py)."""
+
+import pytest
+
+from benchmark import (check_bound, entry_point_names, exceeds_bound, find_entry_point,
+                       fit_complexity, measure_peak_memory, parse_complexity_bound, run_benchmark)
+import benchmark
+
+CODE = '''\
+from typing import List
+
+def validate(values: List[int]) -> bool:
+    return all(isinstance(value, int) for value in values)
+
+def pair_count(values: List[int]) -> int:
+    count = 0
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            count += values[i] < values[j]
+    return count
+'''
+
+TESTS = '''\
+from .solution import *
+
+def helper():
+    return [3, 1, 2]
+
+def test_pairs():
+    assert pair_count(helper()) == 1
+    assert validate([1])
+'''
+
+ANALYSIS = "Signature:\n- def pair_count(values: List[int]) -> int\nTime complexity: O(n^2)\n"
+
+
+@pytest.fixture
+def code_file(tmp_path):
+    path = tmp_path / "solution.py"
+    path.write_text(CODE, encoding="utf-8")
+    return path
+
+
+def test_entry_point_names_prefer_the_tests():
+    assert entry_point_names(TESTS) == ["pair_count", "validate"]
+    assert entry_point_names(None, ANALYSIS) == ["pair_count"]
+    assert entry_point_names("def broken(:\n", ANALYSIS) == ["pair_count"]
+    assert entry_point_names("from .solution import *\n\ndef test_v():\n    assert validate([])\n",
+                             ANALYSIS) == ["validate", "pair_count"]
+
+
+def test_entry_point_falls_back_to_the_first_public_function(code_file):
+    module = benchmark._load_module(code_file)
+    assert find_entry_point(module).__name__ == "validate"
+    assert find_entry_point(module, ["missing", "pair_count"]).__name__ == "pair_count"
+    # Imported names are never the entry point.
+    assert find_entry_point(module, ["List"]).__name__ == "validate"
+
+
+def test_benchmark_measures_the_tested_function(code_file, monkeypatch):
+    monkeypatch.setattr(benchmark, "MAX_SIZE", 1024)
+    result = run_benchmark(code_file, entry_point_names(TESTS, ANALYSIS))
+    assert result["function"] == "pair_count"
+    assert result["status"] == "MEASURED"
+    assert result["sizes"] == [64, 128, 256, 512, 1024]
+    assert result["fitted"] == "O(n^2)"
+    assert check_bound(result, ANALYSIS)["within_bound"] is True
+    assert check_bound(dict(result), "Time complexity: O(n log n)")["within_bound"] is False
+
+
+def test_peak_memory_uses_the_same_entry_point(code_file):
+    assert measure_peak_memory(code_file, 1000, ["pair_count"]) is not None
+    assert measure_peak_memory(code_file, 1000, ["pair_count"]) < 10_000
+
+
+def test_fit_complexity_recovers_growth_classes():
+    sizes = [64 * 2 ** k for k in range(8)]
+    assert fit_complexity(sizes, [1e-6 * n for n in sizes])[0] == "O(n)"
+    assert fit_complexity(sizes, [1e-9 * n * n for n in sizes])[0] == "O(n^2)"
+    assert fit_complexity(sizes, [1e-6 for _ in sizes])[0] == "O(1)"
+
+
+def test_bounds():
+    assert parse_complexity_bound("Time complexity: O(n log n), space O(n)") == "O(n log n)"
+    assert parse_complexity_bound("no bound here") is None
+    assert exceeds_bound("O(n^2)", "O(n)")
+    assert not exceeds_bound("O(n)", "O(n log n)")
+    assert check_bound({"status": "SKIPPED"}, ANALYSIS)["within_bound"] is None
@@ -0,0 +1,96 @@
+"""Tests for the content-addressed blob store (blobstore.py)."""
+
+import json
+
+import pytest
+
+from blobstore import BlobStore, convert_solutions, load_solution, resolve_solution, store_solution
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BlobStore(tmp_path / "objects")
+    yield store
+    store.close()
+
+
+def loose_objects(store):
+    return [path for path in store.root.glob("[0-9a-f][0-9a-f]/*")]
+
+
+def test_put_is_content_addressed(store):
+    key = store.put("def f():\n    return 1\n")
+    assert key == BlobStore.hash_text("def f():\n    return 1\n")
+    assert store.put("def f():\n    return 1\n") == key
+    assert len(loose_objects(store)) == 1
+    assert store.get(key) == "def f():\n    return 1\n"
+
+
+def test_missing_key_raises(store):
+    with pytest.raises(KeyError):
+        store.get(BlobStore.hash_text("never stored"))
+    assert not store.contains(BlobStore.hash_text("never stored"))
+
+
+def test_pack_moves_loose_objects_and_keeps_them_readable(store):
+    texts = [f"text {index} é" * (index + 1) for index in range(20)]
+    keys = [store.put(text) for text in texts]
+    assert store.pack() == 20
+    assert loose_objects(store) == []
+    assert store.pack_path.exists() and store.index_path.exists()
+    for key, text in zip(keys, texts):
+        assert store.contains(key)
+        assert store.get(key) == text
+    # Packed objects are not written again as loose files.
+    assert store.put(texts[0]) == keys[0]
+    assert loose_objects(store) == []
+    assert store.pack() == 0
+
+
+def test_second_pack_appends_and_reopens_the_index(store):
+    first = store.put("first")
+    store.pack()
+    assert store.get(first) == "first"
+    second = store.put("second")
+    assert store.pack() == 1
+    assert store.get(first) == "first"
+    assert store.get(second) == "second"
+    # A fresh store reads the same pack.
+    reopened = BlobStore(store.root)
+    try:
+        assert reopened.get(second) == "second"
+    finally:
+        reopened.close()
+
+
+def solution():
+    return {
+        "problem": {"name": "two_sum", "description": "Find two numbers", "analysis": "Use a dict"},
+        "solution": {"code": "def two_sum(): pass\n", "tests": "def test_it(): pass\n",
+                     "test_results": {"success": True}},
+        "candidates": {"selected": 0, "candidates": [{"index": 0, "code": "def two_sum(): pass\n"},
+                                                     {"index": 1, "code": None}]},
+        "metrics": {"bytes_written": 0}
+    }
+
+
+def test_store_and_resolve_solution_round_trip(store):
+    data = solution()
+    stored = store_solution(data, store)
+    assert stored["problem"]["description"] == {"blob": BlobStore.hash_text("Find two numbers")}
+    assert stored["solution"]["test_results"] == {"success": True}
+    assert stored["candidates"]["candidates"][0]["code"] == stored["solution"]["code"]
+    assert stored["candidates"]["candidates"][1]["code"] is None
+    assert data == solution()
+    store.pack()
+    assert resolve_solution(stored, store) == data
+
+
+def test_convert_solutions_rewrites_inline_files(store, tmp_path):
+    solution_file = tmp_path / "solved" / "two_sum_20240101" / "solution.json"
+    solution_file.parent.mkdir(parents=True)
+    solution_file.write_text(json.dumps(solution()), encoding="utf-8")
+    assert convert_solutions(tmp_path / "solved", store) == 1
+    assert "blob" in json.loads(solution_file.read_text(encoding="utf-8"))["solution"]["code"]
+    assert convert_solutions(tmp_path / "solved", store) == 0
+    assert load_solution(solution_file, store) == solution()
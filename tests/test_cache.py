@@ -0,0 +1,166 @@
+"""Tests for the LLM response cache (cache.py)."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import ResponseCache, refreshing
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    return ResponseCache(directory=tmp_path / "llm", max_bytes=1024 * 1024, max_age=3600)
+
+
+def test_make_key_covers_every_field():
+    base = ResponseCache.make_key("gpt-4", 0.0, "system", "user")
+    assert base == ResponseCache.make_key("gpt-4", 0.0, "system", "user")
+    assert len({
+        base,
+        ResponseCache.make_key("gpt-4o-mini", 0.0, "system", "user"),
+        ResponseCache.make_key("gpt-4", 0.7, "system", "user"),
+        ResponseCache.make_key("gpt-4", 0.0, "other", "user"),
+        ResponseCache.make_key("gpt-4", 0.0, "system", "other"),
+    }) == 5
+
+
+def test_put_then_get(response_cache):
+    assert response_cache.get("ab" * 32) is None
+    response_cache.put("ab" * 32, "answer", model="gpt-4")
+    assert response_cache.get("ab" * 32) == "answer"
+
+
+def test_expired_entry_is_a_miss_and_removed(response_cache):
+    key = "cd" * 32
+    response_cache.put(key, "stale")
+    path = response_cache._path(key)
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    entry["created"] = time.time() - 7200
+    path.write_text(json.dumps(entry), encoding="utf-8")
+    assert response_cache.get(key) is None
+    assert not path.exists()
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    response_cache = ResponseCache(directory=tmp_path / "llm", max_bytes=10_000, max_age=0)
+    keys = [f"{index:02x}" * 32 for index in range(4)]
+    for age, key in enumerate(keys):
+        response_cache.put(key, "x" * 2000)
+        # Oldest access first: keys[0] was used longest ago.
+        past = time.time() - 1000 + age
+        os.utime(response_cache._path(key), (past, past))
+    response_cache.get(keys[0])  # refreshes keys[0]'s access time
+    response_cache.put("ff" * 32, "x" * 2000)
+    remaining = {key for key in keys + ["ff" * 32] if response_cache._path(key).exists()}
+    assert keys[0] in remaining and "ff" * 32 in remaining
+    assert keys[1] not in remaining
+    assert sum(response_cache._path(key).stat().st_size for key in remaining) <= 10_000
+
+
+def test_concurrent_threads_share_one_computation(response_cache):
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "shared"
+
+    def request():
+        barrier.wait()
+        results.append(response_cache.get_or_compute("ee" * 32, compute))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["shared"] * 8
+    assert response_cache.get("ee" * 32) == "shared"
+
+
+def test_failed_computation_reaches_waiters_and_is_not_cached(response_cache):
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("API down")
+
+    def follower():
+        try:
+            response_cache.get_or_compute("aa" * 32, lambda: "unused")
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=lambda: pytest.raises(
+        RuntimeError, response_cache.get_or_compute, "aa" * 32, failing
+    ))
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=follower)
+    waiter.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join()
+    waiter.join()
+    assert errors == ["API down"]
+    assert response_cache.get("aa" * 32) is None
+    assert response_cache.get_or_compute("aa" * 32, lambda: "retried") == "retried"
+
+
+def test_concurrent_tasks_share_one_computation(response_cache):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    async def run():
+        return await asyncio.gather(
+            *(response_cache.aget_or_compute("bb" * 32, compute) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == ["shared"] * 5
+    assert len(calls) == 1
+
+
+def test_refreshing_bypasses_lookups_and_replaces_the_entry(response_cache):
+    key = "12" * 32
+    response_cache.put(key, "failed answer")
+    assert response_cache.get_or_compute(key, lambda: "new answer") == "failed answer"
+    with refreshing():
+        assert response_cache.get_or_compute(key, lambda: "new answer") == "new answer"
+    assert response_cache.get(key) == "new answer"
+
+
+def test_refreshing_follows_the_problem_into_tasks(response_cache):
+    key = "34" * 32
+    response_cache.put(key, "cached")
+
+    async def fresh():
+        return "fresh"
+
+    async def run():
+        with refreshing():
+            refreshed = asyncio.ensure_future(response_cache.aget_or_compute(key, fresh))
+        plain = await response_cache.aget_or_compute("56" * 32, fresh)
+        return await refreshed, plain
+
+    assert asyncio.run(run()) == ("fresh", "fresh")
+    assert response_cache.get_or_compute(key, lambda: "unused") == "fresh"
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "0")
+    assert cache.get_response_cache() is None
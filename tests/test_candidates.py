@@ -0,0 +1,175 @@
+"""Tests for best-of-N candidate selection (candidates.py)."""
+
+import threading
+
+import pytest
+
+import runner
+from candidates import BestOfN
+
+TESTS = "from .solution import *\n\ndef test_solve():\n    assert solve([1, 2]) == 3\n"
+
+
+def candidate(name):
+    return f"# {name}\ndef solve(values):\n    return sum(values)\n"
+
+
+def write_files(module_dir, code, tests):
+    (module_dir / "__init__.py").touch()
+    code_file, test_file = module_dir / "solution.py", module_dir / "test_solution.py"
+    code_file.write_text(code, encoding="utf-8")
+    test_file.write_text(tests, encoding="utf-8")
+    return code_file, test_file
+
+
+class FakeRunner:
+    """Stands in for the test workers; behaviour is keyed by each candidate's first line.
+
+    profiles maps a name to (failing tests, benchmark sizes, timings, peak memory).
+    """
+
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.tested = []
+        self.benchmarked = []
+
+    def _profile(self, code_file):
+        return self.profiles[code_file.read_text(encoding="utf-8").splitlines()[0][2:]]
+
+    def run_many(self, test_files):
+        results = []
+        for test_file in test_files:
+            name = (test_file.parent / "solution.py").read_text(encoding="utf-8").splitlines()[0][2:]
+            self.tested.append(name)
+            failing = self.profiles[name][0]
+            results.append({
+                "success": not failing,
+                "status": "FAILED" if failing else "PASSED",
+                "output": "",
+                "tests": [{"name": f"test_{index}", "outcome": "failed", "message": "wrong"}
+                          for index in range(failing)]
+            })
+        return results
+
+    def benchmark(self, code_file, names=()):
+        assert list(names) == ["solve"]
+        _, sizes, timings, _ = self._profile(code_file)
+        self.benchmarked.append(code_file.read_text(encoding="utf-8").splitlines()[0][2:])
+        return {"status": "MEASURED", "sizes": sizes, "timings": timings, "fitted": "O(n)"}
+
+    def peak_memory(self, code_file, size, names=()):
+        return self._profile(code_file)[3]
+
+
+class FakeDeveloper:
+    """Hands out the given implementations one per call, like temperature sampling."""
+
+    def __init__(self, codes):
+        self.codes = list(codes)
+        self._lock = threading.Lock()
+
+    def implement_solution(self, analysis, tests, stats):
+        with self._lock:
+            code = self.codes.pop(0)
+        if isinstance(code, Exception):
+            raise code
+        stats.update({"completion_tokens": 10, "cost": 0.5, "model": "gpt-4", "cached": False})
+        return code
+
+
+@pytest.fixture
+def fake_runner(monkeypatch):
+    def install(profiles):
+        fake = FakeRunner(profiles)
+        monkeypatch.setattr(runner, "get_test_runner", lambda: fake)
+        return fake
+    return install
+
+
+def select(codes):
+    best = BestOfN(developer=None, n=len(codes), write_files=write_files)
+    code = best.select([(code, {"completion_tokens": 10}) for code in codes], TESTS)
+    return best, code
+
+
+def test_fastest_passing_candidate_is_kept(fake_runner):
+    fake = fake_runner({
+        "slow": (0, [100, 1000], [0.01, 0.10], 100),
+        "fast": (0, [100, 1000], [0.01, 0.02], 100),
+        "wrong": (2, None, None, None),
+    })
+    best, code = select([candidate("slow"), candidate("wrong"), candidate("fast")])
+    assert code == candidate("fast")
+    assert best.selected == 2 and best.size == 1000
+    assert [c["passed"] for c in best.candidates] == [True, False, True]
+    assert best.candidates[1]["failures"] == 2
+    assert fake.benchmarked == ["slow", "fast"]
+    summary = best.summary()
+    assert summary["speedup_over_first"] == pytest.approx(5.0)
+    assert "benchmark" not in summary["candidates"][0]
+    assert summary["candidates"][0]["benchmark_status"] == "MEASURED"
+
+
+def test_duplicates_are_validated_once(fake_runner):
+    fake = fake_runner({"only": (0, [100], [0.01], 100)})
+    best, code = select([candidate("only")] * 3)
+    assert code == candidate("only")
+    assert fake.tested == ["only"] and fake.benchmarked == ["only"]
+    assert [c["duplicate_of"] for c in best.candidates] == [0, 0, 0]
+    assert all(c["passed"] and c["time"] == 0.01 for c in best.candidates)
+
+
+def test_static_check_failures_skip_pytest(fake_runner):
+    fake = fake_runner({"good": (0, [100], [0.05], 100)})
+    broken = "# broken\ndef other(values):\n    return 0\n"
+    best, code = select([broken, candidate("good")])
+    assert code == candidate("good")
+    assert fake.tested == ["good"]
+    assert best.candidates[0]["static_check"] == "REPAIR"
+    assert best.candidates[0]["passed"] is False
+
+
+def test_candidates_are_compared_at_the_size_all_reached(fake_runner):
+    fake_runner({
+        # Reached a larger size, but is slower at the size both reached.
+        "steady": (0, [100, 1000, 10000], [0.001, 0.02, 0.2], 100),
+        "quick": (0, [100, 1000], [0.001, 0.01], 100),
+    })
+    best, code = select([candidate("steady"), candidate("quick")])
+    assert best.size == 1000
+    assert code == candidate("quick")
+
+
+def test_ties_are_broken_by_peak_memory(fake_runner):
+    fake_runner({
+        "fast_hungry": (0, [1000], [0.100], 5000),
+        "lean": (0, [1000], [0.104], 1000),
+        "slow_lean": (0, [1000], [0.200], 10),
+    })
+    _, code = select([candidate("fast_hungry"), candidate("lean"), candidate("slow_lean")])
+    assert code == candidate("lean")
+
+
+def test_fewest_failures_wins_when_nothing_passes(fake_runner):
+    fake = fake_runner({"bad": (3, None, None, None), "close": (1, None, None, None)})
+    best, code = select([candidate("bad"), candidate("close")])
+    assert code == candidate("close")
+    assert fake.benchmarked == []
+    assert best.size is None and best.summary()["speedup_over_first"] is None
+
+
+def test_implement_samples_n_and_sums_their_stats(fake_runner):
+    fake_runner({"a": (0, [100], [0.02], 100), "b": (0, [100], [0.01], 100)})
+    developer = FakeDeveloper([candidate("a"), RuntimeError("API down"), candidate("b")])
+    best = BestOfN(developer, 3, write_files)
+    stats = {}
+    assert best.implement("analysis", TESTS, stats) == candidate("b")
+    assert stats["samples"] == 2
+    assert stats["cost"] == 1.0 and stats["completion_tokens"] == 20
+    assert stats["model"] == "gpt-4" and stats["cached"] is False
+
+
+def test_implement_raises_when_every_sample_fails():
+    developer = FakeDeveloper([RuntimeError("API down")] * 2)
+    with pytest.raises(RuntimeError, match="API down"):
+        BestOfN(developer, 2, write_files).implement("analysis", TESTS)
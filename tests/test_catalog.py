@@ -0,0 +1,104 @@
+"""Tests for the SQLite solution catalog (catalog.py)."""
+
+import json
+
+import pytest
+
+import catalog
+from catalog import Catalog, content_hash
+
+
+def solution_data(name, timestamp, status, cost=0.01, description="Add two numbers"):
+    return {
+        "metadata": {"problem_name": name, "timestamp": timestamp, "status": status},
+        "problem": {"description": description, "analysis": "analysis"},
+        "solution": {"code": "", "tests": ""},
+        "stages": {"analysis": {"total": 0.5, "model": "gpt-4o"}, "run_tests": {"total": 0.2}},
+        "metrics": {"stage_time": 0.7, "cost": cost, "prompt_tokens": 100,
+                    "completion_tokens": 20}
+    }
+
+
+def write_solution(solved_dir, name, timestamp, status, **fields):
+    solution_dir = solved_dir / f"{name}_{timestamp}"
+    solution_dir.mkdir(parents=True)
+    solution_file = solution_dir / "solution.json"
+    data = solution_data(name, timestamp, status, **fields)
+    solution_file.write_text(json.dumps(data), encoding="utf-8")
+    return solution_file, data
+
+
+@pytest.fixture
+def runs(tmp_path):
+    """A catalog with three runs of two_sum and two of add."""
+    solved = tmp_path / "solved"
+    index = Catalog(tmp_path / "catalog.db")
+    for name, timestamp, status in (
+        ("two_sum", "20250101_000000", "PASSED"),
+        ("two_sum", "20250102_000000", "PASSED"),
+        ("two_sum", "20250103_000000", "FAILED"),
+        ("add", "20250101_000000", "FAILED"),
+        ("add", "20250102_000000", "TIMEOUT"),
+    ):
+        index.record(*write_solution(solved, name, timestamp, status))
+    return index
+
+
+def test_row_records_the_run(tmp_path):
+    solution_file, data = write_solution(tmp_path, "two_sum", "20250101_000000", "PASSED")
+    row = catalog.catalog_row(solution_file, data)
+    assert row["content_hash"] == content_hash("  Add two numbers\n")
+    assert row["model"] == "gpt-4o" and row["cost"] == 0.01
+    assert json.loads(row["timings"]) == {"analysis": 0.5, "run_tests": 0.2}
+    assert row["code_file"] == (solution_file.parent / "solution.py").as_posix()
+
+
+def test_latest_passing(runs):
+    latest = runs.latest_passing("two_sum")
+    assert latest["timestamp"] == "20250102_000000" and latest["status"] == "PASSED"
+    assert runs.latest_passing("add") is None
+    assert runs.latest_passing("missing") is None
+
+
+def test_history_is_newest_first(runs):
+    history = runs.history("two_sum")
+    assert [row["timestamp"] for row in history] == [
+        "20250103_000000", "20250102_000000", "20250101_000000"]
+    assert [row["status"] for row in runs.history("two_sum", limit=1)] == ["FAILED"]
+
+
+def test_failure_rate(runs):
+    rates = {row["problem_name"]: row for row in runs.failure_rate()}
+    assert (rates["two_sum"]["runs"], rates["two_sum"]["failed"]) == (3, 1)
+    assert rates["two_sum"]["failure_rate"] == pytest.approx(1 / 3)
+    assert rates["add"]["failure_rate"] == 1.0
+    assert [row["problem_name"] for row in runs.failure_rate("add")] == ["add"]
+
+
+def test_recording_a_run_again_replaces_its_row(runs, tmp_path):
+    solution_file = tmp_path / "solved" / "add_20250102_000000" / "solution.json"
+    runs.record(solution_file, solution_data("add", "20250102_000000", "PASSED"))
+    assert [row["status"] for row in runs.history("add")] == ["PASSED", "FAILED"]
+
+
+def test_load_seeds_and_rebuild_reindexes(tmp_path):
+    solved = tmp_path / "solved"
+    write_solution(solved, "two_sum", "20250101_000000", "PASSED")
+    (solved / "broken_20250101_000000").mkdir()
+    (solved / "broken_20250101_000000" / "solution.json").write_text("{", encoding="utf-8")
+    index = Catalog(tmp_path / "catalog.db").load()
+    assert index.latest_passing("two_sum") is not None
+    assert index.history("broken") == []
+
+    write_solution(solved, "add", "20250101_000000", "FAILED")
+    assert Catalog(tmp_path / "catalog.db").load().history("add") == []
+    assert index.rebuild() == 2
+    assert len(index.history("add")) == 1
+
+
+def test_cli(runs, capsys):
+    assert catalog.main(["--catalog", str(runs.path), "latest", "two_sum"]) == 0
+    assert "20250102_000000  PASSED" in capsys.readouterr().out
+    assert catalog.main(["--catalog", str(runs.path), "latest", "add"]) == 1
+    assert catalog.main(["--catalog", str(runs.path), "failure-rate", "add"]) == 0
+    assert "2/2 failed  (100%)" in capsys.readouterr().out
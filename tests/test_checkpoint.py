@@ -0,0 +1,69 @@
+"""Tests for stage checkpoints (checkpoint.py)."""
+
+import asyncio
+
+import pytest
+
+from checkpoint import Checkpoints
+
+MODELS = {"analysis": "gpt-4o-mini", "tests": "gpt-4", "implementation": "gpt-4"}
+
+
+def checkpoints(tmp_path, models=MODELS, settings=None, prompt_version="v1"):
+    return Checkpoints("two_sum", models, prompt_version, settings, root=tmp_path)
+
+
+def test_stage_inputs_are_checked(tmp_path):
+    with pytest.raises(ValueError):
+        checkpoints(tmp_path).key("implementation", {"analysis": "a"})
+
+
+def test_key_covers_inputs_model_settings_and_prompts(tmp_path):
+    inputs = {"analysis": "a", "tests": "t"}
+    settings = {"implementation": {"context_budget": None, "candidates": 1}}
+    base = checkpoints(tmp_path, settings=settings).key("implementation", inputs)
+    assert base == checkpoints(tmp_path, settings=settings).key("implementation", dict(inputs))
+    variants = [
+        checkpoints(tmp_path, settings=settings).key("implementation", dict(inputs, tests="t2")),
+        checkpoints(tmp_path, dict(MODELS, implementation="gpt-4o-mini"),
+                    settings).key("implementation", inputs),
+        checkpoints(tmp_path, settings={"implementation": {"context_budget": 800, "candidates": 1}})
+        .key("implementation", inputs),
+        checkpoints(tmp_path, settings={"implementation": {"context_budget": None, "candidates": 3}})
+        .key("implementation", inputs),
+        checkpoints(tmp_path, settings=settings, prompt_version="v2").key("implementation", inputs),
+    ]
+    assert len({base, *variants}) == 6
+
+
+def test_routing_change_only_recomputes_the_rerouted_stage(tmp_path):
+    checkpoints(tmp_path).run("analysis", {"description": "d"}, lambda: "analysis")
+    checkpoints(tmp_path).run("tests", {"analysis": "analysis"}, lambda: "tests")
+    rerouted = checkpoints(tmp_path, dict(MODELS, tests="gpt-4o-mini"))
+    assert rerouted.run("analysis", {"description": "d"}, lambda: "recomputed") == "analysis"
+    assert rerouted.run("tests", {"analysis": "analysis"}, lambda: "recomputed") == "recomputed"
+
+
+def test_resumed_stage_reports_no_new_spend(tmp_path):
+    stats = {"model": "gpt-4o-mini", "prompt_tokens": 100, "completion_tokens": 50,
+             "cost": 0.02, "total": 3.0, "generation": 2.5, "cached": False}
+    checkpoints(tmp_path).run("analysis", {"description": "d"}, lambda: "analysis", dict(stats))
+    resumed = {}
+    output = checkpoints(tmp_path).run("analysis", {"description": "d"},
+                                       lambda: pytest.fail("recomputed"), resumed)
+    assert output == "analysis"
+    assert resumed["resumed"] is True and resumed["cached"] is False
+    assert resumed["model"] == "gpt-4o-mini"
+    assert resumed["prompt_tokens"] == resumed["completion_tokens"] == 0
+    assert resumed["cost"] == 0.0 and "generation" not in resumed
+
+
+def test_arun_resumes_and_clear_removes_checkpoints(tmp_path):
+    async def compute():
+        return "analysis"
+
+    store = checkpoints(tmp_path)
+    assert asyncio.run(store.arun("analysis", {"description": "d"}, compute)) == "analysis"
+    assert checkpoints(tmp_path).run("analysis", {"description": "d"}, lambda: "new") == "analysis"
+    store.clear()
+    assert checkpoints(tmp_path).run("analysis", {"description": "d"}, lambda: "new") == "new"
@@ -0,0 +1,78 @@
+"""Tests for the shared LLM client registry (clients.py)."""
+
+import pytest
+
+import clients
+from clients import ClientRegistry, stage_config
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("LLM_BACKEND", "OPENAI_TEMPERATURE", "PYTHON_DEVELOPER_MODEL",
+                 "PYTHON_DEVELOPER_TIMEOUT", "PYTHON_DEVELOPER_MAX_TOKENS",
+                 "PYTHON_DEVELOPER_TEMPERATURE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+
+def test_stage_config_applies_env_overrides(monkeypatch):
+    monkeypatch.setenv("OPENAI_TEMPERATURE", "0.2")
+    monkeypatch.setenv("PYTHON_DEVELOPER_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("PYTHON_DEVELOPER_MAX_TOKENS", "800")
+    config = stage_config("python_developer", "gpt-4o")
+    assert config == {"model": "gpt-4o-mini", "temperature": 0.2, "timeout": clients.DEFAULT_TIMEOUT,
+                      "max_tokens": 800, "max_retries": clients.DEFAULT_MAX_RETRIES}
+    assert stage_config("test_engineer", "gpt-4o")["model"] == "gpt-4o"
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "local")
+    with pytest.raises(ValueError):
+        clients.llm_backend()
+
+
+def test_chat_models_share_one_pooled_transport(monkeypatch):
+    pytest.importorskip("httpx")
+    pytest.importorskip("openai")
+    pytest.importorskip("langchain_community")
+    registry = ClientRegistry(pool_size=4)
+    developer = registry.chat_model("python_developer", "gpt-4o")
+    # Stages with the same settings share a model; other settings get their own.
+    assert registry.chat_model("test_engineer", "gpt-4o") is developer
+    monkeypatch.setenv("PYTHON_DEVELOPER_TIMEOUT", "30")
+    tuned = registry.chat_model("python_developer", "gpt-4o")
+    assert tuned is not developer
+    for llm in (developer, tuned):
+        assert llm.client._client._client is registry.http_client
+        assert llm.async_client._client._client is registry.http_async_client
+    # The rate limiter retries; the OpenAI client must not retry underneath it.
+    assert developer.client._client.max_retries == 0
+
+    http_client = registry.http_client
+    registry.close()
+    assert http_client.is_closed
+    assert registry.chat_model("test_engineer", "gpt-4o") is not developer
+
+
+def test_fake_backends_get_a_model_per_stage(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "synthetic")
+    registry = ClientRegistry()
+    developer = registry.chat_model("python_developer", "gpt-4o")
+    assert registry.chat_model("python_developer", "gpt-4o") is developer
+    assert registry.chat_model("test_engineer", "gpt-4o") is not developer
+    assert developer.stage == "python_developer"
+
+
+def test_agents_are_built_once_per_setting(monkeypatch):
+    from agents import get_agents
+
+    monkeypatch.setenv("LLM_BACKEND", "synthetic")
+    registry = ClientRegistry()
+    monkeypatch.setattr(clients, "_default_registry", registry)
+    agents = get_agents("gpt-4o")
+    assert get_agents("gpt-4o") is agents
+    assert agents["python_developer"].llm is registry.chat_model("python_developer", "gpt-4o")
+    uncached = get_agents("gpt-4o", uncached=("python_developer",))
+    assert uncached is not agents and uncached["python_developer"].cache is None
+    registry.close()
+    assert get_agents("gpt-4o") is not agents
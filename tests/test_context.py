@@ -0,0 +1,115 @@
+"""Tests for the implementation prompt context budget (context.py)."""
+
+import context
+from context import ContextBudget, analysis_requirements, estimate_tokens
+
+ANALYSIS = """\
+1. Problem Understanding:
+The task is to find two indices whose values add up to a target.
+
+2. Function Signature:
+- def two_sum(nums: List[int], target: int) -> List[int]
+- nums: List[int], the values to search
+
+3. Output:
+- Returns the two indices in increasing order
+
+4. Errors:
+- Raises ValueError when no pair adds up to the target
+
+5. Constraints:
+- 2 <= len(nums) <= 10^4
+- Must run in O(n) time
+
+6. Testing Strategy:
+- Returns the right pair for small inputs
+"""
+
+TESTS = """\
+import time
+import pytest
+from .solution import *
+
+def test_basic():
+    assert two_sum([2, 7, 11, 15], 9) == [0, 1]
+    assert two_sum([2, 7, 11, 15], 9) == [0, 1]
+
+def test_other_order():
+    assert two_sum([3, 2, 4], 6) == [1, 2]
+
+def test_no_pair():
+    with pytest.raises(ValueError) as e:
+        two_sum([1, 2], 10)
+    assert "no pair" in str(e.value)
+
+def test_timing():
+    start = time.time()
+    assert time.time() - start < 1
+""" + "".join(f"""
+def test_generated_{index}():
+    assert two_sum([{index}, 1], {index + 1}) == [0, 1]
+""" for index in range(200))
+
+
+def test_requirements_by_kind():
+    requirements = analysis_requirements(ANALYSIS)
+    assert requirements["signature"] == ["def two_sum(nums: List[int], target: int) -> List[int]"]
+    assert requirements["input"] == ["nums: List[int], the values to search"]
+    assert requirements["return"] == ["Returns the two indices in increasing order"]
+    assert requirements["exception"] == ["Raises ValueError when no pair adds up to the target"]
+    assert requirements["constraint"] == ["2 <= len(nums) <= 10^4", "Must run in O(n) time"]
+
+
+def test_testing_section_is_skipped():
+    requirements = analysis_requirements(ANALYSIS)
+    assert not any("small inputs" in line for lines in requirements.values() for line in lines)
+
+
+def test_assertions_are_grouped_by_test():
+    by_test, undefined = context.test_assertions(TESTS)
+    assert by_test["test_basic"] == ["assert two_sum([2, 7, 11, 15], 9) == [0, 1]"] * 2
+    assert by_test["test_no_pair"] == [
+        "with pytest.raises(ValueError) as e: two_sum([1, 2], 10); assert 'no pair' in str(e.value)"
+    ]
+    assert undefined == ["two_sum"]
+
+
+def test_prompt_that_fits_is_sent_unchanged():
+    text, report = ContextBudget(100_000).condense(ANALYSIS, TESTS)
+    assert text is None
+    assert report["context_ratio"] == 1.0
+
+
+def test_unparsable_tests_are_sent_unchanged():
+    text, report = ContextBudget(10).condense(ANALYSIS, "def test_broken(:\n")
+    assert text is None
+    assert report["context_tokens"] == report["context_original_tokens"]
+
+
+def test_condensed_prompt_fits_the_budget():
+    budget = ContextBudget(300)
+    text, report = budget.condense(ANALYSIS, TESTS)
+    assert estimate_tokens(text) <= 300
+    assert report["context_tokens"] == estimate_tokens(text)
+    assert report["context_ratio"] < 0.2
+    assert text.startswith("Functions under test: two_sum")
+    assert "Signatures:\n- def two_sum(nums: List[int], target: int) -> List[int]" in text
+    assert "Exception contract:" in text
+    # Duplicates and checks that never call the code are dropped.
+    assert text.count("assert two_sum([2, 7, 11, 15], 9) == [0, 1]") == 1
+    assert "time.time()" not in text
+    assert report["context_assertions"] == 203
+    assert 0 < report["context_assertions_kept"] < report["context_assertions"]
+
+
+def test_assertions_cover_every_test_before_repeating_one():
+    text, _ = ContextBudget(500).condense(ANALYSIS, TESTS)
+    assert "two_sum([3, 2, 4], 6)" in text
+    assert "pytest.raises(ValueError)" in text
+
+
+def test_sections_are_added_in_priority_order():
+    text, _ = ContextBudget(30).condense(ANALYSIS * 20)
+    assert "Signatures:" in text
+    assert "Constraints:" not in text
+    assert estimate_tokens(text) <= 30
@@ -0,0 +1,99 @@
+"""Tests for the offline LLM backends (fake_llm.py)."""
+
+import random
+
+import pytest
+
+import clients
+import fake_llm
+from agents import ResearchAnalyst
+from fake_llm import FakeChatModel, ReplayMiss, ReplayResponder, SyntheticResponder, parse_latency
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.mark.parametrize("spec, low, high", [
+    (None, 0.0, 0.0),
+    ("0.25", 0.25, 0.25),
+    ("fixed:0.5", 0.5, 0.5),
+    ("uniform:0.2,0.4", 0.2, 0.4),
+    ("normal:0.5,0.1", 0.0, 2.0),
+    ("lognormal:0.5,0.4", 0.0, 10.0),
+    ("exponential:0.5", 0.0, 20.0),
+])
+def test_latency_distributions(spec, low, high):
+    draw = parse_latency(spec)
+    samples = [draw(random.Random(seed)) for seed in range(50)]
+    assert all(low <= sample <= high for sample in samples)
+    assert samples == [draw(random.Random(seed)) for seed in range(50)]
+
+
+@pytest.mark.parametrize("spec", ["fast", "uniform:0.2", "gamma:1,2", "normal:a,b"])
+def test_invalid_latency_is_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_latency(spec)
+
+
+def test_answers_and_latencies_are_seeded_by_the_prompt():
+    messages = [Message("system"), Message("Add two numbers")]
+    model = FakeChatModel("research_analyst", "fake", SyntheticResponder(),
+                          latency="uniform:0,1")
+    same_seed = FakeChatModel("research_analyst", "fake", SyntheticResponder(),
+                              latency="uniform:0,1")
+    other_seed = FakeChatModel("research_analyst", "fake", SyntheticResponder(),
+                               latency="uniform:0,1", seed="1")
+    answer, latency = model._answer(messages)
+    assert "Add two numbers" in answer
+    assert same_seed._answer(messages) == (answer, latency)
+    assert other_seed._answer(messages)[1] != latency
+    assert model._answer([Message("system"), Message("Other")])[1] != latency
+
+
+def test_streams_reassemble_to_the_full_answer():
+    messages = [Message("system"), Message("Write the code")]
+    model = FakeChatModel("python_developer", "fake", SyntheticResponder())
+    chunks = [chunk.content for chunk in model.stream(messages)]
+    assert len(chunks) > 1
+    assert "".join(chunks) == model.generate([messages]).generations[0][0].text
+    assert "".join(chunks) == fake_llm.SYNTHETIC_CODE
+
+
+def test_replay_misses_are_errors():
+    responder = ReplayResponder({})
+    with pytest.raises(ReplayMiss):
+        responder.respond("research_analyst", [Message("system"), Message("unknown")])
+
+
+def test_synthetic_run_passes_and_can_be_replayed(tmp_path, monkeypatch):
+    import main
+    from runner import shutdown_test_runner
+
+    unsolved = tmp_path / "problems" / "unsolved"
+    unsolved.mkdir(parents=True)
+    problem_file = unsolved / "add.txt"
+    problem_file.write_text("Add up a list of numbers", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_BACKEND", "synthetic")
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setenv("LLM_FAKE_LATENCY", "0")
+    monkeypatch.setattr(clients, "_default_registry", clients.ClientRegistry())
+    try:
+        solution_file = main.process_problem(
+            problem_file, main.parse_args(["--no-checkpoints", "--no-benchmark"])
+        )
+    finally:
+        shutdown_test_runner()
+        clients.get_client_registry().close()
+
+    from blobstore import load_solution
+
+    solution = load_solution(solution_file)
+    assert solution["metadata"]["status"] == "PASSED"
+
+    recordings = fake_llm.build_recordings(tmp_path / "problems" / "solved")
+    analyst = ResearchAnalyst(llm=FakeChatModel("research_analyst", "fake",
+                                                ReplayResponder(recordings)), use_cache=False)
+    assert analyst.analyze_problem("Add up a list of numbers") == solution["problem"]["analysis"]
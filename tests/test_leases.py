@@ -0,0 +1,138 @@
+"""Tests for worker lease files (leases.py)."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from leases import LeaseManager, WorkerReport
+
+
+def manager(tmp_path, worker_id, ttl=60.0):
+    return LeaseManager(tmp_path / "leases", worker_id=worker_id, ttl=ttl)
+
+
+def age_lease(path, seconds):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["heartbeat"] -= seconds
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_live_lease_is_exclusive(tmp_path):
+    first, second = manager(tmp_path, "a"), manager(tmp_path, "b")
+    lease = first.claim("two_sum", "key")
+    assert lease is not None
+    assert second.claim("two_sum", "key") is None
+    assert second.holder("two_sum")["worker"] == "a"
+
+
+def test_release_frees_the_problem(tmp_path):
+    first, second = manager(tmp_path, "a"), manager(tmp_path, "b")
+    first.release(first.claim("two_sum", "key"))
+    assert first.holder("two_sum") is None
+    assert second.claim("two_sum", "key") is not None
+
+
+def test_is_expired():
+    lease = {"heartbeat": 100.0, "ttl": 10.0}
+    assert not LeaseManager.is_expired(lease, now=110.0)
+    assert LeaseManager.is_expired(lease, now=110.5)
+    # A lease still being written counts as live.
+    assert not LeaseManager.is_expired({}, now=1e12)
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    crashed, survivor = manager(tmp_path, "crashed", ttl=5.0), manager(tmp_path, "survivor")
+    lease = crashed.claim("two_sum", "key")
+    age_lease(lease.path, 6.0)
+    assert survivor.holder("two_sum") is None
+    reclaimed = survivor.claim("two_sum", "key")
+    assert reclaimed is not None
+    assert survivor.holder("two_sum")["worker"] == "survivor"
+    assert list(lease.path.parent.glob("*.expired")) == []
+
+
+def test_expired_lease_is_reclaimed_by_one_worker(tmp_path):
+    crashed = manager(tmp_path, "crashed", ttl=5.0)
+    age_lease(crashed.claim("two_sum", "key").path, 6.0)
+    workers = [manager(tmp_path, f"w{index}") for index in range(8)]
+    barrier = threading.Barrier(len(workers))
+    claims = []
+
+    def claim(worker):
+        barrier.wait()
+        claims.append(worker.claim("two_sum", "key"))
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    winners = [lease for lease in claims if lease is not None]
+    assert len(winners) == 1
+    assert workers[0].holder("two_sum")["worker"] == winners[0].data["worker"]
+
+
+def test_heartbeat_keeps_a_lease_alive(tmp_path):
+    holder = manager(tmp_path, "a", ttl=0.3)
+    lease = holder.claim("two_sum", "key")
+    holder.start_heartbeat()
+    try:
+        time.sleep(0.6)
+        assert manager(tmp_path, "b").claim("two_sum", "key") is None
+    finally:
+        holder.stop_heartbeat()
+    assert not lease.lost
+
+
+def test_renew_notices_a_lost_lease(tmp_path):
+    slow, other = manager(tmp_path, "slow", ttl=5.0), manager(tmp_path, "other")
+    lease = slow.claim("two_sum", "key")
+    age_lease(lease.path, 6.0)
+    assert other.claim("two_sum", "key") is not None
+    slow.renew()
+    assert lease.lost
+    # Releasing a lost lease leaves the new holder's file alone.
+    slow.release(lease)
+    assert other.holder("two_sum")["worker"] == "other"
+
+
+def test_renew_never_overwrites_a_reclaimed_lease(tmp_path):
+    slow = manager(tmp_path, "slow", ttl=5.0)
+    for _ in range(100):
+        other = manager(tmp_path, "other")
+        lease = slow.claim("two_sum", "key")
+        age_lease(lease.path, 6.0)
+        claims = []
+        threads = [threading.Thread(target=slow.renew),
+                   threading.Thread(target=lambda: claims.append(other.claim("two_sum", "key")))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        holder = slow.holder("two_sum")["worker"]
+        if claims[0] is not None:
+            assert holder == "other"
+            other.release(claims[0])
+        else:
+            assert holder == "slow" and not lease.lost
+        slow.release(lease)
+        assert slow.holder("two_sum") is None
+
+
+def test_worker_report(tmp_path):
+    report = WorkerReport("a")
+    report.record("two_sum", "PASSED", 1.0)
+    report.record("lru_cache", "FAILED", 2.0)
+    path = report.save(tmp_path)
+    summary = json.loads(path.read_text(encoding="utf-8"))
+    assert (summary["processed"], summary["passed"], summary["failed"]) == (2, 1, 1)
+    assert summary["busy"] == 3.0
+
+
+def test_utilization_is_per_job_slot():
+    report = WorkerReport("a", jobs=4)
+    report.started -= 10.0
+    report.record("two_sum", "PASSED", 20.0)
+    assert report.summary()["utilization"] == pytest.approx(0.5, rel=0.01)
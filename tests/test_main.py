@@ -0,0 +1,116 @@
+"""Tests for the pipeline orchestration helpers (main.py)."""
+
+from pathlib import Path
+
+import pytest
+
+import bench_startup
+import main
+
+CODE = "def solve(values):\n    return sum(values)\n"
+TESTS = "from .solution import *\n\ndef test_solve():\n    assert solve([1, 2]) == 3\n"
+PASSED = {"success": True, "status": "PASSED", "output": "", "tests": []}
+
+
+@pytest.fixture
+def test_runs(monkeypatch):
+    """Replace the test workers; records each checked run."""
+    runs = []
+
+    def run_tests(test_file):
+        runs.append(test_file)
+        return PASSED
+
+    monkeypatch.setattr(main, "run_tests", run_tests)
+    return runs
+
+
+def test_kept_speculative_code_is_not_tested_again(tmp_path, test_runs):
+    speculation = main.validate_candidate(CODE, TESTS)
+    assert speculation["results"]["success"] and len(test_runs) == 1
+    stages = {}
+    code, results, sections = main.validate_solution(tmp_path, "analysis", CODE, TESTS, stages,
+                                                     tested=speculation)
+    assert len(test_runs) == 1
+    assert (code, results) == (CODE, PASSED)
+    assert stages["run_tests"]["runs"] == 1
+    assert sections["precheck"]["verdict"] == "OK"
+    assert (tmp_path / "solution.py").read_text(encoding="utf-8") == CODE
+
+
+def test_a_run_of_other_code_is_not_reused(tmp_path, test_runs):
+    speculation = main.validate_candidate(CODE, TESTS)
+    other = CODE + "\n# reimplemented\n"
+    main.validate_solution(tmp_path, "analysis", other, TESTS, {}, tested=speculation)
+    assert len(test_runs) == 2
+
+
+def test_static_check_failures_skip_pytest(tmp_path, test_runs):
+    stages = {}
+    _, results, sections = main.validate_solution(tmp_path, "analysis", "def other():\n    pass\n",
+                                                  TESTS, stages)
+    assert test_runs == []
+    assert results["status"] == "FAILED" and sections["precheck"]["verdict"] == "REPAIR"
+    assert stages["precheck"]["failed_fast"] == 1 and stages["run_tests"]["runs"] == 0
+
+
+def test_jobs_bounds_problems_in_flight(monkeypatch):
+    import asyncio
+
+    in_flight, peak, done = [0], [0], []
+
+    async def process_problem_async(problem_file, semaphore, options=None, refresh=False):
+        async with semaphore:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            if problem_file == "p3":
+                raise RuntimeError("analysis failed")
+            done.append(problem_file)
+            return problem_file
+
+    monkeypatch.setattr(main, "process_problem_async", process_problem_async)
+    problems = [f"p{i}" for i in range(6)]
+    results = asyncio.run(main.process_problems_async(problems, main.parse_args(["--jobs", "2"])))
+    assert peak[0] == 2
+    # A failing problem does not stop the others.
+    assert sorted(done) == ["p0", "p1", "p2", "p4", "p5"]
+    assert isinstance(results[3], RuntimeError) and results[5] == "p5"
+
+
+def test_jobs_must_be_positive():
+    with pytest.raises(SystemExit):
+        main.parse_args(["--jobs", "0"])
+
+
+@pytest.fixture
+def problems_dir(tmp_path, monkeypatch):
+    """A working directory with one new and one PASSED problem."""
+    unsolved = tmp_path / "problems" / "unsolved"
+    unsolved.mkdir(parents=True)
+    (unsolved / "add.txt").write_text("Add two numbers", encoding="utf-8")
+    (unsolved / "two_sum.txt").write_text("Find two numbers with a given sum", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    key = main.hash_problem_file(unsolved / "two_sum.txt")
+    main.Manifest().load(main.PROMPT_VERSION).record(key, "two_sum", "problems/solved/two_sum_1",
+                                                     "PASSED")
+    return tmp_path
+
+
+def test_fast_commands_do_not_run_the_pipeline(problems_dir, capsys):
+    main.main(["--list"])
+    assert capsys.readouterr().out.split() == ["add", "two_sum"]
+    main.main(["--status"])
+    status = dict(line.split(None, 1) for line in capsys.readouterr().out.splitlines())
+    assert status["add"].split()[0] == "NEW" and status["two_sum"].split()[0] == "PASSED"
+    main.main(["--dry-run"])
+    assert capsys.readouterr().out.split()[-1] == "add"
+    assert not (problems_dir / "problems" / "solved").exists()
+
+
+@pytest.mark.parametrize("statement", bench_startup.COMMANDS.values())
+def test_fast_commands_skip_heavy_imports(problems_dir, monkeypatch, statement):
+    monkeypatch.setenv("PYTHONPATH", str(Path(main.__file__).parent))
+    _, heavy = bench_startup.run_probe(statement)
+    assert heavy == []
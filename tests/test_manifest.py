@@ -0,0 +1,51 @@
+"""Tests for the solved-problem manifest (manifest.py)."""
+
+import json
+
+from manifest import Manifest, problem_hash
+
+
+def write_solution(solved_dir, name, timestamp, status, description="Add two numbers"):
+    solution_dir = solved_dir / f"{name}_{timestamp}"
+    solution_dir.mkdir(parents=True)
+    (solution_dir / "solution.json").write_text(json.dumps({
+        "metadata": {"problem_name": name, "timestamp": timestamp, "status": status},
+        "problem": {"description": description, "analysis": "analysis"},
+        "solution": {"code": "", "tests": ""}
+    }), encoding="utf-8")
+    return solution_dir
+
+
+def test_seeded_entries_do_not_claim_the_configured_model(tmp_path):
+    write_solution(tmp_path / "solved", "add", "20250101_000000", "PASSED")
+    manifest = Manifest(tmp_path / "manifest.json").load("v1")
+    assert manifest.needs_processing(problem_hash("Add two numbers", "gpt-4", "v1"))
+    entry = manifest.entries[problem_hash("Add two numbers", None, "v1")]
+    assert entry["status"] == "PASSED" and entry["problem_name"] == "add"
+    assert (tmp_path / "manifest.json").exists()
+
+
+def test_latest_seeded_run_wins(tmp_path):
+    write_solution(tmp_path / "solved", "add", "20250101_000000", "PASSED")
+    latest = write_solution(tmp_path / "solved", "add", "20250102_000000", "FAILED")
+    manifest = Manifest(tmp_path / "manifest.json").load("v1")
+    entry = manifest.entries[problem_hash("Add two numbers", None, "v1")]
+    assert entry["solution_dir"] == latest.as_posix() and entry["status"] == "FAILED"
+
+
+def test_read_only_load_does_not_write(tmp_path):
+    write_solution(tmp_path / "solved", "add", "20250101_000000", "PASSED")
+    manifest = Manifest(tmp_path / "manifest.json").load("v1", save=False)
+    assert manifest.entries
+    assert not (tmp_path / "manifest.json").exists()
+
+
+def test_record_and_status_checks(tmp_path):
+    key = problem_hash("Add two numbers", "gpt-4", "v1")
+    manifest = Manifest(tmp_path / "manifest.json").load("v1")
+    assert manifest.needs_processing(key) and not manifest.failed_before(key)
+    manifest.record(key, "add", tmp_path / "solved" / "add_1", "FAILED")
+    assert manifest.needs_processing(key) and manifest.failed_before(key)
+    other = Manifest(tmp_path / "manifest.json").load("v1")
+    other.record(key, "add", tmp_path / "solved" / "add_2", "PASSED")
+    assert not manifest.reload().needs_processing(key)
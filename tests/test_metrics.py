@@ -0,0 +1,89 @@
+"""Tests for stage metrics and their Prometheus export (metrics.py)."""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import MetricsRegistry, count_request, stage_cost, summarize, track_requests
+
+
+def problem_stages():
+    return {
+        "analysis": {"total": 0.4, "model": "gpt-4o", "prompt_tokens": 1000,
+                     "completion_tokens": 200, "cost": 0.008, "cached": False},
+        "implementation": {"total": 2.0, "model": "gpt-4o", "prompt_tokens": 3000,
+                           "completion_tokens": 600, "retries": 1, "rate_limited": 1,
+                           "throttled": 0.5, "cost": 0.024},
+        "run_tests": {"total": 0.3},
+        "save_solution": {"total": 0.01, "bytes_written": 4096}
+    }
+
+
+def test_stage_cost_uses_model_prices(monkeypatch):
+    monkeypatch.delenv("LLM_PRICES", raising=False)
+    stats = {"model": "gpt-4o", "prompt_tokens": 1000, "completion_tokens": 1000}
+    assert stage_cost(stats) == pytest.approx(0.02)
+    assert stage_cost(dict(stats, model="unknown-model")) == 0.0
+    monkeypatch.setenv("LLM_PRICES", '{"unknown-model": [1, 2]}')
+    assert stage_cost(dict(stats, model="unknown-model")) == pytest.approx(3.0)
+
+
+def test_request_counter_is_scoped_to_its_context():
+    count_request()
+    with track_requests() as outer:
+        count_request()
+        with track_requests() as inner:
+            count_request()
+            count_request()
+        count_request()
+    assert (outer.count, inner.count) == (2, 2)
+
+
+def test_summary_totals_every_stage():
+    summary = summarize(problem_stages())
+    assert summary["stage_time"] == pytest.approx(2.71)
+    assert summary["prompt_tokens"] == 4000 and summary["completion_tokens"] == 800
+    assert summary["cost"] == pytest.approx(0.032)
+    assert (summary["retries"], summary["rate_limited"], summary["bytes_written"]) == (1, 1, 4096)
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.record_problem(problem_stages(), "PASSED")
+    registry.record_problem({"analysis": {"total": 0.02, "cached": True}}, "FAILED")
+    lines = registry.render_prometheus().splitlines()
+    assert "# TYPE pipeline_problems_total counter" in lines
+    assert 'pipeline_problems_total{status="PASSED"} 1' in lines
+    assert 'pipeline_problems_total{status="FAILED"} 1' in lines
+    assert 'pipeline_tokens_total{kind="prompt",stage="implementation"} 3000' in lines
+    assert 'pipeline_retries_total{stage="implementation"} 1' in lines
+    assert 'pipeline_cache_hits_total{stage="analysis"} 1' in lines
+    assert 'pipeline_bytes_written_total{stage="save_solution"} 4096' in lines
+    # Histogram buckets are cumulative and end in +Inf.
+    assert "# TYPE pipeline_stage_duration_seconds histogram" in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="analysis",le="0.01"} 0' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="analysis",le="0.05"} 1' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="analysis",le="0.5"} 2' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="analysis",le="+Inf"} 2' in lines
+    assert 'pipeline_stage_duration_seconds_count{stage="analysis"} 2' in lines
+    assert 'pipeline_stage_duration_seconds_sum{stage="analysis"} 0.42' in lines
+
+
+def test_metrics_file_and_endpoint(tmp_path):
+    registry = MetricsRegistry()
+    registry.record_problem(problem_stages(), "PASSED")
+    path = tmp_path / "metrics.prom"
+    registry.write_file(path)
+    assert path.read_text(encoding="utf-8") == registry.render_prometheus()
+
+    server = registry.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.read().decode("utf-8") == registry.render_prometheus()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
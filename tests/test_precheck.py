@@ -0,0 +1,133 @@
+"""Tests for the static check run before pytest (precheck.py)."""
+
+import ast
+
+import pytest
+
+from precheck import check_results, collectable_tests, module_exports, static_check
+
+CODE = "from typing import List\n\ndef solve(values: List[int]) -> int:\n    return sum(values)\n"
+TESTS = "import pytest\nfrom .solution import *\n\ndef test_solve():\n    assert solve([1, 2]) == 3\n"
+
+
+@pytest.fixture
+def check(tmp_path):
+    def run(code=CODE, tests=TESTS):
+        code_file, test_file = tmp_path / "solution.py", tmp_path / "test_solution.py"
+        code_file.write_text(code, encoding="utf-8")
+        test_file.write_text(tests, encoding="utf-8")
+        return static_check(code_file, test_file)
+    return run
+
+
+def kinds(report):
+    return [(problem["file"], problem["kind"]) for problem in report["problems"]]
+
+
+def test_valid_solution_is_ok(check):
+    report = check()
+    assert report["verdict"] == "OK"
+    assert report["problems"] == []
+    assert report["collectable_tests"] == 1
+
+
+def test_solution_syntax_error_is_repaired(check):
+    report = check(code="def solve(values)\n    return 0\n")
+    assert report["verdict"] == "REPAIR"
+    assert kinds(report) == [("solution.py", "syntax")]
+    assert report["problems"][0]["line"] == 1
+
+
+def test_missing_function_is_repaired(check):
+    report = check(code="def other(values):\n    return 0\n")
+    assert report["verdict"] == "REPAIR"
+    assert kinds(report) == [("solution.py", "missing_name")]
+    assert "solve" in report["problems"][0]["message"]
+
+
+def test_explicitly_imported_name_must_exist(check):
+    tests = "from .solution import solve, helper\n\ndef test_solve():\n    assert solve([]) == helper()\n"
+    report = check(tests=tests)
+    assert report["verdict"] == "REPAIR"
+    assert "'helper'" in report["problems"][0]["message"]
+
+
+def test_private_names_are_not_star_exported(check):
+    code = "def _solve(values):\n    return sum(values)\n"
+    tests = "from .solution import *\n\ndef test_solve():\n    assert _solve([1]) == 1\n"
+    assert check(code=code, tests=tests)["verdict"] == "REPAIR"
+
+
+def test_dunder_all_limits_star_exports(check):
+    code = "__all__ = ['solve']\n\ndef solve(values):\n    return 0\n\ndef helper():\n    pass\n"
+    tests = "from .solution import *\n\ndef test_solve():\n    assert solve([]) == helper()\n"
+    assert kinds(check(code=code, tests=tests)) == [("solution.py", "missing_name")]
+
+
+def test_unknowable_exports_are_not_checked(check):
+    code = "from typing import *\n\ndef solve(values):\n    return 0\n"
+    tests = "from .solution import *\n\ndef test_solve():\n    assert anything([]) == 0\n"
+    assert check(code=code, tests=tests)["verdict"] == "OK"
+
+
+def test_test_syntax_error_is_rejected(check):
+    report = check(tests="def test_solve(:\n    pass\n")
+    assert report["verdict"] == "REJECT"
+    assert kinds(report) == [("test_solution.py", "syntax")]
+
+
+def test_no_collectable_tests_is_rejected(check):
+    report = check(tests="from .solution import *\n\ndef check_solve():\n    assert solve([]) == 0\n")
+    assert report["verdict"] == "REJECT"
+    assert kinds(report) == [("test_solution.py", "no_tests")]
+
+
+def test_nested_tests_are_rejected(check):
+    tests = TESTS + "\ndef test_outer():\n    def test_inner():\n        assert solve([]) == 0\n"
+    report = check(tests=tests)
+    assert report["verdict"] == "REJECT"
+    assert kinds(report) == [("test_solution.py", "nested_tests")]
+    assert report["nested_tests"] == ["test_outer.test_inner"]
+
+
+def test_stdlib_module_without_import_is_rejected(check):
+    tests = TESTS + "\ndef test_fast():\n    start = time.perf_counter()\n    solve([])\n"
+    report = check(tests=tests)
+    assert report["verdict"] == "REJECT"
+    assert kinds(report) == [("test_solution.py", "missing_import")]
+
+
+def test_test_problems_outrank_solution_problems(check):
+    report = check(code="def solve(:\n", tests="def check():\n    pass\n")
+    assert report["verdict"] == "REJECT"
+
+
+def test_collectable_tests():
+    tree = ast.parse(
+        "def test_a(): pass\n"
+        "async def test_b(): pass\n"
+        "def helper(): pass\n"
+        "class TestGroup:\n    def test_c(self): pass\n    def helper(self): pass\n"
+        "class TestWithInit:\n    def __init__(self): pass\n    def test_d(self): pass\n"
+        "def test_outer():\n"
+        "    def test_called(): pass\n"
+        "    def test_forgotten(): pass\n"
+        "    test_called()\n"
+    )
+    collected, nested = collectable_tests(tree)
+    assert collected == ["test_a", "test_b", "TestGroup::test_c", "test_outer"]
+    assert nested == ["test_outer.test_forgotten"]
+
+
+def test_module_exports():
+    assert module_exports(ast.parse(CODE)) == {"List", "solve"}
+    assert module_exports(ast.parse("if True:\n    X = 1\n_y = 2\n")) == {"X"}
+    assert module_exports(ast.parse("__all__ = names()\n")) is None
+
+
+def test_check_results_shape(check):
+    results = check_results(check(tests="def check():\n    pass\n"))
+    assert results["success"] is False and results["status"] == "REJECTED"
+    assert results["tests"][0]["name"] == "static check: test_solution.py no_tests"
+    assert results["tests"][0]["duration"] is None
+    assert check_results(check(code="x = 1\n"))["status"] == "FAILED"
@@ -0,0 +1,217 @@
+"""Tests for rate limiting, adaptive concurrency and retries (ratelimit.py)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fake_openai import FakeOpenAIServer
+from ratelimit import AIMDConcurrency, RateLimiter, TokenBucket, is_retryable, retry_after
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+def test_token_bucket_starts_full_and_charges_debt():
+    bucket = TokenBucket(60)  # one unit a second
+    assert bucket.reserve(60, now=bucket._updated) == 0.0
+    assert bucket.reserve(3, now=bucket._updated) == pytest.approx(3.0)
+    # Waiters queue behind earlier reservations.
+    assert bucket.reserve(1, now=bucket._updated) == pytest.approx(4.0)
+
+
+def test_token_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(60)
+    start = bucket._updated
+    bucket.reserve(60, now=start)
+    assert bucket.reserve(10, now=start + 10) == 0.0
+    bucket._refill(start + 1000)
+    assert bucket.level == 60
+
+
+def test_token_bucket_settles_against_real_usage():
+    bucket = TokenBucket(600)
+    now = bucket._updated
+    bucket.reserve(600, now)
+    bucket.adjust(500, now)  # the call used 100 of the 600 it reserved
+    assert bucket.reserve(500, now) == 0.0
+    # Oversized requests are capped at the capacity instead of waiting forever.
+    assert bucket.reserve(10_000, now) == pytest.approx(60.0)
+
+
+def test_aimd_grows_one_per_window_while_in_use():
+    aimd = AIMDConcurrency(initial=4, maximum=10)
+    for _ in range(4):
+        aimd.in_flight = int(aimd.limit) - 1
+        aimd.on_success(time.monotonic(), 0.1)
+    assert aimd.limit == pytest.approx(5.0, abs=0.1)
+
+
+def test_aimd_does_not_grow_when_idle():
+    aimd = AIMDConcurrency(initial=4)
+    for _ in range(20):
+        aimd.on_success(time.monotonic(), 0.1)
+    assert aimd.limit == 4
+
+
+def test_aimd_halves_once_per_burst_of_rate_limits():
+    aimd = AIMDConcurrency(initial=8)
+    started = time.monotonic()
+    for _ in range(5):
+        aimd.on_rate_limited(started)
+    assert aimd.limit == 4
+    aimd.on_rate_limited(time.monotonic())
+    assert aimd.limit == 2
+    for _ in range(3):
+        aimd.on_rate_limited(time.monotonic())
+    assert aimd.limit == 1
+
+
+def test_aimd_cuts_on_latency_spikes():
+    aimd = AIMDConcurrency(initial=8, latency_factor=3.0)
+    for _ in range(5):
+        aimd.on_success(time.monotonic(), 0.1)
+    aimd.on_success(time.monotonic(), 1.0)
+    assert aimd.limit == 6
+    assert aimd.latency == pytest.approx(0.1)
+
+
+def test_error_classification():
+    assert is_retryable(APIError(429)) and is_retryable(APIError(503))
+    assert not is_retryable(APIError(400))
+    assert is_retryable(APITimeoutError())
+    assert not is_retryable(ValueError())
+    assert retry_after(APIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(APIError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(APIError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) is None
+
+
+def test_call_retries_transient_errors():
+    limiter = RateLimiter(max_retries=2, backoff_base=0.01)
+    failures = [APIError(500), APITimeoutError()]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_call_gives_up_on_permanent_errors_and_exhausted_retries():
+    limiter = RateLimiter(max_retries=1, backoff_base=0.01)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise APIError(400)
+
+    with pytest.raises(APIError):
+        limiter.call(bad_request)
+    assert len(calls) == 1
+
+    def rate_limited():
+        calls.append(1)
+        raise APIError(429, {"retry-after-ms": "10"})
+
+    stats = {}
+    with pytest.raises(APIError):
+        limiter.call(rate_limited, stats=stats)
+    assert len(calls) == 3
+    assert stats["rate_limited"] == 2 and limiter.rate_limited == 2
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_call_holds_in_flight_calls_to_the_limit():
+    limiter = RateLimiter(concurrency=3, max_concurrency=3)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+        return True
+
+    threads = [threading.Thread(target=limiter.call, args=(work,)) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 3
+    assert len(peak) == 12
+
+
+def test_acall_holds_in_flight_calls_to_the_limit():
+    limiter = RateLimiter(concurrency=2, max_concurrency=2)
+    running = []
+    peak = []
+
+    async def work():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.pop()
+        return True
+
+    async def run():
+        return await asyncio.gather(*(limiter.acall(work) for _ in range(8)))
+
+    assert asyncio.run(run()) == [True] * 8
+    assert max(peak) == 2
+
+
+def test_request_bucket_throttles_calls():
+    limiter = RateLimiter(requests_per_minute=600)  # capacity 600, ten a second
+    limiter.requests.level = 0.0
+    stats = {}
+    started = time.monotonic()
+    limiter.call(lambda: None, stats=stats)
+    assert time.monotonic() - started >= 0.09
+    assert stats["throttled"] >= 0.09
+
+
+def test_limiter_backs_off_against_a_rate_limited_server():
+    httpx = pytest.importorskip("httpx")
+    OpenAI = pytest.importorskip("openai").OpenAI
+
+    server = FakeOpenAIServer(latency=0.05, max_concurrent=2, retry_after=0.05).start()
+    try:
+        client = OpenAI(base_url=server.url, api_key="test", max_retries=0,
+                        http_client=httpx.Client())
+        limiter = RateLimiter(concurrency=8, max_concurrency=8, max_retries=10,
+                              backoff_base=0.02, backoff_cap=0.2)
+        results = []
+
+        def complete():
+            response = limiter.call(lambda: client.chat.completions.create(
+                model="gpt-4", messages=[{"role": "user", "content": "hi"}]
+            ))
+            results.append(response.choices[0].message.content)
+
+        threads = [threading.Thread(target=complete) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+    finally:
+        server.stop()
+    assert len(results) == 16
+    assert limiter.rate_limited > 0
+    assert limiter.concurrency.limit < 8
+    assert server.stats["peak_concurrency"] <= 2
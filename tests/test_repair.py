@@ -0,0 +1,109 @@
+"""Tests for the bounded repair loop (repair.py)."""
+
+from agents import PythonDeveloper
+from context import estimate_tokens
+from fake_llm import FakeChatModel
+import repair
+from repair import RepairLoop, parse_failures
+
+BROKEN = "def solve(values):\n    return 0"
+FIXED = "def solve(values):\n    return sum(values)"
+
+
+class RecordingResponder:
+    """Answers every prompt with the fixed code and keeps the prompts it saw."""
+
+    def __init__(self, code=FIXED):
+        self.code = code
+        self.prompts = []
+
+    def respond(self, stage, messages):
+        self.prompts.append(messages[1].content)
+        return f"```python\n{self.code}\n```"
+
+
+def developer(responder):
+    llm = FakeChatModel("python_developer", "fake-model", responder)
+    return PythonDeveloper(use_cache=False, llm=llm)
+
+
+def failed_run():
+    return {
+        "success": False,
+        "status": "FAILED",
+        "output": "",
+        "tests": [
+            {"name": "test_sum", "outcome": "passed", "duration": 0.0, "message": None},
+            {"name": "test_pairs", "outcome": "failed", "duration": 0.0,
+             "message": "assert 0 == 3"},
+            {"name": "test_empty_list", "outcome": "skipped", "duration": 0.0, "message": None},
+            {"name": "test_negative", "outcome": "error", "duration": 0.0,
+             "message": "TypeError: bad operand"},
+        ],
+    }
+
+
+def test_prompt_contains_only_the_failing_tests():
+    responder = RecordingResponder()
+    loop = RepairLoop(developer(responder))
+    retested = []
+
+    def retest(code):
+        retested.append(code)
+        return {"success": True, "status": "PASSED", "output": "", "tests": []}
+
+    code, results = loop.run(BROKEN, failed_run(), retest)
+    assert (code, results["success"], loop.outcome) == (FIXED, True, "PASSED")
+    assert retested == [FIXED]
+    [prompt] = responder.prompts
+    assert "test_pairs:\nassert 0 == 3" in prompt
+    assert "test_negative:\nTypeError: bad operand" in prompt
+    assert "test_sum" not in prompt and "test_empty_list" not in prompt
+    assert BROKEN in prompt
+    assert loop.attempts[0]["failing_tests"] == ["test_pairs", "test_negative"]
+
+
+def test_stops_before_a_prompt_over_the_token_budget():
+    responder = RecordingResponder()
+    agent = developer(responder)
+    failures = repair.test_failures(failed_run())
+    estimate = estimate_tokens(agent.system_prompt) + estimate_tokens(BROKEN) + sum(
+        estimate_tokens(failure["test"] + failure["message"]) for failure in failures
+    )
+    loop = RepairLoop(agent, max_iterations=3, max_tokens=estimate - 1)
+    code, results = loop.run(BROKEN, failed_run(), _no_retest)
+    assert (code, results["success"]) == (BROKEN, False)
+    assert loop.outcome == "TOKEN_BUDGET_EXHAUSTED"
+    assert responder.prompts == [] and loop.attempts == []
+
+
+def test_budget_counts_tokens_used_by_earlier_attempts():
+    still_failing = failed_run()
+    responder = RecordingResponder(code=FIXED)
+    first = RepairLoop(developer(responder), max_iterations=1)
+    first.run(BROKEN, failed_run(), lambda code: still_failing)
+    used = first.tokens_used
+    assert used > 0
+
+    responder = RecordingResponder(code=FIXED)
+    loop = RepairLoop(developer(responder), max_iterations=5, max_tokens=used + used // 2)
+    loop.run(BROKEN, failed_run(), lambda code: still_failing)
+    assert loop.outcome == "TOKEN_BUDGET_EXHAUSTED"
+    assert len(loop.attempts) == 1 and loop.tokens_used == used
+    assert loop.summary()["tokens_used"] == used
+
+
+def test_parse_failures_reads_names_and_assertion_lines():
+    output = (
+        "________________________________ test_pairs ________________________________\n"
+        "    def test_pairs():\n"
+        ">       assert solve([1, 2]) == 3\n"
+        "E       assert 0 == 3\n"
+        "FAILED test_solution.py::test_pairs FAILED\n"
+        "test_solution.py::test_sum PASSED\n"
+    )
+    assert parse_failures(output) == [{"test": "test_pairs", "message": "assert 0 == 3"}]
+
+
+def _no_retest(code):
+    raise AssertionError("retest must not run once the budget is exhausted")
@@ -0,0 +1,159 @@
+"""Tests for fast/strong model routing and escalation (routing.py)."""
+
+import json
+
+import pytest
+
+from routing import ModelRouter, classify_problem, main
+
+VALID = "def solve(values):\n    return sum(values)\n"
+INVALID = "def solve(values)\n    return sum(values)\n"
+
+
+class FakeAgent:
+    """Agent answering every stage with fixed output and recording its calls."""
+
+    def __init__(self, model_name, output=VALID, error=None):
+        self.model_name = model_name
+        self.output = output
+        self.error = error
+        self.calls = 0
+
+    def _answer(self, stats):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        stats.update(model=self.model_name, prompt_tokens=1000, completion_tokens=500,
+                     generation=1.0, total=1.0, cost=0.01)
+        return self.output
+
+    def create_tests(self, analysis, stats):
+        return self._answer(stats)
+
+    def implement_solution(self, analysis, tests, stats):
+        return self._answer(stats)
+
+
+def agent_teams(**strong_overrides):
+    teams = {}
+    for model in ("gpt-4o-mini", "gpt-4o"):
+        teams[model] = {name: FakeAgent(model)
+                        for name in ("research_analyst", "test_engineer", "python_developer")}
+    teams["gpt-4o"].update(strong_overrides)
+    return teams
+
+
+def new_router(description="Return the sum of a list of numbers.", teams=None, stages=None):
+    teams = teams or agent_teams()
+    return ModelRouter(description, "gpt-4o-mini", "gpt-4o", teams.__getitem__,
+                       {} if stages is None else stages)
+
+
+@pytest.mark.parametrize("description, difficulty", [
+    ("Return the sum of a list of numbers.", "simple"),
+    ("Find the shortest path between two nodes of a weighted graph.", "complex"),
+    ("Walk down the street and count the houses.", "simple"),
+    ("Count the words. " * 60, "complex"),
+])
+def test_classify_problem(description, difficulty):
+    assert classify_problem(description)[0] == difficulty
+
+
+def test_simple_problems_stay_on_the_fast_model():
+    router = new_router()
+    assert {name: agent.model_name for name, agent in router.agents.items()} == {
+        "research_analyst": "gpt-4o-mini", "test_engineer": "gpt-4o-mini",
+        "python_developer": "gpt-4o-mini"}
+
+
+def test_complex_problems_only_analyse_on_the_fast_model():
+    router = new_router("Count the islands in a grid.")
+    assert router.agents["research_analyst"].model_name == "gpt-4o-mini"
+    assert router.agents["test_engineer"].model_name == "gpt-4o"
+    assert router.agents["python_developer"].model_name == "gpt-4o"
+
+
+def test_invalid_fast_output_is_regenerated_on_the_strong_model():
+    stages = {}
+    router = new_router(stages=stages)
+    tests, code = router.check_outputs("analysis", INVALID, INVALID)
+    assert (tests, code) == (VALID, VALID)
+    assert [(e["stage"], e["reason"], e["to"]) for e in router.escalations] == [
+        ("tests", "invalid_tests", "gpt-4o"), ("implementation", "invalid_code", "gpt-4o")]
+    assert stages["escalated_tests"]["model"] == "gpt-4o"
+    assert "escalated_implementation" in stages
+
+
+def test_valid_fast_output_is_kept():
+    router = new_router()
+    assert router.check_outputs("analysis", VALID, VALID) == (VALID, VALID)
+    assert router.escalations == []
+
+
+def test_pinned_stages_are_never_escalated():
+    teams = agent_teams(python_developer=FakeAgent("gpt-4o-mini"))
+    router = new_router(teams=teams)
+    assert router.check_outputs("analysis", VALID, INVALID) == (VALID, INVALID)
+    failed = {"success": False}
+    assert router.run("analysis", VALID, VALID, failed, lambda code: {"success": True}) == (
+        VALID, failed)
+    assert router.escalations == []
+
+
+def test_failing_code_is_reimplemented_once():
+    router = new_router()
+    retested = []
+
+    def retest(code):
+        retested.append(code)
+        return {"success": False}
+
+    router.run("analysis", VALID, "code", {"success": False}, retest)
+    router.run("analysis", VALID, "code", {"success": False}, retest)
+    assert retested == [VALID]
+    assert [e["reason"] for e in router.escalations] == ["tests_failed"]
+    assert router.run("analysis", VALID, "code", {"success": True}, retest)[1] == {"success": True}
+
+
+def test_failed_escalation_keeps_the_fast_output():
+    teams = agent_teams(python_developer=FakeAgent("gpt-4o", error=RuntimeError("timeout")))
+    router = new_router(teams=teams)
+    results = {"success": False}
+    assert router.run("analysis", VALID, "code", results, lambda code: {}) == ("code", results)
+    assert router.escalations[0]["error"] == "timeout"
+
+
+def test_summary_estimates_savings():
+    stages = {}
+    router = new_router(stages=stages)
+    for stage in ("analysis", "tests", "implementation"):
+        FakeAgent("gpt-4o-mini")._answer(stages.setdefault(stage, {}))
+        stages[stage]["cost"] = 0.001
+    stages["tests"]["cached"] = True
+    summary = router.summary()
+    assert summary["models"] == {"analysis": "gpt-4o-mini", "tests": "gpt-4o-mini",
+                                 "implementation": "gpt-4o-mini"}
+    assert not summary["escalated"]
+    # gpt-4o prices 1000 prompt and 500 completion tokens at $0.0125; cached stages save nothing.
+    assert summary["cost_saved"] == pytest.approx(2 * (0.0125 - 0.001))
+
+    router.check_outputs("analysis", VALID, INVALID)
+    assert router.summary()["cost_saved"] == pytest.approx(2 * (0.0125 - 0.001) - 0.01)
+
+
+def test_report(tmp_path, capsys):
+    for i, (difficulty, escalations) in enumerate([
+        ("simple", []),
+        ("simple", [{"stage": "implementation", "reason": "tests_failed"}]),
+        ("complex", []),
+    ]):
+        solution_dir = tmp_path / f"problem_{i}"
+        solution_dir.mkdir()
+        (solution_dir / "solution.json").write_text(json.dumps({"routing": {
+            "difficulty": difficulty, "escalated": bool(escalations), "escalations": escalations,
+            "cost_saved": 0.01, "latency_saved": None}}), encoding="utf-8")
+    assert main(["--solved", str(tmp_path), "report"]) == 0
+    out = capsys.readouterr().out
+    assert "simple       2 runs      1 escalated (50%)" in out
+    assert "implementation: tests_failed" in out
+    assert "cost saved    $0.0300" in out
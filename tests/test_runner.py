@@ -0,0 +1,231 @@
+"""Tests for the process-pool test runner and its sandbox (runner.py)."""
+
+import json
+import os
+import signal
+import time
+
+import pytest
+
+import runner
+from runner import SandboxLimits, _run_sandboxed
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the sandbox needs fork")
+
+
+def answer():
+    return 42
+
+
+def raise_error():
+    raise ValueError("bad input")
+
+
+def sleep_forever():
+    time.sleep(60)
+
+
+def spin_past_the_hard_cpu_limit():
+    # Code that survives SIGXCPU is killed by the kernel at the hard limit.
+    signal.signal(signal.SIGXCPU, signal.SIG_IGN)
+    while True:
+        pass
+
+
+def allocate_until_memory_error():
+    chunks = []
+    while True:
+        chunks.append(b"x" * (16 * 1024 * 1024))
+
+
+def fill_memory_then_get_killed():
+    data = b"x" * (98 * 1024 * 1024)
+    os.kill(os.getpid(), signal.SIGKILL)
+    return len(data)
+
+
+def get_killed():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def get_signalled():
+    os.kill(os.getpid(), signal.SIGUSR1)
+
+
+def test_result_is_returned():
+    assert _run_sandboxed(answer, (), SandboxLimits(timeout=10)) == ("OK", 42, [])
+
+
+def test_exception_is_reported_as_error():
+    status, value, _ = _run_sandboxed(raise_error, (), SandboxLimits(timeout=10))
+    assert (status, value) == ("ERROR", "ValueError: bad input")
+
+
+def test_wall_clock_limit():
+    started = time.monotonic()
+    status, value, _ = _run_sandboxed(sleep_forever, (), SandboxLimits(timeout=0.5))
+    assert status == "TIMEOUT" and "wall-clock" in value
+    assert time.monotonic() - started < 5
+
+
+def test_sigkill_at_the_hard_cpu_limit_is_a_timeout():
+    status, value, _ = _run_sandboxed(spin_past_the_hard_cpu_limit, (),
+                                      SandboxLimits(timeout=20, cpu_time=1))
+    assert status == "TIMEOUT" and "CPU-time" in value
+
+
+def test_memory_error_under_the_cap_is_oom():
+    status, _, _ = _run_sandboxed(allocate_until_memory_error, (),
+                                  SandboxLimits(timeout=20, memory_mb=128))
+    assert status == "OOM"
+
+
+def test_sigkill_near_the_memory_cap_is_oom():
+    status, value, _ = _run_sandboxed(fill_memory_then_get_killed, (),
+                                      SandboxLimits(timeout=20, memory_mb=100))
+    assert status == "OOM" and "100 MB limit" in value
+
+
+def test_other_sigkills_are_crashes():
+    status, value, _ = _run_sandboxed(get_killed, (), SandboxLimits(timeout=10))
+    assert status == "CRASHED" and "SIGKILL" in value
+
+
+def test_other_signals_are_crashes():
+    status, value, _ = _run_sandboxed(get_signalled, (), SandboxLimits(timeout=10))
+    assert (status, value) == ("CRASHED", "killed by SIGUSR1")
+
+
+def write_problem(directory, expected, body="return 1"):
+    directory.mkdir(exist_ok=True)
+    (directory / "solution.py").write_text(f"def solve():\n    {body}\n", encoding="utf-8")
+    test_file = directory / "test_solution.py"
+    test_file.write_text(
+        "import os\n"
+        "from solution import solve\n\n"
+        "def test_solve():\n"
+        "    # The sandboxed run is a fork of the warm worker.\n"
+        "    with open(os.path.join(os.path.dirname(__file__), 'workers.txt'), 'a') as f:\n"
+        "        f.write(f'{os.getppid()}\\n')\n"
+        f"    assert solve() == {expected}\n",
+        encoding="utf-8"
+    )
+    return test_file
+
+
+def test_runs_reuse_the_warm_worker_and_see_fresh_code(tmp_path):
+    test_runner = runner.TestRunner(max_workers=1, limits=SandboxLimits(timeout=30))
+    try:
+        test_file = write_problem(tmp_path / "problem", expected=2, body="return 1")
+        first = test_runner.run(test_file)
+        assert first["status"] == "FAILED"
+        assert [test["outcome"] for test in first["tests"]] == ["failed"]
+
+        write_problem(tmp_path / "problem", expected=2, body="return 2")
+        second = test_runner.run(test_file)
+        assert second["status"] == "PASSED"
+        workers = (tmp_path / "problem" / "workers.txt").read_text().split()
+        assert len(workers) == 2 and workers[0] == workers[1]
+    finally:
+        test_runner.shutdown()
+
+
+def test_run_many_returns_results_in_order(tmp_path):
+    test_runner = runner.TestRunner(max_workers=2, limits=SandboxLimits(timeout=30))
+    try:
+        test_files = [write_problem(tmp_path / f"problem{i}", expected=1 if i % 2 else 0)
+                      for i in range(4)]
+        results = test_runner.run_many(test_files)
+        assert [result["status"] for result in results] == ["FAILED", "PASSED", "FAILED", "PASSED"]
+    finally:
+        test_runner.shutdown()
+    with pytest.raises(RuntimeError):
+        test_runner.run(test_files[0])
+
+
+STRUCTURED_TESTS = '''
+import time
+
+import pytest
+
+
+@pytest.fixture
+def broken():
+    raise RuntimeError("fixture failed")
+
+
+def test_passes():
+    time.sleep(0.05)
+
+
+def test_fails():
+    assert 1 + 1 == 3, "bad sum"
+
+
+@pytest.mark.skip(reason="not supported")
+def test_skipped():
+    pass
+
+
+def test_setup_error(broken):
+    pass
+
+
+@pytest.mark.parametrize("n", [1, 2])
+def test_param(n):
+    assert n == 1
+'''
+
+
+@pytest.fixture
+def test_runner():
+    test_runner = runner.TestRunner(max_workers=1, limits=SandboxLimits(timeout=30))
+    yield test_runner
+    test_runner.shutdown()
+
+
+def test_each_test_gets_a_structured_result(tmp_path, test_runner):
+    test_file = tmp_path / "test_solution.py"
+    test_file.write_text(STRUCTURED_TESTS, encoding="utf-8")
+    results = test_runner.run(test_file)
+    assert results["status"] == "FAILED"
+    tests = {test["name"]: test for test in results["tests"]}
+    assert {name: test["outcome"] for name, test in tests.items()} == {
+        "test_passes": "passed", "test_fails": "failed", "test_skipped": "skipped",
+        "test_setup_error": "error", "test_param[1]": "passed", "test_param[2]": "failed"}
+    assert tests["test_passes"]["duration"] >= 0.05 and tests["test_passes"]["message"] is None
+    assert "bad sum" in tests["test_fails"]["message"]
+    assert "not supported" in tests["test_skipped"]["message"]
+    assert "RuntimeError: fixture failed" in tests["test_setup_error"]["message"]
+    assert tests["test_setup_error"]["duration"] == 0.0
+    for test in tests.values():
+        assert set(test) == {"name", "outcome", "duration", "setup", "teardown", "message"}
+    phases = [phase["name"] for phase in results["phases"]]
+    assert phases[0] == "collect" and "test_passes [call]" in phases
+
+
+def test_collection_errors_are_reported_as_tests(tmp_path, test_runner):
+    test_file = tmp_path / "test_solution.py"
+    test_file.write_text("from solution import missing\n\ndef test_x():\n    pass\n",
+                         encoding="utf-8")
+    results = test_runner.run(test_file)
+    [test] = results["tests"]
+    assert test["outcome"] == "error" and test["name"].startswith("ERROR collecting")
+    assert "solution" in test["message"]
+
+
+def test_slowest_tests_report(tmp_path, capsys):
+    def result(name, duration, setup=0.0):
+        return {"name": name, "outcome": "passed", "duration": duration, "setup": setup,
+                "teardown": 0.0, "message": None}
+
+    tests = [result("fast", 0.01), result("slow_setup", 0.1, setup=0.5), result("slow", 0.3),
+             dict(result("killed", None), outcome="timeout")]
+    assert [test["name"] for test in runner.slowest_tests(tests, 2)] == ["slow_setup", "slow"]
+
+    solution_dir = tmp_path / "two_sum_1"
+    solution_dir.mkdir()
+    (solution_dir / "solution.json").write_text(
+        json.dumps({"test_results": {"tests": tests}}), encoding="utf-8")
+    assert runner.main(["--solved", str(tmp_path), "slowest", "--top", "1"]) == 0
+    assert capsys.readouterr().out.split() == ["600.0", "ms", "passed", "two_sum_1::slow_setup"]
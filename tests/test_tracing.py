@@ -0,0 +1,101 @@
+"""Tests for pipeline tracing spans and Chrome trace export (tracing.py)."""
+
+import asyncio
+import concurrent.futures
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Turn tracing on with an empty event list for one test."""
+    recorded = []
+    monkeypatch.setattr(tracing, "_events", recorded)
+    monkeypatch.setattr(tracing, "_enabled", True)
+    return recorded
+
+
+def by_name(events):
+    return {event["name"]: event for event in events}
+
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(tracing, "_events", recorded)
+    monkeypatch.setattr(tracing, "_enabled", False)
+    with tracing.span("problem") as span:
+        span.set(status="PASSED")
+    tracing.add_event("pytest_call", 0.0, 1.0)
+    assert recorded == []
+
+
+def test_nested_spans_link_to_their_parent(events):
+    with tracing.span("process_problem", problem_file="two_sum.txt") as problem:
+        with tracing.span("analysis") as analysis:
+            analysis.set(cached=True)
+        tracing.add_event("pytest_call", 0.0, 0.5, args={"test": "test_sum"})
+    spans = by_name(events)
+    assert spans["process_problem"]["args"] == {"problem_file": "two_sum.txt",
+                                                "span_id": problem.span_id}
+    assert spans["analysis"]["args"]["parent_id"] == problem.span_id
+    assert spans["analysis"]["args"]["cached"] is True
+    assert spans["pytest_call"]["args"]["parent_id"] == problem.span_id
+    assert len({event["tid"] for event in events}) == 1
+    for event in events:
+        assert event["ph"] == "X" and event["dur"] >= 0
+
+
+def test_errors_are_recorded_on_the_span(events):
+    with pytest.raises(ValueError):
+        with tracing.span("implementation"):
+            raise ValueError("no code block")
+    assert events[0]["args"]["error"] == "ValueError: no code block"
+
+
+def test_concurrent_problems_get_their_own_lanes(events):
+    @tracing.traced("llm_call", "stage")
+    async def llm_call(stage):
+        await asyncio.sleep(0.01)
+        return stage
+
+    async def problem(name):
+        with tracing.span("process_problem", problem=name) as span:
+            await llm_call("analysis")
+            return span
+
+    async def run():
+        return await asyncio.gather(problem("a"), problem("b"))
+
+    first, second = asyncio.run(run())
+    assert first.lane != second.lane
+    calls = [event for event in events if event["name"] == "llm_call"]
+    assert sorted(call["args"]["parent_id"] for call in calls) == sorted(
+        [first.span_id, second.span_id])
+    for call in calls:
+        parent = first if call["args"]["parent_id"] == first.span_id else second
+        assert call["tid"] == parent.lane and call["args"]["stage"] == "analysis"
+
+
+def test_spans_in_worker_threads_keep_their_parent(events):
+    traced_sum = tracing.traced("validate")(sum)
+    with tracing.span("process_problem") as problem:
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            plain = executor.submit(traced_sum, [1, 2]).result()
+            carried = executor.submit(tracing.in_current_context(traced_sum, [1, 2])).result()
+    assert plain == carried == 3
+    orphan, child = [event for event in events if event["name"] == "validate"]
+    assert "parent_id" not in orphan["args"]
+    assert child["args"]["parent_id"] == problem.span_id
+
+
+def test_export_writes_a_sorted_chrome_trace(events, tmp_path):
+    tracing.add_event("second", 2.0, 0.1)
+    tracing.add_event("first", 1.0, 0.1)
+    path = tracing.export(tmp_path / "traces" / "run.json")
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    assert trace["displayTimeUnit"] == "ms"
+    assert [event["name"] for event in trace["traceEvents"]] == ["first", "second"]
+    assert trace["traceEvents"][0]["ts"] == 1e6 and trace["traceEvents"][0]["dur"] == 1e5
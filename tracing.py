@@ -0,0 +1,162 @@
+"""
+This module records structured tracing spans for the problem pipeline and
+exports them as a Chrome trace / Perfetto JSON file. Spans nest through a
+context variable, so parent/child links survive concurrent problems. When
+tracing is disabled, span() returns a shared no-op context manager.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+_enabled = False
+_events = []
+_events_lock = threading.Lock()
+_span_ids = itertools.count(1)
+_lanes = itertools.count(1)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.span_id = next(_span_ids)
+        self.parent = None
+        self.lane = None
+        self._token = None
+        self._start = None
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        # Each top-level span gets its own track so concurrent problems don't interleave.
+        self.lane = self.parent.lane if self.parent is not None else next(_lanes)
+        self._token = _current_span.set(self)
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.time()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        add_event(self.name, self._start, end - self._start, self.lane, self.args,
+                  self.span_id, self.parent.span_id if self.parent else None)
+        return False
+
+    def set(self, **args):
+        """Attach extra arguments to the span."""
+        self.args.update(args)
+
+def enable():
+    """Start recording spans."""
+    global _enabled
+    _enabled = True
+
+def is_enabled():
+    return _enabled
+
+def span(name, **args):
+    """Return a context manager that records a span named name while tracing is on."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, args)
+
+def traced(name, *arg_names):
+    """Decorator that wraps a function (sync or async) in a span.
+
+    Named arguments listed in arg_names are recorded as span arguments.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def span_args(args, kwargs):
+            if not arg_names:
+                return {}
+            bound = signature.bind_partial(*args, **kwargs)
+            return {arg: str(bound.arguments[arg]) for arg in arg_names if arg in bound.arguments}
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                with _Span(name, span_args(args, kwargs)):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, span_args(args, kwargs)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def in_current_context(func, *args):
+    """Return a callable that runs func(*args) in a copy of the current context.
+
+    Executors don't propagate context variables, so use this when handing work
+    to another thread to keep its spans attached to the caller's span.
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args)
+
+def current_span():
+    """Return the innermost open span, or None."""
+    return _current_span.get()
+
+def add_event(name, start, duration, lane=None, args=None, span_id=None, parent_id=None):
+    """Record a completed span; start is epoch seconds and duration is seconds.
+
+    Used directly for phases timed elsewhere, e.g. pytest phases in a test worker.
+    """
+    if not _enabled:
+        return
+    if lane is None:
+        parent = _current_span.get()
+        lane = parent.lane if parent is not None else 0
+        if parent_id is None and parent is not None:
+            parent_id = parent.span_id
+    event_args = dict(args or {})
+    event_args["span_id"] = span_id if span_id is not None else next(_span_ids)
+    if parent_id is not None:
+        event_args["parent_id"] = parent_id
+    event = {
+        "name": name,
+        "ph": "X",
+        "ts": start * 1e6,
+        "dur": duration * 1e6,
+        "pid": os.getpid(),
+        "tid": lane,
+        "args": event_args
+    }
+    with _events_lock:
+        _events.append(event)
+
+def export(path):
+    """Write recorded spans as a Chrome trace JSON file and return its path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _events_lock:
+        events = sorted(_events, key=lambda event: event["ts"])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
@@ -0,0 +1,60 @@
+"""
+This module watches the unsolved problems directory for daemon mode.
+The directory is polled, so it works on every platform and filesystem without
+extra dependencies. A new or modified file is only reported once its size and
+modification time have stayed the same for the debounce period, so files
+that are still being written are not picked up half-finished.
+"""
+
+import time
+from pathlib import Path
+
+class ProblemWatcher:
+    """Reports new or modified problem files once they have stopped changing."""
+
+    def __init__(self, directory, pattern="*.txt", debounce=2.0):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.debounce = debounce
+        # Signatures already reported, and changes still waiting out the debounce.
+        self._reported = {}
+        self._pending = {}
+
+    def _scan(self):
+        signatures = {}
+        for path in self.directory.glob(self.pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def prime(self):
+        """Treat the files currently present as already reported."""
+        self._reported = self._scan()
+        self._pending.clear()
+
+    def poll(self):
+        """Return files that changed and have been stable for the debounce period."""
+        now = time.monotonic()
+        current = self._scan()
+        ready = []
+        for path, signature in current.items():
+            if self._reported.get(path) == signature:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)
+            elif now - pending[1] >= self.debounce and signature[1] > 0:
+                del self._pending[path]
+                self._reported[path] = signature
+                ready.append(path)
+        for path in list(self._reported):
+            if path not in current:
+                del self._reported[path]
+        for path in list(self._pending):
+            if path not in current:
+                del self._pending[path]
+        return sorted(ready)